@@ -1,9 +1,7 @@
 # ./app/__init__.py
-from .models import db  
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from .services.logging_service import setup_logger
 
 load_dotenv()
@@ -15,7 +13,43 @@ host = os.environ.get("DB_HOST")
 port = os.environ.get("DB_PORT")
 dbatabase = os.environ.get("POSTGRES_DB")
 # DATABASE_URL = f"postgresql://{os.environ.get('POSTGRES_USER')}:{os.environ.get('POSTGRES_PASSWORD')}@{os.environ.get('DB_HOST', 'localhost')}:5432/{os.environ.get('POSTGRES_DB')}"
-DATABASE_URL = f"postgresql://{user}:{password}@{host}:{port}/{dbatabase}"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-logger = setup_logger("app")
\ No newline at end of file
+DATABASE_URL = os.environ.get("DATABASE_URL") or f"postgresql://{user}:{password}@{host}:{port}/{dbatabase}"
+logger = setup_logger("app")
+
+
+@lru_cache(maxsize=None)
+def get_engine():
+    """
+    Create the SQLAlchemy engine on first use.
+
+    Building the engine imports SQLAlchemy and the psycopg2 driver, so it is
+    deferred until something actually talks to the database.
+    """
+    from sqlalchemy import create_engine
+    connect_args = {}
+    if DATABASE_URL.startswith("sqlite"):
+        # local runs (load tests) share the engine between worker threads
+        connect_args["check_same_thread"] = False
+    return create_engine(DATABASE_URL, connect_args=connect_args)
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker():
+    """
+    Return the process-wide session factory bound to `get_engine()`.
+    """
+    from sqlalchemy.orm import sessionmaker
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+def __getattr__(name):
+    # Keep `from app import engine, SessionLocal` working without paying
+    # for the engine at import time.
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    if name == "db":
+        from .models import db
+        return db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,7 @@
 #/celery_app
 from celery import Celery
+from kombu import Queue
+from celery.signals import worker_init, worker_process_init
 import os
 from dotenv import load_dotenv
 
@@ -36,4 +38,69 @@ celery.conf.task_default_queue = 'celery'
 celery.conf.task_default_exchange = 'celery'
 celery.conf.task_default_exchange_type = 'direct'
 celery.conf.task_default_routing_key = 'celery'
+
+# Transcription jobs are scheduled shortest-first (see
+# app/services/pipeline_service.py): a priority queue plus a separate queue
+# for very long videos so they are never starved by a stream of short ones.
+# x-max-priority can't be added to an existing queue, hence new queue names
+# instead of turning 'celery' into a priority queue.
+celery.conf.task_queues = (
+    Queue('celery', routing_key='celery'),
+    Queue('transcripts', routing_key='transcripts', queue_arguments={'x-max-priority': 10}),
+    Queue('transcripts.long', routing_key='transcripts.long'),
+)
+celery.conf.task_default_priority = 5
+
+# A worker holds exactly the task it is running. Without this an idle slot's
+# prefetched messages (maybe a 3-hour stream) wait behind the current job
+# and priorities only apply to what is still in the broker.
+celery.conf.task_acks_late = True
+celery.conf.worker_prefetch_multiplier = 1
+# a killed worker's job goes back to the queue; checkpoints make the rerun cheap
+celery.conf.task_reject_on_worker_lost = True
 celery.autodiscover_tasks(['app'])
+
+# `celery -A app.celery_app.celery beat` polls the registered channels for
+# new uploads (app/services/channel_service.py) and evicts stale prefetches
+celery.conf.beat_schedule = {
+    'sync-channels': {
+        'task': 'app.tasks.sync_channels_task',
+        'schedule': float(os.environ.get("CHANNEL_SYNC_INTERVAL", 900)),
+    },
+    # drop speculative downloads nobody asked a transcript for
+    'evict-prefetches': {
+        'task': 'app.tasks.evict_prefetches_task',
+        'schedule': float(os.environ.get("PREFETCH_EVICT_INTERVAL", 600)),
+    },
+    # re-queue or fail transcripts whose worker died mid-job
+    'reap-stuck-transcripts': {
+        'task': 'app.tasks.reap_stuck_transcripts_task',
+        'schedule': float(os.environ.get("REAPER_INTERVAL", 300)),
+    },
+    # move admitted /transcript jobs from the per-client queues into Celery
+    'dispatch-transcripts': {
+        'task': 'app.tasks.dispatch_transcripts_task',
+        'schedule': float(os.environ.get("ADMISSION_DISPATCH_INTERVAL", 10)),
+    },
+}
+
+
+@worker_process_init.connect
+def install_ffmpeg_signal_handlers(**kwargs):
+    # revoke(terminate=True) SIGTERMs the pool child; take FFmpeg down with it
+    from app.services.ffmpeg_service import install_signal_handlers
+    install_signal_handlers()
+
+
+@worker_process_init.connect
+def install_tracing(**kwargs):
+    # per pool process: the span exporter's thread doesn't survive the fork
+    from app.services.tracing_service import init_tracing
+    init_tracing("worker")
+
+
+@worker_init.connect
+def install_task_profiling(**kwargs):
+    # opt-in, see app/services/profiling_service.py; connected before the pool forks
+    from app.services.profiling_service import install_celery_profiling
+    install_celery_profiling()
@@ -30,7 +30,8 @@ import os
 import subprocess
 import sys
 import datetime
-import yt_dlp
+from app.services.ffmpeg_service import run_ffmpeg
+from app.services.tracing_service import span
 
 # ------------------------------------------------------------------------------
 # Configure Logging
@@ -61,21 +62,39 @@ def progress_hook(d):
         logger.error("Error during download!")
 
 
-def download_youtube_video(url: str, download_path: str) -> str:
+def download_youtube_video(url: str, download_path: str, outtmpl: str = '%(title)s.%(ext)s', retries: int = 10,
+                           audio_only: bool = False) -> str:
     """
     Download the highest-quality (audio+video) stream of a YouTube video
     using yt-dlp.
 
+    Interrupted downloads leave a `.part` file behind; calling this again
+    with the same outtmpl continues it instead of starting over.
+
     :param url: The YouTube video URL.
     :param download_path: The directory where the file will be saved.
+    :param outtmpl: yt-dlp output template, relative to download_path. Use a
+                    stable one (e.g. '%(id)s.%(ext)s') if the download should
+                    be resumable across retries.
+    :param retries: yt-dlp retries for the whole file and for each fragment.
+    :param audio_only: fetch only the best audio stream (much smaller; enough
+                       for transcription).
     :return: Absolute path to the downloaded video file.
     """
+    # yt-dlp takes a noticeable part of a second to import; only pay for it
+    # in the processes that actually download something.
+    import yt_dlp
+
     logger.info(f"Starting video download for URL: {url}")
     logger.debug(f"Download path: {download_path}")
 
     ydl_opts = {
-        'format': 'bv+ba/best',  # best video + best audio, fallback to 'best'
-        'outtmpl': os.path.join(download_path, '%(title)s.%(ext)s'),
+        # best video + best audio (or only the audio), fallback to 'best'
+        'format': 'ba/best' if audio_only else 'bv+ba/best',
+        'outtmpl': os.path.join(download_path, outtmpl),
+        'continuedl': True,  # resume .part files
+        'retries': retries,
+        'fragment_retries': retries,
         'logger': logger,
         'progress_hooks': [progress_hook],
         # If you have a cookies file for age-restricted videos:
@@ -87,7 +106,8 @@ def download_youtube_video(url: str, download_path: str) -> str:
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
             logger.info("Extracting video info, about to download...")
-            result = ydl.extract_info(url, download=True)
+            with span("yt_dlp.download", **{"url.full": url, "media.audio_only": audio_only}):
+                result = ydl.extract_info(url, download=True)
         except yt_dlp.utils.DownloadError as e:
             logger.exception("DownloadError encountered (yt-dlp).")
             raise e
@@ -100,7 +120,10 @@ def download_youtube_video(url: str, download_path: str) -> str:
     else:
         video_info = result
 
-    downloaded_filename = ydl.prepare_filename(video_info)
+    # after a merge the final file is not what prepare_filename() predicts
+    requested = video_info.get('requested_downloads') or []
+    downloaded_filename = requested[0].get('filepath') if requested else None
+    downloaded_filename = downloaded_filename or ydl.prepare_filename(video_info)
     logger.info(f"Download finished. File saved to: {downloaded_filename}")
     return downloaded_filename
 
@@ -137,6 +160,24 @@ def ffprobe_duration(input_file: str) -> float:
         return 0.0
 
 
+def ffprobe_has_audio(input_file: str) -> bool:
+    """
+    Return True if the file has at least one audio stream.
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a",
+        "-show_entries", "stream=index",
+        "-of", "csv=p=0",
+        input_file
+    ]
+    try:
+        return bool(subprocess.check_output(cmd, stderr=subprocess.STDOUT).decode().strip())
+    except Exception:
+        logger.exception("Failed to probe audio streams.")
+        return False
+
+
 # A dictionary to list the 10 supported formats and short explanations:
 SUPPORTED_AUDIO_FORMATS = {
     'flac': {
@@ -226,12 +267,38 @@ def prompt_for_audio_format() -> (str, str, bool):
     return chosen_format, chosen_codec, is_lossless
 
 
+# Encoding profiles for build_ffmpeg_audio_command.
+#   channels / sample_rate: None keeps whatever the source has.
+#   opus_application / opus_frame_duration: only used with libopus.
+AUDIO_PROFILES = {
+    'music': {
+        'desc': "Keep source channels and sample rate (general purpose).",
+        'channels': None,
+        'sample_rate': None,
+        'opus_application': None,
+        'opus_frame_duration': None,
+    },
+    'speech': {
+        'desc': "Mono 16 kHz tuned for speech - all Whisper needs.",
+        'channels': 1,
+        'sample_rate': 16000,
+        'opus_application': 'voip',
+        # Nobody listens to these live, so use Opus' largest frame: fewer
+        # packets means less container/packet overhead at low bitrates.
+        'opus_frame_duration': 60,
+    },
+}
+
+
 def build_ffmpeg_audio_command(
     input_file: str,
     output_file: str,
     codec: str,
     bitrate_kbps: int = 96,
-    use_vbr: bool = False
+    use_vbr: bool = False,
+    profile: str = 'music',
+    threads: int = None,
+    filter_threads: int = None
 ) -> list:
     """
     Build an FFmpeg command list for advanced audio compression or single-pass encoding.
@@ -241,9 +308,25 @@ def build_ffmpeg_audio_command(
     :param codec: e.g. "libopus", "libfdk_aac", "flac", "libmp3lame", "pcm_s16le"
     :param bitrate_kbps: integer bitrate for CBR (if codec is lossy)
     :param use_vbr: if True (for some codecs like Opus), enable -vbr on
+    :param profile: key of AUDIO_PROFILES, e.g. 'music' or 'speech'
+    :param threads: value for -threads (None lets FFmpeg decide)
+    :param filter_threads: value for -filter_threads (None lets FFmpeg decide)
     :return: list of command arguments
     """
-    cmd = ["ffmpeg", "-y", "-i", input_file, "-vn"]  # strip video
+    if profile not in AUDIO_PROFILES:
+        raise ValueError(f"Unknown audio profile: {profile}")
+    settings = AUDIO_PROFILES[profile]
+
+    cmd = ["ffmpeg", "-y"]
+    if filter_threads:
+        cmd.extend(["-filter_threads", str(filter_threads)])
+    cmd.extend(["-i", input_file, "-vn"])  # strip video
+
+    # Downmix / resample before the encoder sees the audio
+    if settings['channels']:
+        cmd.extend(["-ac", str(settings['channels'])])
+    if settings['sample_rate']:
+        cmd.extend(["-ar", str(settings['sample_rate'])])
 
     if codec == "flac":
         # FLAC is lossless
@@ -259,12 +342,17 @@ def build_ffmpeg_audio_command(
         cmd.extend(["-c:a", "libopus"])
         if use_vbr:
             cmd.extend(["-vbr", "on"])   # enable variable bitrate for Opus
+        if settings['opus_application']:
+            cmd.extend(["-application", settings['opus_application']])
+        if settings['opus_frame_duration']:
+            cmd.extend(["-frame_duration", str(settings['opus_frame_duration'])])
         cmd.extend(["-b:a", f"{bitrate_kbps}k"])
 
     elif codec == "libfdk_aac":
         # HE-AAC v2 if you do: -profile:a aac_he_v2
-        # We'll keep it simpler for demonstration:
-        cmd.extend(["-c:a", "libfdk_aac", "-profile:a", "aac_he_v2"])
+        # v2 relies on parametric stereo, so mono profiles fall back to HE-AAC v1
+        aac_profile = "aac_he" if settings['channels'] == 1 else "aac_he_v2"
+        cmd.extend(["-c:a", "libfdk_aac", "-profile:a", aac_profile])
         cmd.extend(["-b:a", f"{bitrate_kbps}k"])
 
     elif codec == "mp2":
@@ -279,6 +367,9 @@ def build_ffmpeg_audio_command(
         # fallback or anything else
         cmd.extend(["-c:a", codec, "-b:a", f"{bitrate_kbps}k"])
 
+    if threads:
+        cmd.extend(["-threads", str(threads)])
+
     cmd.append(output_file)
     return cmd
 
@@ -292,6 +383,10 @@ def compress_audio_extreme(
     initial_bitrate_kbps: int = 96,
     min_bitrate_kbps: int = 32,
     use_vbr: bool = False,
+    profile: str = 'music',
+    threads: int = None,
+    filter_threads: int = None,
+    progress_callback=None,
 ) -> str:
     """
     Convert the media to one of the 10 supported audio formats with optional iterative 
@@ -305,9 +400,13 @@ def compress_audio_extreme(
     :param initial_bitrate_kbps: start bitrate for iterative approach
     :param min_bitrate_kbps: min allowed bitrate
     :param use_vbr: if True, we pass -vbr on (currently for Opus)
+    :param profile: key of AUDIO_PROFILES ('music' or 'speech')
+    :param threads: value for FFmpeg -threads (None lets FFmpeg decide)
+    :param filter_threads: value for FFmpeg -filter_threads
+    :param progress_callback: called with 0-100 percent of each encode attempt
     :return: path to final compressed file or empty string on failure
     """
-    logger.info("Starting advanced audio compression...")
+    logger.info(f"Starting advanced audio compression (profile: {profile})...")
 
     base, _ = os.path.splitext(input_file)
     out_file_base = f"{base}.{chosen_format}"
@@ -317,6 +416,8 @@ def compress_audio_extreme(
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         out_file_base = f"{base}_{timestamp}.{chosen_format}"
 
+    duration = ffprobe_duration(input_file) if progress_callback else None
+
     # Single pass if:
     # 1) It's lossless (FLAC or WAV), or
     # 2) no max_size_mb specified
@@ -327,13 +428,16 @@ def compress_audio_extreme(
             output_file=out_file_base,
             codec=chosen_codec,
             bitrate_kbps=initial_bitrate_kbps,
-            use_vbr=use_vbr
+            use_vbr=use_vbr,
+            profile=profile,
+            threads=threads,
+            filter_threads=filter_threads
         )
         logger.debug(f"FFmpeg command: {' '.join(cmd)}")
 
         try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as e:
+            run_ffmpeg(cmd, duration=duration, progress_callback=progress_callback)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             logger.exception("FFmpeg conversion failed!")
             raise RuntimeError("Audio conversion failed.") from e
 
@@ -359,14 +463,17 @@ def compress_audio_extreme(
             output_file=attempt_path,
             codec=chosen_codec,
             bitrate_kbps=current_bitrate,
-            use_vbr=use_vbr
+            use_vbr=use_vbr,
+            profile=profile,
+            threads=threads,
+            filter_threads=filter_threads
         )
         logger.info(f"Trying {current_bitrate} kbps => {attempt_path}")
         logger.debug(f"FFmpeg command: {' '.join(cmd)}")
 
         try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as e:
+            run_ffmpeg(cmd, duration=duration, progress_callback=progress_callback)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             logger.exception("FFmpeg conversion failed at this bitrate!")
             raise RuntimeError("Audio conversion failed.") from e
 
@@ -404,13 +511,20 @@ def compress_audio_extreme(
     return attempt_path
 
 
-def convert_video(input_file: str, output_ext: str) -> str:
+def convert_video(input_file: str, output_ext: str, progress_callback=None, segmented: bool = False,
+                  segment_seconds: float = None, workers: int = None) -> str:
     """
     Convert video to a new container/codec (keeping both video & audio),
     no iterative approach.
 
     :param input_file: Path to the input video file.
     :param output_ext: e.g. 'mp4', 'mkv', 'avi', etc.
+    :param progress_callback: called with 0-100 percent while converting
+    :param segmented: split at keyframes and encode the pieces in parallel
+                      (see app/services/transcode_service.py); keeps only the
+                      first video and audio stream
+    :param segment_seconds: piece length for segmented mode
+    :param workers: parallel encodes for segmented mode
     :return: Path to the converted file.
     """
     logger.info(f"Converting video to format: {output_ext}")
@@ -421,12 +535,20 @@ def convert_video(input_file: str, output_ext: str) -> str:
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"{base}_{timestamp}.{output_ext}"
 
+    if segmented:
+        from app.services.transcode_service import transcode_segmented
+        return transcode_segmented(
+            input_file, output_file, segment_seconds=segment_seconds, workers=workers,
+            progress_callback=progress_callback,
+        )
+
     cmd = ["ffmpeg", "-y", "-i", input_file, output_file]
     logger.debug(f"FFmpeg command: {' '.join(cmd)}")
 
+    duration = ffprobe_duration(input_file) if progress_callback else None
     try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
+        run_ffmpeg(cmd, duration=duration, progress_callback=progress_callback)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
         logger.exception("FFmpeg video conversion failed!")
         raise RuntimeError("Video conversion failed.") from e
 
@@ -1,10 +1,12 @@
 # /convertor_server.py
 import logging
+import math
 import sys
-from flask import Flask, request, jsonify, send_from_directory
+import time
+from flask import Flask, request, jsonify, send_from_directory, redirect, make_response
 import os
 # from .tasks import triger_download
-from app.tasks import triger_download,transcribe_audio_task
+from app.tasks import sync_channel_task,prefetch_audio_task,transcode_video_task,send_transcript_webhooks
 from app.youtube_service import (
     fetch_channel_videos, 
     fetch_playlist_videos, 
@@ -12,18 +14,42 @@ from app.youtube_service import (
     get_channel_playlists, 
     fetch_video_details,
     search_channels,
-    get_youtube_video_id_from_url
+    get_youtube_video_id_from_url,
+    parse_iso8601_duration
 )
 from flask_cors import CORS
-from app import SessionLocal
-from celery import chain
 from celery.result import AsyncResult
 from app.celery_app import celery
-from app.models.models import Transcript
+from app.models.models import Transcript, Channel
 from app.services.database_service import get_session
+from app.services.caption_service import CAPTION_MODES
+from app.services.transcription_service import BACKENDS
+from app.services.pipeline_service import (
+    TRANSCRIPTS_QUEUE, classify_duration, lookup_duration, start_transcript_job
+)
+from app.services.admission_service import (
+    API_KEY_HEADER, UnknownApiKey, check_admission, create_api_client, dispatch_pending, get_admission_status,
+    identify_client, new_job, submit
+)
+from app.services.prefetch_service import PREFETCH_ENABLED, release_prefetch, reserve_prefetch
+from app.services.rate_limit_service import RateLimitExceeded, get_rate_limit_status
+from app.services.storage_service import storage_for
+from app.services.channel_service import add_channel, channel_to_dict, resolve_channel
+from app.services.overview_service import build_channel_overview
+from app.services.webhook_service import WEBHOOK_SECRET, is_valid_callback_url, subscribe, unsubscribe_waiting
+from app.services.export_service import FORMATS as EXPORT_FORMATS, get_export
+from app.services.search_service import SEARCH_ENABLED, search as search_transcripts
+from app.services.tracing_service import init_tracing
+from app.services.profiling_service import (
+    PROFILE_DIR, PROFILING_ENABLED, install_flask_profiling, is_profile_file, is_profile_token, list_profiles
+)
 app = Flask(__name__)
 CORS(app)
+install_flask_profiling(app)
+init_tracing("api", flask_app=app)
 logger = logging.getLogger("YouTubeDownloader")
+# containers /transcode accepts
+VIDEO_CONTAINERS = ("mp4", "mkv", "webm", "mov", "avi")
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
@@ -34,17 +60,121 @@ if project_root not in sys.path:
 def index():
     return jsonify({"message": "Hello"}), 200
 
+
+@app.errorhandler(RateLimitExceeded)
+def handle_rate_limit_exceeded(e):
+    response = jsonify({"error": str(e), "upstream": e.upstream, "retry_after": round(e.retry_after, 1)})
+    response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+    return response, 429
+
+
+@app.route('/metrics/rate_limits', methods=['GET'])
+def rate_limits():
+    return jsonify(get_rate_limit_status()), 200
+
+
+@app.route('/metrics/admission', methods=['GET'])
+def admission_status():
+    return jsonify(get_admission_status()), 200
+
+
+@app.route('/api_clients', methods=['POST'])
+def api_clients():
+    """
+    POST {"name", "weight", "max_concurrent", "max_queued", "rate_per_minute"}
+    with "Authorization: Bearer <ADMIN_TOKEN>": register a /transcript
+    client. The API key is only shown in this response.
+    """
+    admin_token = os.environ.get("ADMIN_TOKEN", "")
+    if not admin_token or request.headers.get("Authorization") != f"Bearer {admin_token}":
+        return jsonify({"error": "Forbidden"}), 403
+    data = request.json or {}
+    name = (data.get("name") or "").strip()
+    if not name:
+        return jsonify({"error": "name is required"}), 400
+    limits = {}
+    for field in ("weight", "max_concurrent", "max_queued", "rate_per_minute"):
+        value = data.get(field)
+        if value is not None:
+            if not isinstance(value, int) or value < 1:
+                return jsonify({"error": f"{field} must be a positive integer"}), 400
+            limits[field] = value
+
+    with get_session() as session:
+        client, api_key = create_api_client(session, name, **limits)
+        body = {
+            "id": client.id,
+            "name": client.name,
+            "api_key": api_key,
+            "weight": client.weight,
+            "max_concurrent": client.max_concurrent,
+            "max_queued": client.max_queued,
+            "rate_per_minute": client.rate_per_minute,
+        }
+    return jsonify(body), 201
+
+
+def profile_access_denied():
+    """
+    403 unless the request carries "Authorization: Bearer <PROFILE_TOKEN>".
+    """
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.startswith("Bearer ") or not is_profile_token(authorization[len("Bearer "):]):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@app.route('/profiles', methods=['GET'])
+def profiles():
+    """
+    Stored request/task profiles, newest first (PROFILING_ENABLED), with
+    "Authorization: Bearer <PROFILE_TOKEN>".
+    """
+    denied = profile_access_denied()
+    if denied:
+        return denied
+    limit = request.args.get("limit", default=100, type=int)
+    return jsonify({"enabled": PROFILING_ENABLED, "profiles": list_profiles(limit)}), 200
+
+
+@app.route('/profiles/<path:filename>', methods=['GET'])
+def profile_file(filename):
+    denied = profile_access_denied()
+    if denied:
+        return denied
+    if not is_profile_file(filename):
+        return jsonify({"error": "Not a profile"}), 404
+    return send_from_directory(os.path.abspath(PROFILE_DIR), filename, as_attachment=True)
+
 @app.route('/transcript', methods=['GET', 'POST'])
 def transcript_video():
     # session = SessionLocal()
     if request.method == 'GET':
         video_url = request.args.get("video_url")
+        captions = request.args.get("captions")
+        backend = request.args.get("backend")
+        callback_url = request.args.get("callback_url")
     else:  # POST
         data = request.json
         video_url = data.get("video_url")
+        captions = data.get("captions")
+        backend = data.get("backend")
+        callback_url = data.get("callback_url")
 
     if not video_url:
         return jsonify({"error": "No URL provided"}), 400
+
+    if captions is not None and captions not in CAPTION_MODES:
+        return jsonify({"error": f"captions must be one of {', '.join(CAPTION_MODES)}"}), 400
+
+    if backend is not None and backend not in BACKENDS:
+        return jsonify({"error": f"backend must be one of {', '.join(BACKENDS)}"}), 400
+
+    if callback_url is not None and not WEBHOOK_SECRET:
+        return jsonify({"error": "Callbacks are not available (WEBHOOK_SECRET is not set)"}), 503
+
+    if callback_url is not None and not is_valid_callback_url(callback_url):
+        return jsonify({"error": "callback_url must be an http(s) URL on a public or allowed host"}), 400
     
     video_id = get_youtube_video_id_from_url(video_url)
     
@@ -53,40 +183,129 @@ def transcript_video():
 
     
     with get_session() as session:
+        try:
+            client = identify_client(session, request.headers.get(API_KEY_HEADER), request.remote_addr)
+        except UnknownApiKey as e:
+            return jsonify({"error": str(e)}), 401
         try:
             transcript = session.query(Transcript).filter_by(video_id=video_id).first()
             
             if not transcript:
-                transcript = Transcript(video_id=video_id)
+                # a new job: 429 (RateLimitExceeded) if the client is over its quota
+                check_admission(client)
+                transcript = Transcript(video_id=video_id, captions_mode=captions, backend=backend)
                 session.add(transcript)
+                if callback_url:
+                    subscribe(session, video_id, callback_url)
             else:
                 
                 if transcript and transcript.status == "done":
-                    return jsonify({"transcript": transcript.transcript,"videoId":transcript.video_id,"created_at":transcript.created_at})
+                    return jsonify({"transcript": transcript.transcript,"videoId":transcript.video_id,"created_at":transcript.created_at,"source":transcript.source})
                 elif transcript and transcript.status != 'done':
-                    return jsonify({"status": transcript.status,"videoId":transcript.video_id,"created_at":transcript.created_at})
+                    # already running: the callback fires when that job finishes
+                    callback_registered = bool(callback_url and transcript.status != 'error')
+                    if callback_registered:
+                        subscribe(session, video_id, callback_url)
+                        session.commit()
+                        # the job may have finished (and notified) between the
+                        # status read and the commit; then nobody else will
+                        session.refresh(transcript)
+                        if transcript.status in ('done', 'error'):
+                            send_transcript_webhooks(video_id)
+                    return jsonify({"status": transcript.status,"videoId":transcript.video_id,"created_at":transcript.created_at,"callback_registered":callback_registered})
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error saving transcript: {e}")
             raise
    
     
 
-    workflow = chain(
-        triger_download.s(video_id),
-        transcribe_audio_task.s() 
-    )
-    
-    chain_result = workflow.apply_async()
-    triger_download_task_id = chain_result.parent.id 
-    transcribe_audio_task_id = chain_result.id
+    try:
+        duration = lookup_duration(video_id)
+        queue, priority = classify_duration(duration)
+        # the task ids are fixed now; the chain runs once the client's turn comes
+        job = new_job(video_id, captions=captions, backend=backend, duration=duration)
+        queue_position = submit(client, job)
+        if queue_position is None:
+            start_transcript_job(job)
+        else:
+            dispatch_pending(start_transcript_job)
+    except Exception as e:
+        # the row is committed already; left behind it would look in progress
+        # forever, so drop it and let the caller ask again
+        logger.error(f"Could not queue video_id '{video_id}': {e}")
+        try:
+            with get_session() as session:
+                if session.query(Transcript).filter_by(video_id=video_id, status="pending").delete(
+                    synchronize_session=False
+                ):
+                    unsubscribe_waiting(session, video_id)
+        except Exception as cleanup_error:
+            logger.error(f"Could not drop the unqueued transcript of video_id '{video_id}': {cleanup_error}")
+        return jsonify({"error": "Could not queue the transcription, try again later", "videoId": video_id}), 503
+    triger_download_task_id, transcribe_audio_task_id = job["task_ids"]
     
     return jsonify({
         "message": f"URL {video_url} submitted successfully!",
         "triger_download_task_id": triger_download_task_id,
-        "transcribe_audio_task_id":transcribe_audio_task_id
+        "transcribe_audio_task_id":transcribe_audio_task_id,
+        "queue": queue,
+        "priority": priority,
+        "duration": duration,
+        "client": client["name"],
+        "queue_position": queue_position
     }), 200
 
+@app.route('/transcript/<video_id>.<any(srt, vtt, json):fmt>', methods=['GET'])
+def transcript_export(video_id, fmt):
+    """
+    The finished transcript as SRT, WebVTT or sentence segments (json),
+    precomputed when the transcript was saved.
+    """
+    with get_session() as session:
+        export = get_export(session, video_id, fmt)
+        if export is None:
+            return jsonify({"error": "Transcript not found or not finished", "videoId": video_id}), 404
+        content, etag, updated_at = export.content, export.etag, export.updated_at
+
+    response = make_response(content)
+    response.headers["Content-Type"] = EXPORT_FORMATS[fmt]
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    if fmt != "json":
+        response.headers["Content-Disposition"] = f'inline; filename="{video_id}.{fmt}"'
+    response.set_etag(etag)
+    if updated_at is not None:
+        response.last_modified = updated_at
+    # answers 304 to a matching If-None-Match / If-Modified-Since
+    return response.make_conditional(request)
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    ?q=...&channel_id=...&limit=10: transcript passages about q, as
+    video_id plus the time window where it is discussed.
+    """
+    if not SEARCH_ENABLED:
+        return jsonify({"error": "Search is disabled (SEARCH_ENABLED)"}), 503
+    query = (request.args.get("q") or "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    limit = min(request.args.get("limit", default=10, type=int) or 10, 100)
+    channel_id = request.args.get("channel_id")
+
+    started = time.perf_counter()
+    with get_session() as session:
+        hits = search_transcripts(session, query, limit=limit, channel_id=channel_id)
+    return jsonify({
+        "query": query,
+        "hits": hits,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }), 200
+
+
 @app.route("/task_status/<task_id>", methods=["GET"])
 def get_transcription(task_id):
     # создаём объект результата на основе ID
@@ -122,40 +341,39 @@ def fetch_channel_videos_by_url():
     Endpoint to fetch videos from a YouTube channel using the full channel URL.
 
     Query Parameters:
-        channel_url (str): The full YouTube channel URL (e.g., https://www.youtube.com/@AIAritiv).
+        channel_url (str): The channel URL (e.g., https://www.youtube.com/@AIAritiv,
+            /channel/UC..., /user/..., /c/...) or a bare @handle.
         max_results (int, optional): Number of videos per request. Defaults to 10.
-        max_content (int, optional): Maximum number of videos to fetch. Defaults to 20.
+        page_token (str, optional): nextPageToken of the previous response.
 
     Returns:
         JSON response containing videos, hasMore flag, and nextPageToken.
     """
     channel_url = request.args.get('channel_url', default=None, type=str)
     max_results = request.args.get('max_results', default=10, type=int)
-    max_content = request.args.get('max_content', default=20, type=int)
+    page_token = request.args.get('page_token', default=None, type=str)
 
     if not channel_url:
         return jsonify({'error': 'channel_url parameter is required.'}), 400
 
-    try:
-        # Extract channel handle
-        channel_handle = extract_channel_id_from_url(channel_url)
-    except ValueError as ve:
-        return jsonify({'error': str(ve)}), 400
-
-    # Search for the channel to get channel_id
-    channels = search_channels(channel_handle, max_results=1)
-    if not channels:
-        return jsonify({'error': 'Channel not found.'}), 404
-
-    channel_id = channels[0]['channel_id']
+    # handle -> channel_id -> uploads playlist comes from the channels table
+    # after the first lookup
+    with get_session() as session:
+        try:
+            channel = resolve_channel(session, channel_url)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+        if channel is None:
+            return jsonify({'error': 'Channel not found.'}), 404
+        channel_id, uploads_playlist_id = channel.channel_id, channel.uploads_playlist_id
 
-    # Fetch videos using channel_id
-    result = fetch_channel_videos(channel_id, max_results, page_token=None, max_content=max_content)
+    result = fetch_channel_videos(channel_id, max_results, page_token=page_token, uploads_playlist_id=uploads_playlist_id)
 
     # Handle error messages
     if 'message' in result:
         return jsonify({'error': result['message']}), 404
 
+    result['channel_id'] = channel_id
     return jsonify(result), 200
 
 # @app.route('/task_status/<task_id>', methods=['GET'])
@@ -170,17 +388,27 @@ def fetch_channel_videos_by_url():
 #         "result": res.result
 #     })
 
-@app.route('/download_audio/<task_id>', methods=['GET'])
-def download_audio(task_id):
-    from app.celery_app import celery
+def send_task_artifact(task_id, result_key):
+    """
+    Send (or redirect to) the file a finished task left under result_key.
+    """
     res = celery.AsyncResult(task_id)
 
     # Check that task is done
     if res.state == 'SUCCESS':
-        audio_filepath = res.result  # e.g. /app/convertorData/video_name.ogg
-        if audio_filepath and os.path.exists(audio_filepath):
-            directory = os.path.dirname(audio_filepath)
-            filename = os.path.basename(audio_filepath)
+        result = res.result
+        file_uri = result.get(result_key) if isinstance(result, dict) else result
+        if not file_uri:
+            return jsonify({"error": "Task did not produce a file"}), 404
+
+        storage = storage_for(file_uri)
+        filename = os.path.basename(file_uri)
+        download_url = storage.download_url(file_uri, filename)
+        if download_url:
+            # object storage: let the client fetch it directly
+            return redirect(download_url, code=302)
+        if storage.exists(file_uri):
+            directory = os.path.dirname(file_uri)
             # Return the file as an attachment (i.e., "download" in browser)
             return send_from_directory(directory, filename, as_attachment=True)
         else:
@@ -192,6 +420,136 @@ def download_audio(task_id):
         }), 400
 
 
+@app.route('/download_audio/<task_id>', methods=['GET'])
+def download_audio(task_id):
+    # triger_download returns a dict; the path/URI is under audio_file_path
+    return send_task_artifact(task_id, "audio_file_path")
+
+
+@app.route('/transcode', methods=['POST'])
+def transcode_video():
+    """
+    POST {"video_url", "output_ext", "segment_seconds"}: convert a video in
+    keyframe-aligned pieces encoded in parallel. Progress is reported by
+    /task_status/<task_id>, the file is served by /download_video/<task_id>.
+    """
+    data = request.json or {}
+    video_url = data.get("video_url")
+    output_ext = (data.get("output_ext") or "mp4").lower().lstrip(".")
+    segment_seconds = data.get("segment_seconds")
+
+    if not video_url:
+        return jsonify({"error": "No URL provided"}), 400
+    if output_ext not in VIDEO_CONTAINERS:
+        return jsonify({"error": f"output_ext must be one of {', '.join(VIDEO_CONTAINERS)}"}), 400
+    if segment_seconds is not None:
+        try:
+            segment_seconds = float(segment_seconds)
+        except (TypeError, ValueError):
+            segment_seconds = 0
+        if segment_seconds <= 0:
+            return jsonify({"error": "segment_seconds must be a positive number"}), 400
+
+    video_id = get_youtube_video_id_from_url(video_url)
+    if not video_id:
+        return jsonify({"error": "Could not extract video id"}), 400
+
+    task = transcode_video_task.delay(video_id, output_ext, segment_seconds=segment_seconds)
+    return jsonify({"task_id": task.id, "videoId": video_id, "output_ext": output_ext}), 202
+
+
+@app.route('/download_video/<task_id>', methods=['GET'])
+def download_video(task_id):
+    return send_task_artifact(task_id, "output_file_path")
+
+
+@app.route('/channels', methods=['GET', 'POST'])
+def channels():
+    """
+    GET lists the synced channels; POST {"channel_id", "auto_transcribe",
+    "backfill", "backfill_pages"} registers one and runs its first sync right
+    away. channel_id may also be a channel URL or @handle.
+
+    The first sync only records the newest upload, so only later uploads
+    are transcribed. With "backfill": true the existing uploads (up to
+    backfill_pages pages of 50) are queued as well.
+    """
+    if request.method == 'GET':
+        with get_session() as session:
+            channels = session.query(Channel).filter(Channel.sync_enabled.is_(True)).order_by(Channel.created_at)
+            return jsonify([channel_to_dict(c) for c in channels]), 200
+
+    data = request.json or {}
+    channel_id = data.get("channel_id")
+    if not channel_id:
+        return jsonify({"error": "channel_id is required"}), 400
+    backfill = bool(data.get("backfill", False))
+    backfill_pages = data.get("backfill_pages")
+    if backfill_pages is not None and (not isinstance(backfill_pages, int) or backfill_pages < 1):
+        return jsonify({"error": "backfill_pages must be a positive integer"}), 400
+
+    with get_session() as session:
+        try:
+            channel = add_channel(session, channel_id, auto_transcribe=bool(data.get("auto_transcribe", True)))
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        if channel is None:
+            return jsonify({"error": "Channel not found."}), 404
+        payload = channel_to_dict(channel)
+
+    task = sync_channel_task.delay(payload["channel_id"], max_pages=backfill_pages, backfill=backfill)
+    return jsonify({"channel": payload, "sync_task_id": task.id, "backfill": backfill}), 200
+
+
+@app.route('/channels/<channel_id>', methods=['DELETE'])
+def disable_channel(channel_id):
+    with get_session() as session:
+        channel = session.get(Channel, channel_id)
+        if channel is None:
+            return jsonify({"error": "Channel not found."}), 404
+        channel.sync_enabled = False
+        payload = channel_to_dict(channel)
+    return jsonify(payload), 200
+
+
+@app.route('/channels/<channel_id>/sync', methods=['POST'])
+def sync_channel_now(channel_id):
+    with get_session() as session:
+        if session.get(Channel, channel_id) is None:
+            return jsonify({"error": "Channel not found."}), 404
+    task = sync_channel_task.delay(channel_id)
+    return jsonify({"channelId": channel_id, "sync_task_id": task.id}), 200
+
+
+@app.route('/youtube/channel_overview/<path:channel_ref>', methods=['GET'])
+def channel_overview(channel_ref):
+    """
+    Playlists, first page of uploads (with duration/statistics) and our
+    transcript status per video in one response.
+
+    channel_ref is a channel ID, @handle or channel URL.
+    Query Parameters:
+        max_results (int, optional): Uploads per page. Defaults to 10.
+        max_playlists (int, optional): Most playlists returned. Defaults to 10.
+        page_token (str, optional): nextPageToken of the uploads.
+    """
+    max_results = request.args.get('max_results', default=10, type=int)
+    max_playlists = request.args.get('max_playlists', default=10, type=int)
+    page_token = request.args.get('page_token', default=None, type=str)
+
+    with get_session() as session:
+        try:
+            channel = resolve_channel(session, channel_ref)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+        if channel is None:
+            return jsonify({'error': 'Channel not found.'}), 404
+        overview = build_channel_overview(
+            session, channel, max_results=max_results, max_playlists=max_playlists, page_token=page_token
+        )
+    return jsonify(overview), 200
+
+
 @app.route('/youtube/get_channel_playlists/<channel_id>',methods=['GET'])
 def get_channel_playlists_endpoint(channel_id):
     playlists = get_channel_playlists(channel_id)
@@ -205,12 +563,36 @@ def fetch_playlist_videos_endpoint(playlist_id):
 @app.route('/youtube/fetch_channel_videos/<channel_id>', methods=['GET'])
 def fetch_channel_videos_endpoing(channel_id):
     max_results = request.args.get('max_results', default=50, type=int)
-    videos = fetch_channel_videos(channel_id, max_results=max_results)
+    page_token = request.args.get('page_token', default=None, type=str)
+    with get_session() as session:
+        channel = session.get(Channel, channel_id)
+        uploads_playlist_id = channel.uploads_playlist_id if channel else None
+    videos = fetch_channel_videos(channel_id, max_results=max_results, page_token=page_token,
+                                  uploads_playlist_id=uploads_playlist_id)
     return jsonify(videos)
 
 @app.route("/youtube/fetch_video_details/<videoId>", methods=['GET'])
 def fetch_video_details_endpoint(videoId):
     videos_ditails = fetch_video_details(videoId)
+
+    # ?prefetch=1/0 overrides PREFETCH_ENABLED for this request
+    prefetch = request.args.get('prefetch')
+    prefetch = PREFETCH_ENABLED if prefetch is None else prefetch.lower() in ('1', 'true', 'yes')
+    if prefetch and videos_ditails:
+        try:
+            duration = parse_iso8601_duration(videos_ditails.get('duration'))
+            with get_session() as session:
+                start = reserve_prefetch(session, videoId, duration)
+            if start:
+                try:
+                    # lowest priority: real jobs always overtake speculation
+                    prefetch_audio_task.apply_async(args=[videoId, duration], queue=TRANSCRIPTS_QUEUE, priority=0)
+                except Exception:
+                    release_prefetch(videoId)
+                    raise
+        except Exception as e:
+            logger.error(f"Could not schedule prefetch of {videoId}: {e}")
+
     return jsonify(videos_ditails)
 
 
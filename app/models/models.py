@@ -7,7 +7,10 @@ from sqlalchemy import (
     DateTime,
     func,
     ForeignKey,
-    Float
+    Float,
+    Boolean,
+    LargeBinary,
+    Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -18,21 +21,37 @@ Base = declarative_base()
 
 class Transcript(Base):
     __tablename__ = 'transcripts'
+    # the stuck-job reaper looks for rows in a running status not touched for a while
+    __table_args__ = (Index('ix_transcripts_status_updated_at', 'status', 'updated_at'),)
 
     video_id = Column(String(255), primary_key=True, nullable=False)
     transcript = Column(Text, nullable=True)
     raw_json = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # last sign of life from the worker running the current stage
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # times the reaper re-queued the job
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
     status = Column(String(50), default='pending')  
     error = Column(String(255),nullable=True)  
+    # where the text came from: whisper, captions, auto_captions, fingerprint
+    source = Column(String(50), nullable=True, default='whisper')
+    # known when queued by a channel sync, otherwise filled in by the search indexer
+    channel_id = Column(String(255), nullable=True, index=True)
+    # options the job was started with, so a re-queued job runs the same way
+    captions_mode = Column(String(50), nullable=True)
+    backend = Column(String(50), nullable=True)
     words = relationship('TranscriptionWord', back_populates='transcript', cascade="all, delete-orphan")
     
     def update_status(self, new_status, session):
         """
-        statuses: done, downloading, transcribing, error
+        statuses: pending, downloading, compress_audio, queued (waiting for
+        the next stage), transcribing, done, error
         """
         try:
             self.status = new_status
+            self.heartbeat_at = func.now()
             session.add(self)
             session.commit()
         except Exception as e:
@@ -57,4 +76,143 @@ class TranscriptionWord(Base):
     end = Column(Float, nullable=False)
 
     transcript = relationship('Transcript', back_populates='words')
+
+class PipelineCheckpoint(Base):
+    """
+    Durable record of a finished pipeline stage (download, compress,
+    transcribe, persist) and the artifact it produced, so a retried chain
+    can pick up where the previous attempt stopped.
+    """
+    __tablename__ = 'pipeline_checkpoints'
+
+    video_id = Column(String(255), primary_key=True, nullable=False)
+    stage = Column(String(50), primary_key=True, nullable=False)
+    artifact_path = Column(Text, nullable=True)
+    meta = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class Channel(Base):
+    """
+    A YouTube channel we know about. Rows double as the handle ->
+    channel_id -> uploads playlist cache (channel_service.resolve_channel).
+
+    With sync_enabled, new uploads are picked up by the sync_channels beat
+    task and queued for transcription. The newest upload seen so far
+    (last_video_id / last_published_at) is the high-water mark the next
+    poll stops at.
+    """
+    __tablename__ = 'channels'
+
+    channel_id = Column(String(255), primary_key=True, nullable=False)
+    # lower-cased '@handle'
+    handle = Column(String(255), nullable=True, unique=True, index=True)
+    # lower-cased /user/ and /c/ names this channel was resolved from
+    username = Column(String(255), nullable=True, index=True)
+    custom_name = Column(String(255), nullable=True, index=True)
+    title = Column(String(255), nullable=True)
+    uploads_playlist_id = Column(String(255), nullable=False)
+    last_video_id = Column(String(255), nullable=True)
+    last_published_at = Column(DateTime(timezone=True), nullable=True)
+    sync_enabled = Column(Boolean, nullable=False, default=True)
+    auto_transcribe = Column(Boolean, nullable=False, default=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WebhookDelivery(Base):
+    """
+    One callback_url waiting for / receiving a transcript notification.
+
+    status: waiting (job still running), pending (queued for delivery),
+    delivered, failed (gave up or the receiver rejected it)
+    """
+    __tablename__ = 'webhook_deliveries'
+
+    id = Column(Integer, primary_key=True)
+    video_id = Column(String(255), nullable=False, index=True)
+    callback_url = Column(Text, nullable=False)
+    event = Column(String(50), nullable=True)
+    payload = Column(Text, nullable=True)
+    status = Column(String(50), nullable=False, default='waiting')
+    attempts = Column(Integer, nullable=False, default=0)
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+class AudioFingerprint(Base):
+    """
+    Chromaprint fingerprint of a video's audio (fingerprint_service). When
+    the transcript was reused from another video, matched_video_id and
+    matched_offset (seconds into that video) record where it came from.
+    """
+    __tablename__ = 'audio_fingerprints'
+
+    video_id = Column(String(255), primary_key=True, nullable=False)
+    # raw items, unsigned 32-bit little-endian
+    fingerprint = Column(LargeBinary, nullable=False)
+    duration = Column(Float, nullable=True)
+    matched_video_id = Column(String(255), nullable=True, index=True)
+    matched_offset = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class FingerprintHash(Base):
+    """
+    Inverted index over audio_fingerprints: a (shifted) fingerprint item and
+    where it occurs.
+    """
+    __tablename__ = 'fingerprint_hashes'
+
+    id = Column(Integer, primary_key=True)
+    hash = Column(Integer, nullable=False, index=True)
+    video_id = Column(String(255), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+
+class TranscriptExport(Base):
+    """
+    A finished transcript rendered as srt, vtt or json (sentence segments),
+    see export_service.
+    """
+    __tablename__ = 'transcript_exports'
+
+    video_id = Column(String(255), ForeignKey('transcripts.video_id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    format = Column(String(10), primary_key=True, nullable=False)
+    content = Column(Text, nullable=False)
+    etag = Column(String(64), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TranscriptChunk(Base):
+    """
+    One time window of a transcript in the search index (search_service);
+    id is the row of its vector in the index matrix.
+    """
+    __tablename__ = 'transcript_chunks'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    video_id = Column(String(255), nullable=False, index=True)
+    channel_id = Column(String(255), nullable=True, index=True)
+    start = Column(Float, nullable=False)
+    end = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+    # superseded by a re-index; the vector row stays in the matrix
+    deleted = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ApiClient(Base):
+    """
+    A caller of /transcript and its quotas (admission_service). Only the
+    SHA-256 of the API key is stored.
+    """
+    __tablename__ = 'api_clients'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    api_key_hash = Column(String(64), nullable=False, unique=True, index=True)
+    weight = Column(Integer, nullable=False, default=1)
+    max_concurrent = Column(Integer, nullable=False, default=2)
+    max_queued = Column(Integer, nullable=False, default=20)
+    rate_per_minute = Column(Integer, nullable=False, default=10)
+    enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 db = Base.metadata
\ No newline at end of file
@@ -1,22 +1,32 @@
 # ./app/openai_service.py
 import os
-from openai import OpenAI
+from functools import lru_cache
 from dotenv import load_dotenv
+from app.services.rate_limit_service import acquire
 
 load_dotenv()
 
 # Загружаем API-ключ из окружения
 API_KEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=API_KEY)
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    Build the OpenAI client on first use so importing this module stays cheap.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=API_KEY)
+
 
 def transcribe_audio(audio_path: str) -> str:
+    # blocks for up to OPENAI_RATE_MAX_WAIT when the shared bucket is empty
+    acquire("openai")
     with open(audio_path, "rb") as audio_file:
-        raw_transcription = client.audio.transcriptions.create(
+        raw_transcription = get_client().audio.transcriptions.create(
             model="whisper-1",
             file=audio_file,
             timestamp_granularities=["word"],
             response_format="verbose_json"
         )
     return raw_transcription
-
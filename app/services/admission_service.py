@@ -0,0 +1,341 @@
+# app/services/admission_service.py
+"""
+Per-client admission control and fair queuing for /transcript.
+
+Callers identify themselves with an X-API-Key header (api_clients table);
+without one they are an anonymous client per IP address, unless
+ADMISSION_REQUIRE_API_KEY is set. Every client has:
+
+  rate_per_minute  new jobs per minute (token bucket in Redis, shared with
+                   rate_limit_service), burst of the same size
+  max_concurrent   its jobs in the Celery pipeline at the same time
+  max_queued       its jobs waiting to be dispatched
+  weight           its share when several clients have jobs waiting
+
+A new job is checked against the rate and the queue length (429 with
+Retry-After when either is exhausted) and pushed onto the client's own
+sub-queue in Redis. dispatch_pending() moves jobs from the sub-queues into
+Celery while fewer than ADMISSION_CAPACITY admitted jobs are in flight,
+choosing the client by smooth weighted round-robin among those below their
+max_concurrent. So one client's burst waits in its own sub-queue instead of
+in front of everyone else in the broker.
+
+Dispatch runs right after a job is submitted, when an admitted job finishes
+(release) and from a beat task as a safety net. If Redis is unreachable,
+admission fails open like the rate limiter: jobs go straight to Celery.
+
+Redis keys (ADMISSION_PREFIX):
+  queue:<client>   list of job JSON
+  active:<client>  zset video_id -> dispatch time
+  owner            hash video_id -> client
+  clients          hash client -> {"weight", "max_concurrent"}
+  wrr              hash client -> current round-robin weight
+  dispatch_lock    held by the dispatcher
+"""
+import hashlib
+import json
+import os
+import secrets
+import time
+import uuid
+from sqlalchemy.orm import Session
+from app.models.models import ApiClient
+from app.services.logging_service import setup_logger
+from app.services.rate_limit_service import RateLimitExceeded, get_redis, take_tokens
+
+logger = setup_logger("app.services.admission_service")
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_REQUIRE_API_KEY = os.environ.get("ADMISSION_REQUIRE_API_KEY", "false").lower() in ("1", "true", "yes")
+# admitted jobs in the Celery pipeline at once, across all clients
+ADMISSION_CAPACITY = int(os.environ.get("ADMISSION_CAPACITY", 8))
+# a dispatched job that never released its slot (lost worker) frees it after this
+ADMISSION_SLOT_TTL = float(os.environ.get("ADMISSION_SLOT_TTL", 6 * 3600))
+# Retry-After for a full sub-queue
+ADMISSION_QUEUE_RETRY_AFTER = float(os.environ.get("ADMISSION_QUEUE_RETRY_AFTER", 60))
+ADMISSION_PREFIX = "admission:"
+API_KEY_HEADER = "X-API-Key"
+
+# limits of keyless (per-IP) callers and the defaults of new api_clients rows
+DEFAULT_LIMITS = {
+    "weight": int(os.environ.get("ADMISSION_DEFAULT_WEIGHT", 1)),
+    "max_concurrent": int(os.environ.get("ADMISSION_DEFAULT_CONCURRENCY", 2)),
+    "max_queued": int(os.environ.get("ADMISSION_DEFAULT_QUEUED", 20)),
+    "rate_per_minute": int(os.environ.get("ADMISSION_DEFAULT_RATE", 10)),
+}
+
+DISPATCH_LOCK_SECONDS = 30
+
+# ARGV: key prefix, client keys
+FORGET_IDLE_SCRIPT = """
+local prefix = ARGV[1]
+for i = 2, #ARGV do
+    local client = ARGV[i]
+    if redis.call('LLEN', prefix .. 'queue:' .. client) == 0
+            and redis.call('ZCARD', prefix .. 'active:' .. client) == 0 then
+        redis.call('HDEL', prefix .. 'clients', client)
+        redis.call('HDEL', prefix .. 'wrr', client)
+    end
+end
+return 0
+"""
+
+
+class UnknownApiKey(Exception):
+    pass
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def create_api_client(session: Session, name: str, **limits) -> tuple:
+    """
+    Register a client. The key is only ever returned here; the table keeps
+    its hash.
+
+    :return: (ApiClient, api_key)
+    """
+    api_key = secrets.token_urlsafe(32)
+    values = dict(DEFAULT_LIMITS, **{key: value for key, value in limits.items() if value is not None})
+    client = ApiClient(name=name, api_key_hash=hash_api_key(api_key), enabled=True, **values)
+    session.add(client)
+    session.flush()
+    return client, api_key
+
+
+def identify_client(session: Session, api_key: str, remote_addr: str) -> dict:
+    """
+    :return: {"key", "name", "weight", "max_concurrent", "max_queued", "rate_per_minute"}
+    :raises UnknownApiKey: bad or disabled key, or no key while one is required
+    """
+    if not api_key:
+        if ADMISSION_REQUIRE_API_KEY:
+            raise UnknownApiKey(f"{API_KEY_HEADER} header required")
+        return dict(DEFAULT_LIMITS, key=f"ip:{remote_addr or 'unknown'}", name="anonymous")
+
+    client = session.query(ApiClient).filter_by(api_key_hash=hash_api_key(api_key)).first()
+    if client is None or not client.enabled:
+        raise UnknownApiKey("Unknown or disabled API key")
+    return {
+        "key": f"client:{client.id}",
+        "name": client.name,
+        "weight": max(1, client.weight),
+        "max_concurrent": client.max_concurrent,
+        "max_queued": client.max_queued,
+        "rate_per_minute": client.rate_per_minute,
+    }
+
+
+def new_job(video_id: str, captions: str = None, backend: str = None, duration=None) -> dict:
+    """
+    A transcript job with its task ids fixed up front, so they can be handed
+    to the caller before the job is dispatched.
+    """
+    return {
+        "video_id": video_id,
+        "captions": captions,
+        "backend": backend,
+        "duration": duration,
+        "task_ids": [str(uuid.uuid4()), str(uuid.uuid4())],
+    }
+
+
+def _key(*parts) -> str:
+    return ADMISSION_PREFIX + ":".join(parts)
+
+
+def check_admission(client: dict):
+    """
+    Take one job from the client's rate quota and make sure its sub-queue
+    has room.
+
+    :raises RateLimitExceeded: with the seconds after which to retry
+    """
+    if not ADMISSION_ENABLED:
+        return
+    try:
+        redis = get_redis()
+        queued = redis.llen(_key("queue", client["key"]))
+        if queued >= client["max_queued"]:
+            raise RateLimitExceeded(f"client {client['name']} (queue full)", ADMISSION_QUEUE_RETRY_AFTER)
+        rate = client["rate_per_minute"]
+        allowed, _, wait = take_tokens(f"client:{client['key']}", rate, rate / 60)
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.warning(f"Admission control unavailable, admitting {client['key']}: {e}")
+        return
+    if not allowed:
+        raise RateLimitExceeded(f"client {client['name']}", wait)
+
+
+def submit(client: dict, job: dict):
+    """
+    Push the job onto the client's sub-queue.
+
+    :return: position in the sub-queue (1 = next), or None if the job was not
+             queued and the caller has to start it itself
+    """
+    if not ADMISSION_ENABLED:
+        return None
+    try:
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.hset(_key("clients"), client["key"], json.dumps({
+            "weight": client["weight"], "max_concurrent": client["max_concurrent"],
+        }))
+        pipe.rpush(_key("queue", client["key"]), json.dumps(job))
+        position = pipe.execute()[-1]
+    except Exception as e:
+        logger.warning(f"Admission queue unavailable, starting '{job['video_id']}' directly: {e}")
+        return None
+    logger.info(f"Queued '{job['video_id']}' for {client['key']} at position {position}")
+    return position
+
+
+def release(video_id: str):
+    """
+    The job of video_id has finished (or failed): free its client's slot.
+    """
+    if not ADMISSION_ENABLED:
+        return
+    try:
+        redis = get_redis()
+        client_key = redis.hget(_key("owner"), video_id)
+        if client_key is None:
+            return
+        client_key = client_key.decode()
+        pipe = redis.pipeline()
+        pipe.zrem(_key("active", client_key), video_id)
+        pipe.hdel(_key("owner"), video_id)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not release the admission slot of '{video_id}': {e}")
+
+
+def _client_state(redis, clients: dict) -> dict:
+    """
+    {client: (queued, active)} after dropping slots older than ADMISSION_SLOT_TTL.
+    """
+    cutoff = time.time() - ADMISSION_SLOT_TTL
+    pipe = redis.pipeline()
+    for client_key in clients:
+        pipe.zremrangebyscore(_key("active", client_key), "-inf", cutoff)
+        pipe.llen(_key("queue", client_key))
+        pipe.zcard(_key("active", client_key))
+    results = pipe.execute()
+    return {
+        client_key: (results[3 * i + 1], results[3 * i + 2])
+        for i, client_key in enumerate(clients)
+    }
+
+
+def dispatch_pending(start_job) -> int:
+    """
+    Move waiting jobs into Celery, fairly, while there is capacity.
+
+    :param start_job: callable(job) that queues the job's workflow
+    :return: number of jobs dispatched
+    """
+    if not ADMISSION_ENABLED:
+        return 0
+    try:
+        redis = get_redis()
+        lock_key = _key("dispatch_lock")
+        token = uuid.uuid4().hex
+        if not redis.set(lock_key, token, nx=True, ex=DISPATCH_LOCK_SECONDS):
+            # another process is dispatching; it picks up our job too
+            return 0
+    except Exception as e:
+        logger.warning(f"Admission dispatcher unavailable: {e}")
+        return 0
+
+    dispatched = 0
+    try:
+        clients = {
+            client_key.decode(): json.loads(config)
+            for client_key, config in redis.hgetall(_key("clients")).items()
+        }
+        state = _client_state(redis, clients)
+        current = {key.decode(): int(value) for key, value in redis.hgetall(_key("wrr")).items()}
+        in_flight = sum(active for _, active in state.values())
+
+        while in_flight < ADMISSION_CAPACITY:
+            eligible = [
+                client_key for client_key, (queued, active) in state.items()
+                if queued > 0 and active < clients[client_key]["max_concurrent"]
+            ]
+            if not eligible:
+                break
+            # smooth weighted round-robin: everyone gains its weight, the
+            # leader is picked and pays back the total
+            total = 0
+            for client_key in eligible:
+                weight = clients[client_key]["weight"]
+                current[client_key] = current.get(client_key, 0) + weight
+                total += weight
+            chosen = max(eligible, key=lambda client_key: current[client_key])
+            current[chosen] -= total
+
+            queued, active = state[chosen]
+            raw = redis.lpop(_key("queue", chosen))
+            if raw is None:
+                state[chosen] = (0, active)
+                continue
+            job = json.loads(raw)
+            pipe = redis.pipeline()
+            pipe.zadd(_key("active", chosen), {job["video_id"]: time.time()})
+            pipe.hset(_key("owner"), job["video_id"], chosen)
+            pipe.execute()
+            try:
+                start_job(job)
+            except Exception as e:
+                logger.error(f"Could not start '{job['video_id']}' for {chosen}, putting it back: {e}")
+                redis.lpush(_key("queue", chosen), raw)
+                release(job["video_id"])
+                break
+            state[chosen] = (queued - 1, active + 1)
+            in_flight += 1
+            dispatched += 1
+
+        idle = [client_key for client_key, (queued, active) in state.items() if queued <= 0 and active == 0]
+        busy = {key: value for key, value in current.items() if key not in idle and key in clients}
+        if busy:
+            redis.hset(_key("wrr"), mapping=busy)
+        if idle:
+            # forget idle clients (so their weight doesn't pile up), unless a
+            # job arrived for them in the meantime
+            redis.register_script(FORGET_IDLE_SCRIPT)(keys=[], args=[ADMISSION_PREFIX] + idle)
+    except Exception as e:
+        logger.error(f"Admission dispatch failed after {dispatched} job(s): {e}")
+    finally:
+        try:
+            if redis.get(lock_key) == token.encode():
+                redis.delete(lock_key)
+        except Exception:
+            pass
+
+    if dispatched:
+        logger.info(f"Dispatched {dispatched} admitted job(s)")
+    return dispatched
+
+
+def get_admission_status() -> dict:
+    """
+    Waiting and running jobs per client.
+    """
+    status = {"enabled": ADMISSION_ENABLED, "capacity": ADMISSION_CAPACITY, "clients": {}}
+    if not ADMISSION_ENABLED:
+        return status
+    try:
+        redis = get_redis()
+        clients = {
+            client_key.decode(): json.loads(config)
+            for client_key, config in redis.hgetall(_key("clients")).items()
+        }
+        for client_key, (queued, active) in _client_state(redis, clients).items():
+            status["clients"][client_key] = dict(clients[client_key], queued=queued, active=active)
+    except Exception as e:
+        status["error"] = str(e)
+    return status
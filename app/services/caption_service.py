@@ -0,0 +1,228 @@
+# app/services/caption_service.py
+"""
+Caption fast-path: when a video already has YouTube captions, build the
+transcript from them instead of downloading the media and paying Whisper.
+
+Modes (CAPTIONS_MODE or the `captions` parameter of /transcript):
+  off    - always use the download + Whisper pipeline
+  manual - use manually uploaded captions only
+  auto   - manual captions, falling back to YouTube's auto-generated ones
+"""
+import html
+import os
+import re
+from app.services.logging_service import setup_logger
+from app.youtube_service import fetch_video_details
+from app.services.rate_limit_service import RateLimitExceeded
+
+logger = setup_logger("app.services.caption_service")
+
+CAPTION_MODES = ("off", "manual", "auto")
+CAPTIONS_MODE = os.environ.get("CAPTIONS_MODE", "manual")
+CAPTIONS_LANGUAGES = [
+    lang.strip() for lang in os.environ.get("CAPTIONS_LANGUAGES", "en").split(",") if lang.strip()
+]
+
+TIMESTAMP_RE = r"(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})"
+CUE_TIMING_RE = re.compile(rf"^{TIMESTAMP_RE}\s+-->\s+{TIMESTAMP_RE}")
+INLINE_TIMESTAMP_RE = re.compile(rf"<{TIMESTAMP_RE}>")
+TAG_RE = re.compile(r"</?[^>]+>")
+
+
+def _to_seconds(hours, minutes, seconds, millis) -> float:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def _clean(text: str) -> str:
+    return html.unescape(TAG_RE.sub("", text)).strip()
+
+
+def _spread_words(text: str, start: float, end: float) -> list:
+    """
+    Cue-level captions have no word timing: spread the cue's duration over
+    its words proportionally to their length.
+    """
+    words = text.split()
+    if not words:
+        return []
+    total_chars = sum(len(w) for w in words)
+    duration = max(0.0, end - start)
+    result = []
+    cursor = start
+    for word in words:
+        word_end = cursor + duration * len(word) / total_chars
+        result.append({"start": round(cursor, 3), "end": round(word_end, 3), "word": word})
+        cursor = word_end
+    return result
+
+
+def _timed_words(line: str, cue_start: float, cue_end: float) -> list:
+    """
+    Split a line with inline <hh:mm:ss.mmm> tags (YouTube auto captions)
+    into words carrying their own start times.
+    """
+    pieces = []  # (start, text)
+    cursor = 0
+    start = cue_start
+    for match in INLINE_TIMESTAMP_RE.finditer(line):
+        pieces.append((start, line[cursor:match.start()]))
+        start = _to_seconds(*match.groups())
+        cursor = match.end()
+    pieces.append((start, line[cursor:]))
+
+    result = []
+    for i, (piece_start, piece_text) in enumerate(pieces):
+        piece_end = pieces[i + 1][0] if i + 1 < len(pieces) else cue_end
+        result.extend(_spread_words(_clean(piece_text), piece_start, piece_end))
+    return result
+
+
+def parse_vtt(path: str) -> tuple:
+    """
+    Parse a WebVTT file into (text, words_list) where words_list has the same
+    shape transcribe_audio_task stores: [{"start", "end", "word"}, ...].
+
+    YouTube auto captions repeat the previous line in every cue ("rolling"
+    captions) and carry per-word timing in inline tags. When such tags are
+    present only the tagged lines are used; otherwise consecutive duplicate
+    lines are dropped and words are spread over their cue.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    has_inline_timing = INLINE_TIMESTAMP_RE.search(content) is not None
+    words_list = []
+    lines_out = []
+    last_line = None
+
+    for block in re.split(r"\r?\n\r?\n", content):
+        lines = block.splitlines()
+        for index, line in enumerate(lines):
+            timing = CUE_TIMING_RE.match(line.strip())
+            if timing:
+                groups = timing.groups()
+                cue_start = _to_seconds(*groups[:4])
+                cue_end = _to_seconds(*groups[4:])
+                text_lines = lines[index + 1:]
+                break
+        else:
+            continue  # WEBVTT header, NOTE, STYLE...
+
+        for raw in text_lines:
+            if has_inline_timing:
+                if not INLINE_TIMESTAMP_RE.search(raw):
+                    continue
+                words = _timed_words(raw, cue_start, cue_end)
+                clean = _clean(raw)
+            else:
+                clean = _clean(raw)
+                if not clean or clean == last_line:
+                    continue
+                words = _spread_words(clean, cue_start, cue_end)
+            if not words:
+                continue
+            words_list.extend(words)
+            lines_out.append(clean)
+            last_line = clean
+
+    return " ".join(lines_out), words_list
+
+
+def _pick_track(tracks: dict, languages: list):
+    """
+    Return the best matching language key in a yt-dlp subtitles dict.
+    """
+    for lang in languages:
+        for key in (f"{lang}-orig", lang):
+            if key in tracks:
+                return key
+        for key in tracks:
+            if key.split("-")[0] == lang:
+                return key
+    return None
+
+
+def download_captions(video_id: str, download_path: str, mode: str, languages: list = None):
+    """
+    Fetch a caption track through yt-dlp's subtitle extraction.
+
+    :return: (vtt_path, source) where source is 'captions' or
+             'auto_captions', or (None, None) when nothing usable exists
+    """
+    import yt_dlp
+
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    languages = list(languages or CAPTIONS_LANGUAGES)
+    base_opts = {
+        'skip_download': True,
+        'quiet': True,
+        'logger': logger,
+        'outtmpl': os.path.join(download_path, '%(id)s.%(ext)s'),
+        'subtitlesformat': 'vtt',
+    }
+
+    with yt_dlp.YoutubeDL(base_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    if info.get('language') and info['language'] not in languages:
+        languages.append(info['language'])
+
+    choices = [('captions', info.get('subtitles') or {}, 'writesubtitles')]
+    if mode == "auto":
+        choices.append(('auto_captions', info.get('automatic_captions') or {}, 'writeautomaticsub'))
+
+    for source, tracks, flag in choices:
+        lang = _pick_track(tracks, languages)
+        if not lang:
+            continue
+        logger.info(f"Found {source} track '{lang}' for video_id '{video_id}'")
+        os.makedirs(download_path, exist_ok=True)
+        opts = dict(base_opts, subtitleslangs=[lang], **{flag: True})
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            processed = ydl.process_ie_result(info, download=True)
+        requested = (processed or {}).get('requested_subtitles') or {}
+        path = (requested.get(lang) or {}).get('filepath')
+        if path and os.path.exists(path):
+            return path, source
+        logger.warning(f"yt-dlp did not write the {source} track '{lang}' for video_id '{video_id}'")
+
+    return None, None
+
+
+def fetch_caption_transcript(video_id: str, download_path: str, mode: str = None):
+    """
+    Try to build a transcript from existing captions.
+
+    :return: {"text", "words", "source"} or None to fall back to Whisper
+    """
+    mode = mode or CAPTIONS_MODE
+    if mode not in CAPTION_MODES:
+        raise ValueError(f"Unknown captions mode: {mode}")
+    if mode == "off":
+        return None
+
+    if mode == "manual":
+        # contentDetails.caption is a 1-unit API call; skip yt-dlp entirely
+        # when YouTube says there are no manual captions.
+        try:
+            details = fetch_video_details(video_id)
+        except RateLimitExceeded:
+            # out of API quota; yt-dlp can still find out without it
+            details = None
+        if details and details.get('caption') != 'true':
+            logger.info(f"No manual captions for video_id '{video_id}'")
+            return None
+
+    vtt_path, source = download_captions(video_id, download_path, mode)
+    if not vtt_path:
+        return None
+
+    try:
+        text, words_list = parse_vtt(vtt_path)
+    finally:
+        os.remove(vtt_path)
+
+    if not words_list:
+        logger.warning(f"Caption track for video_id '{video_id}' was empty")
+        return None
+    return {"text": text, "words": words_list, "source": source}
@@ -9,4 +9,21 @@ def update_celery_task_state(task, state, meta):
         task.update_state(state=state, meta=meta)
     except Exception as exc:
         logger.error(f"failed to update celery task status tasl.request: {task.request} task.name: {task.name}")
-        raise task.retry(exc=exc, countdown=60)
\ No newline at end of file
+        raise task.retry(exc=exc, countdown=60)
+
+def make_progress_reporter(task, step, start_percent, end_percent):
+    """
+    Build a callback that maps a stage's own 0-100 progress onto the
+    [start_percent, end_percent] slice of the task's overall progress.
+
+    Failures are only logged: a missed progress update must not abort
+    (or retry) the stage that is reporting it.
+    """
+    def report(stage_percent):
+        percent = start_percent + (end_percent - start_percent) * stage_percent / 100
+        try:
+            task.update_state(state="PROGRESS", meta={"step": step, "percent": round(percent, 1)})
+        except Exception as exc:
+            logger.warning(f"failed to report progress for task.name: {task.name}: {exc}")
+
+    return report
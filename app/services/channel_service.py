@@ -0,0 +1,211 @@
+# app/services/channel_service.py
+"""
+Incremental channel sync.
+
+A Channel row remembers its uploads playlist and the newest upload seen so
+far. Each sync reads the uploads playlist from the top only until it meets
+that high-water mark, so a channel without new videos costs one API page
+(1 quota unit) per poll no matter how many videos it has. New uploads are
+queued for transcription with their durations from one batched videos.list
+call, so the shortest-first scheduler can place them.
+
+The first sync of a channel only records the mark: the uploads that were
+already there are not "new" and are only queued when a backfill is asked
+for explicitly.
+"""
+import datetime
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import Channel
+from app.services.logging_service import setup_logger
+from app.services.pipeline_service import enqueue_transcript
+
+logger = setup_logger("app.services.channel_service")
+
+# pages of 50 read per sync; bounds the backfill of a newly added channel
+CHANNEL_SYNC_MAX_PAGES = int(os.environ.get("CHANNEL_SYNC_MAX_PAGES", 1))
+# playlistItems.list page size used by fetch_uploads_since
+UPLOADS_PAGE_SIZE = 50
+
+
+def parse_published_at(value: str):
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def format_published_at(value):
+    """
+    RFC 3339 in UTC, as the Data API returns it, so it compares as a string.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # SQLite hands back naive datetimes; they were stored as UTC
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def channel_to_dict(channel: Channel) -> dict:
+    return {
+        "channel_id": channel.channel_id,
+        "handle": channel.handle,
+        "title": channel.title,
+        "uploads_playlist_id": channel.uploads_playlist_id,
+        "last_video_id": channel.last_video_id,
+        "last_published_at": format_published_at(channel.last_published_at),
+        "sync_enabled": channel.sync_enabled,
+        "auto_transcribe": channel.auto_transcribe,
+        "last_synced_at": channel.last_synced_at.isoformat() if channel.last_synced_at else None,
+    }
+
+
+def resolve_channel(session: Session, reference: str):
+    """
+    Channel row for a channel URL, @handle or channel ID.
+
+    Rows are the persistent lookup cache: an ID, handle, /user/ name or /c/
+    name seen before costs no API call. Otherwise one channels().list call
+    (forHandle / id / forUsername, 1 quota unit) fills the cache. Only /c/
+    custom URLs, which the API can't look up directly, may fall back to a
+    100-unit search.
+
+    :return: the Channel, or None if YouTube doesn't know the channel
+    :raises ValueError: reference isn't a channel URL, handle or ID
+    """
+    from app.youtube_service import parse_channel_url, fetch_channel_info, search_channels
+
+    kind, value = parse_channel_url(reference)
+    if kind == 'id':
+        channel = session.get(Channel, value)
+    elif kind == 'handle':
+        channel = session.query(Channel).filter(Channel.handle == value).first()
+    elif kind == 'username':
+        channel = session.query(Channel).filter(Channel.username == value.lower()).first()
+    else:
+        channel = session.query(Channel).filter(Channel.custom_name == value.lower()).first()
+    if channel is not None:
+        return channel
+
+    if kind == 'id':
+        info = fetch_channel_info(channel_id=value)
+    elif kind == 'handle':
+        info = fetch_channel_info(handle=value)
+    elif kind == 'username':
+        info = fetch_channel_info(username=value)
+    else:
+        # most custom URLs match the channel's handle
+        info = fetch_channel_info(handle=value)
+        if info is None:
+            found = search_channels(value, max_results=1)
+            info = fetch_channel_info(channel_id=found[0]['channel_id']) if found else None
+    if not info or not info['uploads_playlist_id']:
+        return None
+
+    # the handle asked for is the channel's even if customUrl isn't set
+    handle = info['handle'] or (value if kind == 'handle' else None)
+    try:
+        with session.begin_nested():
+            channel = session.get(Channel, info['channel_id'])
+            if channel is None:
+                channel = Channel(channel_id=info['channel_id'], sync_enabled=False, auto_transcribe=False)
+                session.add(channel)
+            channel.title = info['title']
+            channel.uploads_playlist_id = info['uploads_playlist_id']
+            if handle:
+                # handles move between channels; the row holding it last loses it
+                session.query(Channel).filter(
+                    Channel.handle == handle, Channel.channel_id != info['channel_id']
+                ).update({Channel.handle: None}, synchronize_session=False)
+                channel.handle = handle
+            if kind == 'username':
+                channel.username = value.lower()
+            elif kind == 'custom':
+                channel.custom_name = value.lower()
+            session.flush()
+    except IntegrityError:
+        # a concurrent first lookup stored the channel first; use its row
+        channel = session.get(Channel, info['channel_id'])
+        if channel is None:
+            raise
+    logger.info(f"Resolved {reference} -> {channel.channel_id} ({channel.handle})")
+    return channel
+
+
+def add_channel(session: Session, reference: str, auto_transcribe: bool = True):
+    """
+    Register (or re-enable) a channel for syncing.
+
+    :param reference: channel URL, @handle or channel ID
+    :return: the Channel, or None if YouTube doesn't know the channel
+    """
+    channel = resolve_channel(session, reference)
+    if channel is None:
+        return None
+    channel.sync_enabled = True
+    channel.auto_transcribe = auto_transcribe
+    return channel
+
+
+def sync_channel(session: Session, channel: Channel, max_pages: int = None, backfill: bool = False) -> list:
+    """
+    Fetch the uploads newer than the channel's high-water mark, queue them
+    for transcription (if auto_transcribe) and move the mark forward.
+
+    A channel without a mark yet only gets one: its existing uploads are
+    queued only with backfill (up to max_pages pages of them).
+
+    :return: the new videos, newest first
+    """
+    from app.youtube_service import fetch_uploads_since, fetch_video_durations
+
+    first_sync = channel.last_video_id is None
+    max_pages = max_pages or CHANNEL_SYNC_MAX_PAGES
+    new_videos = fetch_uploads_since(
+        channel.uploads_playlist_id,
+        last_video_id=channel.last_video_id,
+        last_published_at=format_published_at(channel.last_published_at),
+        max_pages=max_pages if backfill or not first_sync else 1,
+    )
+    if first_sync and not backfill:
+        if new_videos:
+            channel.last_video_id = new_videos[0]["video_id"]
+            channel.last_published_at = parse_published_at(new_videos[0]["published_at"])
+        channel.last_synced_at = datetime.datetime.now(datetime.timezone.utc)
+        logger.info(
+            f"Channel '{channel.channel_id}': first sync, high-water mark set to {channel.last_video_id}; "
+            f"existing uploads not queued"
+        )
+        return []
+
+    if not first_sync and len(new_videos) >= max_pages * UPLOADS_PAGE_SIZE:
+        # paging stopped before reaching the mark
+        logger.warning(
+            f"Channel '{channel.channel_id}': more than {len(new_videos)} new uploads since "
+            f"{channel.last_video_id}; older ones are skipped (raise CHANNEL_SYNC_MAX_PAGES to catch up)"
+        )
+
+    queued = 0
+    if new_videos and channel.auto_transcribe:
+        try:
+            durations = fetch_video_durations([video["video_id"] for video in new_videos])
+        except Exception as e:
+            logger.warning(f"Could not fetch durations for channel '{channel.channel_id}': {e}")
+            durations = {}
+        # oldest first, so equal-priority jobs run in upload order
+        for video in reversed(new_videos):
+            if enqueue_transcript(
+                session, video["video_id"], duration=durations.get(video["video_id"]), channel_id=channel.channel_id
+            ):
+                queued += 1
+
+    if new_videos:
+        channel.last_video_id = new_videos[0]["video_id"]
+        channel.last_published_at = parse_published_at(new_videos[0]["published_at"])
+    channel.last_synced_at = datetime.datetime.now(datetime.timezone.utc)
+
+    logger.info(
+        f"Channel '{channel.channel_id}': {len(new_videos)} new upload(s), {queued} queued for transcription"
+    )
+    return new_videos
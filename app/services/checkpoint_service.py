@@ -0,0 +1,96 @@
+# app/services/checkpoint_service.py
+"""
+Durable per-stage checkpoints for the transcription pipeline.
+
+Every stage of triger_download / transcribe_audio_task records the artifact
+it produced once it has finished:
+
+  download   - the downloaded media file
+  compress   - the (VAD-trimmed) compressed audio, meta holds the offset map
+  transcribe - <audio>.transcript.json with the backend result
+  persist    - the transcript row was written
+
+A retried chain asks for the checkpoint of each stage first and skips the
+stage if its artifact still exists (on disk or in object storage, see
+storage_service).
+
+Once the transcript is persisted the download and compress checkpoints are
+cleared together with their files (and, with s3, the copy this node fetched);
+only the transcription result is kept.
+"""
+import json
+import os
+from sqlalchemy.orm import Session
+from app.models.models import PipelineCheckpoint
+from app.services.logging_service import setup_logger
+from app.services.storage_service import artifact_exists, is_remote, storage_for
+
+logger = setup_logger("app.services.checkpoint_service")
+
+STAGES = ("download", "compress", "transcribe", "persist")
+# intermediate files, not needed any more once the transcript is persisted
+INTERMEDIATE_STAGES = ("download", "compress")
+
+
+def get_checkpoint(session: Session, video_id: str, stage: str):
+    """
+    Return the usable checkpoint for (video_id, stage), or None.
+
+    A checkpoint whose artifact has disappeared (cleaned up, deleted from
+    the bucket) is treated as missing so the stage simply runs again.
+    """
+    checkpoint = session.get(PipelineCheckpoint, (video_id, stage))
+    if checkpoint is None:
+        return None
+    if checkpoint.artifact_path and not artifact_exists(checkpoint.artifact_path):
+        logger.info(f"Checkpoint {stage} for video_id '{video_id}' points at a missing file, ignoring it")
+        return None
+    return checkpoint
+
+
+def get_checkpoint_meta(checkpoint) -> dict:
+    if checkpoint is None or not checkpoint.meta:
+        return {}
+    return json.loads(checkpoint.meta)
+
+
+def save_checkpoint(session: Session, video_id: str, stage: str, artifact_path: str = None, meta: dict = None):
+    """
+    Record that `stage` finished for video_id, replacing an older record.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    checkpoint = session.get(PipelineCheckpoint, (video_id, stage))
+    if checkpoint is None:
+        checkpoint = PipelineCheckpoint(video_id=video_id, stage=stage)
+        session.add(checkpoint)
+    if artifact_path and not is_remote(artifact_path):
+        artifact_path = os.path.abspath(artifact_path)
+    checkpoint.artifact_path = artifact_path
+    checkpoint.meta = json.dumps(meta, ensure_ascii=False) if meta is not None else None
+    logger.debug(f"Checkpoint {stage} saved for video_id '{video_id}': {checkpoint.artifact_path}")
+    return checkpoint
+
+
+def clear_checkpoints(session: Session, video_id: str, stages=None, delete_artifacts: bool = True) -> int:
+    """
+    Forget the checkpoints of video_id (all stages by default) and delete
+    their artifacts, so the next run starts from scratch.
+
+    :return: number of checkpoints removed
+    """
+    query = session.query(PipelineCheckpoint).filter(PipelineCheckpoint.video_id == video_id)
+    if stages:
+        query = query.filter(PipelineCheckpoint.stage.in_(list(stages)))
+    cleared = 0
+    for checkpoint in query.all():
+        if delete_artifacts and checkpoint.artifact_path:
+            try:
+                storage_for(checkpoint.artifact_path).delete(checkpoint.artifact_path)
+            except Exception as e:
+                logger.warning(f"Could not delete {checkpoint.artifact_path} of video_id '{video_id}': {e}")
+        session.delete(checkpoint)
+        cleared += 1
+    if cleared:
+        logger.info(f"Cleared {cleared} checkpoint(s) of video_id '{video_id}'")
+    return cleared
@@ -1,4 +1,4 @@
-from app import SessionLocal
+from app import get_sessionmaker
 from contextlib import contextmanager
 from app import setup_logger
 
@@ -6,7 +6,7 @@ logger = setup_logger("app.services.database_service")
 
 @contextmanager
 def get_session():
-    session = SessionLocal()
+    session = get_sessionmaker()()
     try:
         yield session
         session.commit()
@@ -0,0 +1,155 @@
+# app/services/export_service.py
+"""
+Subtitle and segment exports of a finished transcript.
+
+The stored words ([{"start", "end", "word"}, ...]) are walked once; the same
+pass groups them into subtitle cues (written out as SRT and WebVTT as they
+close) and into sentence segments. The results are stored in
+transcript_exports when the transcript is saved, so
+/transcript/<video_id>.srt|.vtt|.json only has to send them.
+
+Cues close at the end of a sentence, at a pause, or when they would get too
+long to read; segments close at the end of a sentence or at a pause.
+"""
+import hashlib
+import io
+import json
+import os
+from sqlalchemy.orm import Session
+from app.models.models import Transcript, TranscriptExport
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.export_service")
+
+CUE_MAX_CHARS = int(os.environ.get("EXPORT_CUE_MAX_CHARS", 84))
+CUE_MAX_SECONDS = float(os.environ.get("EXPORT_CUE_MAX_SECONDS", 6))
+# a silence this long ends a cue and a segment even without punctuation
+PAUSE_SECONDS = float(os.environ.get("EXPORT_PAUSE_SECONDS", 1.0))
+SEGMENT_MAX_SECONDS = float(os.environ.get("EXPORT_SEGMENT_MAX_SECONDS", 30))
+
+SENTENCE_END = (".", "!", "?", "…")
+
+FORMATS = {
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600 * 1000)
+    minutes, millis = divmod(millis, 60 * 1000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _vtt_escape(text: str) -> str:
+    # cue text is markup in WebVTT; "-->" must not appear in it either
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _join(words: list) -> str:
+    return " ".join(word["word"].strip() for word in words if word["word"].strip())
+
+
+def render_exports(words_list: list) -> dict:
+    """
+    Build every format in one pass over words_list.
+
+    :return: {"srt": str, "vtt": str, "json": str}
+    """
+    srt, vtt = io.StringIO(), io.StringIO()
+    vtt.write("WEBVTT\n\n")
+    segments = []
+    cue, segment = [], []
+    cue_chars = 0
+    cue_index = 0
+
+    def close_cue():
+        nonlocal cue, cue_chars, cue_index
+        if not cue:
+            return
+        cue_index += 1
+        text = _join(cue)
+        start, end = cue[0]["start"], cue[-1]["end"]
+        srt.write(f"{cue_index}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n\n")
+        vtt.write(f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{_vtt_escape(text)}\n\n")
+        cue, cue_chars = [], 0
+
+    def close_segment():
+        nonlocal segment
+        if not segment:
+            return
+        segments.append({
+            "start": round(segment[0]["start"], 3),
+            "end": round(segment[-1]["end"], 3),
+            "text": _join(segment),
+        })
+        segment = []
+
+    previous_end = None
+    for word in words_list:
+        text = word["word"].strip()
+        if not text:
+            continue
+        if previous_end is not None and word["start"] - previous_end >= PAUSE_SECONDS:
+            close_cue()
+            close_segment()
+        if cue and (
+            cue_chars + 1 + len(text) > CUE_MAX_CHARS or word["end"] - cue[0]["start"] > CUE_MAX_SECONDS
+        ):
+            close_cue()
+        if segment and word["end"] - segment[0]["start"] > SEGMENT_MAX_SECONDS:
+            close_segment()
+
+        cue.append(word)
+        cue_chars += len(text) + (1 if cue_chars else 0)
+        segment.append(word)
+        previous_end = word["end"]
+
+        if text.endswith(SENTENCE_END):
+            close_cue()
+            close_segment()
+
+    close_cue()
+    close_segment()
+    return {
+        "srt": srt.getvalue(),
+        "vtt": vtt.getvalue(),
+        "json": json.dumps({"segments": segments}, ensure_ascii=False),
+    }
+
+
+def save_exports(session: Session, video_id: str, words_list: list) -> dict:
+    """
+    Render and store (replace) every export of video_id.
+
+    :return: {format: TranscriptExport}
+    """
+    exports = {}
+    for fmt, content in render_exports(words_list).items():
+        export = session.get(TranscriptExport, (video_id, fmt)) or TranscriptExport(video_id=video_id, format=fmt)
+        export.content = content
+        export.etag = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        session.add(export)
+        exports[fmt] = export
+    session.flush()
+    logger.info(f"Exports for video_id '{video_id}' saved ({', '.join(exports)})")
+    return exports
+
+
+def get_export(session: Session, video_id: str, fmt: str):
+    """
+    Stored export of a finished transcript, rendered on the spot (and
+    stored) for transcripts saved before exports existed.
+
+    :return: TranscriptExport or None if there is no finished transcript
+    """
+    export = session.get(TranscriptExport, (video_id, fmt))
+    if export is not None:
+        return export
+    transcript = session.get(Transcript, video_id)
+    if transcript is None or transcript.status != "done":
+        return None
+    return save_exports(session, video_id, json.loads(transcript.raw_json or "[]"))[fmt]
@@ -0,0 +1,241 @@
+# app/services/ffmpeg_service.py
+"""
+Worker-local executor for FFmpeg processes.
+
+- A host-wide concurrency budget: every FFmpeg run holds one of
+  FFMPEG_MAX_CONCURRENCY slots, implemented as flock()ed files in
+  FFMPEG_SLOT_DIR. The locks are shared by all prefork children (and by
+  containers that mount the same directory) and are released by the kernel
+  if a process dies.
+- Child tracking: running processes are registered so they can be killed on
+  task revocation (SIGTERM to the pool child), soft time limits and timeouts.
+  On Linux each FFmpeg also gets PR_SET_PDEATHSIG so a SIGKILLed worker
+  doesn't leave orphans behind.
+- Progress: `-progress pipe:1` output is parsed into a percentage that is
+  handed to a callback (e.g. update_celery_task_state).
+"""
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from app.services.logging_service import setup_logger
+from app.services.tracing_service import span
+
+logger = setup_logger("app.services.ffmpeg_service")
+
+FFMPEG_MAX_CONCURRENCY = int(os.environ.get("FFMPEG_MAX_CONCURRENCY", max(1, (os.cpu_count() or 2) // 2)))
+FFMPEG_SLOT_DIR = os.environ.get("FFMPEG_SLOT_DIR", os.path.join(tempfile.gettempdir(), "ffmpeg_slots"))
+# 0 disables the timeout
+FFMPEG_TIMEOUT = float(os.environ.get("FFMPEG_TIMEOUT", 0))
+SLOT_POLL_SECONDS = 0.5
+KILL_GRACE_SECONDS = 5
+
+_active_processes = {}
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def encoder_slot(wait_timeout: float = None):
+    """
+    Hold one of the FFMPEG_MAX_CONCURRENCY host-wide encoder slots.
+
+    :param wait_timeout: seconds to wait for a free slot (None waits forever)
+    :raises TimeoutError: if no slot became free in time
+    """
+    os.makedirs(FFMPEG_SLOT_DIR, exist_ok=True)
+    deadline = time.monotonic() + wait_timeout if wait_timeout else None
+    waited = False
+
+    while True:
+        for slot in range(FFMPEG_MAX_CONCURRENCY):
+            path = os.path.join(FFMPEG_SLOT_DIR, f"slot-{slot}.lock")
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+
+            if waited:
+                logger.debug(f"Acquired FFmpeg slot {slot} after waiting")
+            try:
+                yield slot
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            return
+
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"No free FFmpeg slot out of {FFMPEG_MAX_CONCURRENCY}")
+        if not waited:
+            logger.info(f"All {FFMPEG_MAX_CONCURRENCY} FFmpeg slots busy, waiting...")
+            waited = True
+        time.sleep(SLOT_POLL_SECONDS)
+
+
+def _set_parent_death_signal():
+    """
+    preexec_fn: ask the kernel to SIGKILL FFmpeg if its parent dies.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        PR_SET_PDEATHSIG = 1
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    except Exception:
+        pass
+
+
+def _kill_process(process: subprocess.Popen):
+    if process.poll() is not None:
+        return
+    logger.warning(f"Terminating FFmpeg process {process.pid}")
+    process.terminate()
+    try:
+        process.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"FFmpeg process {process.pid} ignored SIGTERM, killing")
+        process.kill()
+        process.wait()
+
+
+def terminate_all():
+    """
+    Kill every FFmpeg process started by this process.
+    """
+    with _active_lock:
+        processes = list(_active_processes.values())
+    for process in processes:
+        try:
+            _kill_process(process)
+        except Exception as e:
+            logger.error(f"Failed to kill FFmpeg process {process.pid}: {e}")
+
+
+def install_signal_handlers():
+    """
+    Make SIGTERM (sent by Celery on revoke(terminate=True)) kill tracked
+    FFmpeg processes before the worker child exits.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        terminate_all()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+def parse_progress_line(line: str, state: dict):
+    """
+    Fold one `key=value` line of FFmpeg -progress output into `state`.
+    Returns the processed media time in seconds when the line carries one.
+    """
+    key, _, value = line.strip().partition("=")
+    if not key:
+        return None
+    state[key] = value
+    # out_time_ms is (despite its name) microseconds, same as out_time_us
+    if key in ("out_time_us", "out_time_ms"):
+        try:
+            return int(value) / 1_000_000
+        except ValueError:
+            return None
+    return None
+
+
+def run_ffmpeg(
+    cmd: list,
+    duration: float = None,
+    progress_callback=None,
+    timeout: float = None,
+    stderr=None,
+    stdout=None,
+) -> int:
+    """
+    Run an FFmpeg command inside the host-wide concurrency budget.
+
+    :param cmd: FFmpeg command list starting with "ffmpeg"
+    :param duration: media duration in seconds, needed to report percent
+    :param progress_callback: called with a 0-100 float as encoding progresses
+    :param timeout: seconds before FFmpeg is killed (defaults to FFMPEG_TIMEOUT)
+    :param stderr: file object for FFmpeg's log (None inherits ours)
+    :param stdout: file object for output written to pipe:1 / "-"; not
+                   usable together with progress_callback
+    :return: FFmpeg return code (always 0, failures raise)
+    :raises subprocess.CalledProcessError: FFmpeg exited with an error
+    :raises subprocess.TimeoutExpired: FFmpeg exceeded the timeout
+    """
+    timeout = timeout if timeout is not None else (FFMPEG_TIMEOUT or None)
+    track_progress = progress_callback is not None and duration
+    if track_progress:
+        cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+
+    # the span includes the wait for an encoder slot, which is often the slow part
+    with span("ffmpeg", **{"process.command": cmd[0], "process.command_line": " ".join(map(str, cmd))[:1000]}) as current_span:
+        waiting_since = time.monotonic()
+        with encoder_slot():
+            if current_span is not None:
+                current_span.set_attribute("ffmpeg.slot_wait_ms", round((time.monotonic() - waiting_since) * 1000, 1))
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE if track_progress else stdout,
+                stderr=stderr,
+                text=True,
+                preexec_fn=_set_parent_death_signal if sys.platform.startswith("linux") else None,
+            )
+            with _active_lock:
+                _active_processes[process.pid] = process
+
+            timed_out = threading.Event()
+
+            def on_timeout():
+                timed_out.set()
+                _kill_process(process)
+
+            timer = threading.Timer(timeout, on_timeout) if timeout else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+
+            try:
+                if track_progress:
+                    state = {}
+                    last_reported = -1
+                    for line in process.stdout:
+                        seconds = parse_progress_line(line, state)
+                        if seconds is None:
+                            continue
+                        percent = max(0.0, min(100.0, seconds / duration * 100))
+                        if int(percent) != last_reported:
+                            last_reported = int(percent)
+                            progress_callback(percent)
+                process.wait()
+            except BaseException:
+                # SoftTimeLimitExceeded, SystemExit from SIGTERM, KeyboardInterrupt...
+                _kill_process(process)
+                raise
+            finally:
+                if timer:
+                    timer.cancel()
+                with _active_lock:
+                    _active_processes.pop(process.pid, None)
+
+        if current_span is not None:
+            current_span.set_attribute("ffmpeg.returncode", process.returncode)
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+        if track_progress:
+            progress_callback(100.0)
+        return process.returncode
@@ -0,0 +1,266 @@
+# app/services/fingerprint_service.py
+"""
+Audio fingerprint deduplication.
+
+The same audio is uploaded under many video ids (re-uploads, clips,
+mirrors). Before a downloaded video is trimmed, compressed and sent to
+Whisper, its audio is fingerprinted (Chromaprint, through FFmpeg's
+chromaprint muxer) and looked up in the index:
+
+  audio_fingerprints  one row per video: the raw fingerprint
+  fingerprint_hashes  inverted index, hash -> (video_id, position), for
+                      every FINGERPRINT_INDEX_STEP-th item
+
+Lookup votes on (video_id, position offset) pairs that share hashes and
+then checks the best candidates item by item (bit error rate over the
+overlap). Silence and other constant audio turn into long runs of one
+item, which would make voting quadratic, so only informative items vote
+and are indexed (not a repeat of the previous item, neither almost all
+zero nor almost all one bits). A hash votes at most
+FINGERPRINT_MAX_QUERY_POSITIONS times per query, and one with more than
+FINGERPRINT_MAX_POSTINGS index entries is skipped as a stop word.
+
+If the new audio lies inside an already transcribed one, its transcript
+is the time-aligned slice of that transcript, shifted onto the new
+video's own timeline, and Whisper is skipped.
+
+Fingerprints are taken from the downloaded (untrimmed) audio so offsets are
+on the original timeline, the one the stored word timestamps use.
+"""
+import array
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.models import AudioFingerprint, FingerprintHash, Transcript
+from app.services.ffmpeg_service import run_ffmpeg
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.fingerprint_service")
+
+FINGERPRINT_ENABLED = os.environ.get("FINGERPRINT_ENABLED", "true").lower() in ("1", "true", "yes")
+# share of the new audio that has to be covered by the match
+FINGERPRINT_MIN_COVERAGE = float(os.environ.get("FINGERPRINT_MIN_COVERAGE", 0.95))
+# 1 - bit error rate over the overlap; unrelated audio sits around 0.5
+FINGERPRINT_MIN_SIMILARITY = float(os.environ.get("FINGERPRINT_MIN_SIMILARITY", 0.8))
+# shorter audio matches too easily to be worth the risk
+FINGERPRINT_MIN_SECONDS = float(os.environ.get("FINGERPRINT_MIN_SECONDS", 30))
+FINGERPRINT_TIMEOUT = float(os.environ.get("FINGERPRINT_TIMEOUT", 600))
+
+# every n-th item goes into the inverted index; lookups use all items of the
+# query, so an aligned match still hits every n-th of its items
+FINGERPRINT_INDEX_STEP = 4
+# Chromaprint's default algorithm: 4096-sample frames at 11025 Hz, hop of a third
+ITEM_SECONDS = 4096 / 3 / 11025
+# low bits flip first under re-encoding; lookups compare the rest
+HASH_SHIFT = 4
+MIN_VOTES = 5
+# offsets below this count as the same timeline
+ALIGNED_SECONDS = 1.0
+MAX_CANDIDATES = 3
+LOOKUP_CHUNK = 1000
+# index entries above which a hash says nothing about which video it is from
+FINGERPRINT_MAX_POSTINGS = int(os.environ.get("FINGERPRINT_MAX_POSTINGS", 200))
+# occurrences of one hash in the query that get to vote
+FINGERPRINT_MAX_QUERY_POSITIONS = int(os.environ.get("FINGERPRINT_MAX_QUERY_POSITIONS", 8))
+# set bits a (shifted) hash needs, and may miss, to be informative
+MIN_HASH_BITS = 4
+
+
+def compute_fingerprint(input_file: str) -> list:
+    """
+    Raw Chromaprint fingerprint of the first audio stream: one unsigned
+    32-bit item per ITEM_SECONDS.
+
+    :raises RuntimeError: if FFmpeg (or its chromaprint muxer) fails
+    """
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", input_file,
+        "-map", "0:a:0",
+        "-f", "chromaprint", "-fp_format", "raw", "-",
+    ]
+    with tempfile.TemporaryFile() as output, tempfile.TemporaryFile(mode="w+", encoding="utf-8") as log:
+        try:
+            run_ffmpeg(cmd, timeout=FINGERPRINT_TIMEOUT, stdout=output, stderr=log)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            log.seek(0)
+            raise RuntimeError(f"Fingerprinting failed: {log.read().strip()[-200:]}") from e
+        output.seek(0)
+        return unpack(output.read())
+
+
+def pack(items: list) -> bytes:
+    data = array.array("I", items)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def unpack(raw: bytes) -> list:
+    data = array.array("I")
+    data.frombytes(raw[: len(raw) - len(raw) % 4])
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tolist()
+
+
+def similarity(query: list, reference: list, offset: int) -> tuple:
+    """
+    Compare query with reference[offset:] item by item.
+
+    :return: (1 - bit error rate, number of overlapping items)
+    """
+    start = max(0, -offset)
+    end = min(len(query), len(reference) - offset)
+    if end <= start:
+        return 0.0, 0
+    differing = sum(bin(query[i] ^ reference[i + offset]).count("1") for i in range(start, end))
+    overlap = end - start
+    return 1 - differing / (32 * overlap), overlap
+
+
+def informative_positions(items: list) -> list:
+    """
+    Positions of the items worth indexing and voting with: not a repeat of
+    the previous item and not a near-constant bit pattern.
+    """
+    hash_bits = 32 - HASH_SHIFT
+    positions = []
+    previous = None
+    for position, item in enumerate(items):
+        hash_value = item >> HASH_SHIFT
+        if hash_value != previous and MIN_HASH_BITS <= bin(hash_value).count("1") <= hash_bits - MIN_HASH_BITS:
+            positions.append(position)
+        previous = hash_value
+    return positions
+
+
+def index_fingerprint(session: Session, video_id: str, items: list, duration: float = None,
+                      matched_video_id: str = None, matched_offset: float = None) -> AudioFingerprint:
+    session.query(FingerprintHash).filter(FingerprintHash.video_id == video_id).delete(synchronize_session=False)
+    fingerprint = session.get(AudioFingerprint, video_id) or AudioFingerprint(video_id=video_id)
+    fingerprint.fingerprint = pack(items)
+    fingerprint.duration = duration if duration is not None else len(items) * ITEM_SECONDS
+    fingerprint.matched_video_id = matched_video_id
+    fingerprint.matched_offset = matched_offset
+    session.add(fingerprint)
+    informative = set(informative_positions(items))
+    session.bulk_save_objects([
+        FingerprintHash(hash=items[position] >> HASH_SHIFT, video_id=video_id, position=position)
+        for position in range(0, len(items), FINGERPRINT_INDEX_STEP)
+        if position in informative
+    ])
+    session.flush()
+    return fingerprint
+
+
+def find_match(session: Session, video_id: str, items: list):
+    """
+    Look for an already transcribed video whose audio contains this one.
+
+    :return: {"video_id", "offset" (seconds), "similarity"} or None
+    """
+    if len(items) * ITEM_SECONDS < FINGERPRINT_MIN_SECONDS:
+        return None
+
+    positions = {}
+    for position in informative_positions(items):
+        hash_positions = positions.setdefault(items[position] >> HASH_SHIFT, [])
+        if len(hash_positions) < FINGERPRINT_MAX_QUERY_POSITIONS:
+            hash_positions.append(position)
+
+    votes = Counter()
+    hashes = list(positions)
+    for i in range(0, len(hashes), LOOKUP_CHUNK):
+        chunk = hashes[i:i + LOOKUP_CHUNK]
+        stop_words = {
+            hash_value for hash_value, _ in session.query(FingerprintHash.hash, func.count()).filter(
+                FingerprintHash.hash.in_(chunk)
+            ).group_by(FingerprintHash.hash).having(func.count() > FINGERPRINT_MAX_POSTINGS)
+        }
+        chunk = [hash_value for hash_value in chunk if hash_value not in stop_words]
+        if not chunk:
+            continue
+        rows = session.query(FingerprintHash.hash, FingerprintHash.video_id, FingerprintHash.position).filter(
+            FingerprintHash.hash.in_(chunk),
+            FingerprintHash.video_id != video_id,
+        )
+        for hash_value, other_id, other_position in rows:
+            for position in positions[hash_value]:
+                votes[(other_id, other_position - position)] += 1
+
+    for (other_id, offset), count in votes.most_common(MAX_CANDIDATES):
+        if count < MIN_VOTES:
+            break
+        transcript = session.get(Transcript, other_id)
+        if transcript is None or transcript.status != "done":
+            continue
+        reference = session.get(AudioFingerprint, other_id)
+        if reference is None:
+            continue
+        score, overlap = similarity(items, unpack(reference.fingerprint), offset)
+        if overlap < FINGERPRINT_MIN_COVERAGE * len(items) or score < FINGERPRINT_MIN_SIMILARITY:
+            logger.debug(f"Candidate '{other_id}' for '{video_id}' rejected: similarity {score:.2f}, overlap {overlap}")
+            continue
+        return {"video_id": other_id, "offset": round(offset * ITEM_SECONDS, 3), "similarity": round(score, 3)}
+    return None
+
+
+def slice_transcript(transcript: Transcript, offset: float, duration: float) -> tuple:
+    """
+    Words of transcript in [offset, offset + duration], moved to start at 0.
+
+    :return: (text, words_list)
+    """
+    words = json.loads(transcript.raw_json or "[]")
+    if abs(offset) < ALIGNED_SECONDS and (not words or words[-1]["end"] <= duration + ALIGNED_SECONDS):
+        # a plain re-upload: same audio, same timeline
+        return transcript.transcript, words
+
+    sliced = []
+    for word in words:
+        if word["start"] >= offset and word["end"] <= offset + duration:
+            sliced.append({
+                "start": round(word["start"] - offset, 3),
+                "end": round(word["end"] - offset, 3),
+                "word": word["word"],
+            })
+    text = " ".join(word["word"].strip() for word in sliced)
+    return text, sliced
+
+
+def deduplicate(session: Session, video_id: str, input_file: str):
+    """
+    Fingerprint input_file, index it and, on a match, return the reused
+    transcript.
+
+    :return: {"text", "words", "source", "matched_video_id", "offset"} or None
+    """
+    from app.convertor import ffprobe_duration
+
+    items = compute_fingerprint(input_file)
+    if not items:
+        return None
+    duration = ffprobe_duration(input_file) or len(items) * ITEM_SECONDS
+    match = find_match(session, video_id, items)
+    if match is None:
+        index_fingerprint(session, video_id, items, duration)
+        return None
+
+    text, words = slice_transcript(session.get(Transcript, match["video_id"]), match["offset"], duration)
+    index_fingerprint(session, video_id, items, duration, match["video_id"], match["offset"])
+    logger.info(
+        f"Audio of '{video_id}' matches '{match['video_id']}' at {match['offset']:.1f}s "
+        f"(similarity {match['similarity']}), reusing its transcript"
+    )
+    return {
+        "text": text,
+        "words": words,
+        "source": "fingerprint",
+        "matched_video_id": match["video_id"],
+        "offset": match["offset"],
+    }
@@ -0,0 +1,102 @@
+# app/services/overview_service.py
+"""
+Backend-for-frontend channel overview.
+
+One request returns what the channel pages otherwise fetch one after the
+other: the playlists, the first page of uploads enriched with duration and
+statistics, and our transcript status for each video. The upstream calls
+run concurrently, so the response takes as long as the slowest branch:
+
+  playlists  -------------------------------->
+  uploads    ------> videos.list (details) --->
+
+A failing branch leaves its part empty and is reported under "errors"
+instead of failing the whole response.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from app.models.models import Channel, Transcript
+from app.services.logging_service import setup_logger
+from app.services.rate_limit_service import RateLimitExceeded
+
+logger = setup_logger("app.services.overview_service")
+
+OVERVIEW_WORKERS = int(os.environ.get("OVERVIEW_WORKERS", 8))
+
+# shared by all requests; each task builds its own API client, so threads
+# never share an httplib2 connection
+_executor = ThreadPoolExecutor(max_workers=OVERVIEW_WORKERS, thread_name_prefix="overview")
+
+
+def _fetch_uploads(channel_id: str, uploads_playlist_id: str, max_results: int, page_token: str) -> dict:
+    from app.youtube_service import fetch_channel_videos, fetch_videos_details
+
+    page = fetch_channel_videos(
+        channel_id, max_results=max_results, page_token=page_token, uploads_playlist_id=uploads_playlist_id
+    )
+    details = fetch_videos_details([video['video_id'] for video in page['videos']])
+    for video in page['videos']:
+        video.update(details.get(video['video_id'], {}))
+    return page
+
+
+def _transcript_statuses(session: Session, video_ids: list) -> dict:
+    if not video_ids:
+        return {}
+    rows = session.query(Transcript.video_id, Transcript.status, Transcript.source).filter(
+        Transcript.video_id.in_(video_ids)
+    )
+    return {video_id: {"status": status, "source": source} for video_id, status, source in rows}
+
+
+def build_channel_overview(session: Session, channel: Channel, max_results: int = 10,
+                           max_playlists: int = 10, page_token: str = None) -> dict:
+    """
+    Playlists (at most max_playlists), the first page of uploads and
+    transcript statuses of a (resolved) channel, fetched concurrently.
+    """
+    from app.youtube_service import get_channel_playlists
+
+    # max_playlists caps the result; pages hold at most 50
+    playlists_future = _executor.submit(
+        get_channel_playlists, channel.channel_id, min(max_playlists, 50), limit=max_playlists
+    )
+    uploads_future = _executor.submit(
+        _fetch_uploads, channel.channel_id, channel.uploads_playlist_id, max_results, page_token
+    )
+
+    errors = {}
+    try:
+        playlists = playlists_future.result()
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Overview of '{channel.channel_id}': playlists failed: {e}")
+        playlists, errors["playlists"] = [], str(e)
+    try:
+        uploads = uploads_future.result()
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Overview of '{channel.channel_id}': uploads failed: {e}")
+        uploads, errors["videos"] = {"videos": [], "hasMore": False, "nextPageToken": None}, str(e)
+
+    statuses = _transcript_statuses(session, [video["video_id"] for video in uploads["videos"]])
+    for video in uploads["videos"]:
+        transcript = statuses.get(video["video_id"], {})
+        video["transcript_status"] = transcript.get("status")
+        video["transcript_source"] = transcript.get("source")
+
+    return {
+        "channel": {
+            "channel_id": channel.channel_id,
+            "handle": channel.handle,
+            "title": channel.title,
+        },
+        "playlists": playlists,
+        "videos": uploads["videos"],
+        "hasMore": uploads.get("hasMore", False),
+        "nextPageToken": uploads.get("nextPageToken"),
+        "errors": errors,
+    }
@@ -0,0 +1,134 @@
+# app/services/pipeline_service.py
+"""
+Builds the download -> transcribe chain and decides where it is queued.
+
+Shortest job first: the video's duration (from the YouTube Data API) picks
+a RabbitMQ priority in the `transcripts` queue, so a five-minute clip
+overtakes the hours-long streams waiting in front of it.
+
+Very long videos go to a separate `transcripts.long` queue instead of the
+lowest priority. Workers consume both queues and the broker hands out
+messages from them in turn, so long jobs keep getting a share of the
+workers however many short ones arrive - strict priorities alone would
+starve them.
+"""
+import os
+from celery import chain
+from app.services.logging_service import setup_logger
+from app.services.transcription_service import get_backend_queue
+
+logger = setup_logger("app.services.pipeline_service")
+
+# declared with x-max-priority in app/celery_app.py
+TRANSCRIPTS_QUEUE = "transcripts"
+TRANSCRIPTS_LONG_QUEUE = "transcripts.long"
+# used when the duration is unknown (API error, live stream)
+DEFAULT_PRIORITY = 5
+# videos at least this long (seconds) go to the long queue
+LONG_VIDEO_SECONDS = float(os.environ.get("LONG_VIDEO_SECONDS", 3600))
+
+# (upper bound in seconds, priority); higher runs first
+PRIORITY_CLASSES = (
+    (5 * 60, 9),
+    (15 * 60, 7),
+    (30 * 60, 5),
+    (LONG_VIDEO_SECONDS, 3),
+)
+
+
+def classify_duration(duration):
+    """
+    Map a duration in seconds to (queue, priority).
+    """
+    if duration is None:
+        return TRANSCRIPTS_QUEUE, DEFAULT_PRIORITY
+    if duration >= LONG_VIDEO_SECONDS:
+        return TRANSCRIPTS_LONG_QUEUE, 0
+    for upper_bound, priority in PRIORITY_CLASSES:
+        if duration < upper_bound:
+            return TRANSCRIPTS_QUEUE, priority
+    return TRANSCRIPTS_QUEUE, 0
+
+
+def lookup_duration(video_id: str):
+    """
+    Duration of the video in seconds, or None if the API can't tell us.
+    """
+    from app.youtube_service import fetch_video_details, parse_iso8601_duration
+
+    try:
+        details = fetch_video_details(video_id)
+    except Exception as e:
+        logger.warning(f"Could not fetch details for video_id '{video_id}': {e}")
+        return None
+    if not details:
+        return None
+    return parse_iso8601_duration(details.get("duration"))
+
+
+def build_transcript_workflow(video_id: str, captions_mode: str = None, backend: str = None, duration=None,
+                              task_ids=None):
+    """
+    Return the download -> transcribe chain for video_id, routed by duration.
+
+    :param duration: seconds; looked up through the YouTube API when None
+    :param task_ids: (download task id, transcribe task id) to use instead of
+                     fresh ones, for jobs whose ids were handed out earlier
+    :return: (workflow, info) where info has the queue, priority and duration
+    """
+    from app.tasks import triger_download, transcribe_audio_task
+
+    if duration is None:
+        duration = lookup_duration(video_id)
+    queue, priority = classify_duration(duration)
+
+    download_signature = triger_download.s(video_id, captions_mode=captions_mode).set(
+        queue=queue, priority=priority
+    )
+    transcribe_signature = transcribe_audio_task.s(backend=backend).set(
+        queue=get_backend_queue(backend) or queue, priority=priority
+    )
+    if task_ids:
+        download_signature.set(task_id=task_ids[0])
+        transcribe_signature.set(task_id=task_ids[1])
+    logger.info(f"video_id '{video_id}' ({duration}s) -> queue '{queue}', priority {priority}")
+    return chain(download_signature, transcribe_signature), {
+        "queue": queue,
+        "priority": priority,
+        "duration": duration,
+    }
+
+
+def enqueue_transcript(session, video_id: str, duration=None, captions_mode: str = None, backend: str = None,
+                       channel_id: str = None):
+    """
+    Queue a transcription for video_id unless it already has a transcript
+    row (done, in progress or failed). Used for work that nobody is waiting
+    on, e.g. new uploads found by the channel sync.
+
+    :return: the chain's AsyncResult, or None if nothing was queued
+    """
+    from app.models.models import Transcript
+
+    if session.get(Transcript, video_id) is not None:
+        return None
+    session.add(Transcript(video_id=video_id, channel_id=channel_id, captions_mode=captions_mode, backend=backend))
+    # the row must be visible to the worker before the task can start
+    session.commit()
+
+    workflow, _ = build_transcript_workflow(video_id, captions_mode=captions_mode, backend=backend, duration=duration)
+    return workflow.apply_async()
+
+
+def start_transcript_job(job: dict):
+    """
+    Queue an admitted job (admission_service.new_job) under its task ids.
+    """
+    workflow, _ = build_transcript_workflow(
+        job["video_id"],
+        captions_mode=job.get("captions"),
+        backend=job.get("backend"),
+        duration=job.get("duration"),
+        task_ids=job.get("task_ids"),
+    )
+    return workflow.apply_async()
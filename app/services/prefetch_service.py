@@ -0,0 +1,182 @@
+# app/services/prefetch_service.py
+"""
+Speculative audio prefetch.
+
+Opening a video's details is usually followed by a /transcript request, so
+with PREFETCH_ENABLED (or ?prefetch=1 on the details call) the audio-only
+stream is downloaded in the background at the lowest priority. It is
+recorded as the video's "download" checkpoint, so when the transcript is
+requested triger_download goes straight to trimming and compression.
+
+Prefetches nobody claims are bounded two ways:
+  - budget: no new prefetch starts while unclaimed prefetched files plus
+    the estimated size of queued and running prefetches would exceed
+    PREFETCH_BUDGET_MB. The estimates are reserved in Redis when a
+    prefetch is queued and released when it ends,
+  - TTL: evict_prefetches() (a beat task) deletes unclaimed prefetches
+    older than PREFETCH_TTL seconds.
+
+Videos of unknown duration (live streams) are never prefetched: yt-dlp
+would record them for as long as they run.
+
+A prefetch counts as claimed as soon as the video has a transcript row.
+"""
+import datetime
+import os
+import time
+from sqlalchemy.orm import Session
+from app.models.models import PipelineCheckpoint, Transcript
+from app.services.checkpoint_service import get_checkpoint_meta
+from app.services.logging_service import setup_logger
+from app.services.rate_limit_service import get_redis
+from app.services.storage_service import storage_for
+
+logger = setup_logger("app.services.prefetch_service")
+
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+PREFETCH_BUDGET_MB = float(os.environ.get("PREFETCH_BUDGET_MB", 2048))
+PREFETCH_TTL = float(os.environ.get("PREFETCH_TTL", 3600))
+# don't speculate on long videos; they cost the most if never used
+PREFETCH_MAX_DURATION = float(os.environ.get("PREFETCH_MAX_DURATION", 2 * 3600))
+# kept apart from the pipeline's own '%(id)s' downloads so a prefetch and a
+# real download of the same video never write the same .part file
+PREFETCH_OUTTMPL = 'prefetch-%(id)s.%(ext)s'
+# bitrate assumed for a queued prefetch until its file exists
+PREFETCH_ESTIMATE_KBPS = float(os.environ.get("PREFETCH_ESTIMATE_KBPS", 160))
+# a reservation whose prefetch never ended (lost worker) lapses after this
+PREFETCH_RESERVATION_TTL = float(os.environ.get("PREFETCH_RESERVATION_TTL", 2 * 3600))
+PREFETCH_RESERVATIONS_KEY = "prefetch:reserved"
+
+# KEYS[1] reservations hash (video_id -> "<mb>:<expires>")
+# ARGV: video_id, mb, now, ttl, MB left in the budget
+RESERVE_SCRIPT = """
+local key, video = KEYS[1], ARGV[1]
+local mb, now, ttl, room = tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+if redis.call('HEXISTS', key, video) == 1 then
+    return 0
+end
+local reserved = 0
+local entries = redis.call('HGETALL', key)
+for i = 1, #entries, 2 do
+    local sep = string.find(entries[i + 1], ':', 1, true)
+    local size = tonumber(string.sub(entries[i + 1], 1, sep - 1))
+    local expires = tonumber(string.sub(entries[i + 1], sep + 1))
+    if expires < now then
+        redis.call('HDEL', key, entries[i])
+    else
+        reserved = reserved + size
+    end
+end
+if reserved + mb > room then
+    return 0
+end
+redis.call('HSET', key, video, mb .. ':' .. (now + ttl))
+return 1
+"""
+
+
+def unclaimed_prefetches(session: Session) -> list:
+    """
+    Download checkpoints that came from a prefetch of a video nobody has
+    requested a transcript for yet.
+    """
+    return (
+        session.query(PipelineCheckpoint)
+        .outerjoin(Transcript, Transcript.video_id == PipelineCheckpoint.video_id)
+        .filter(PipelineCheckpoint.stage == "download", Transcript.video_id.is_(None))
+        .all()
+    )
+
+
+def _prefetch_meta(checkpoint) -> dict:
+    meta = get_checkpoint_meta(checkpoint)
+    return meta if meta.get("prefetch") else None
+
+
+def prefetch_usage_mb(session: Session) -> float:
+    total = 0
+    for checkpoint in unclaimed_prefetches(session):
+        meta = _prefetch_meta(checkpoint)
+        if meta:
+            total += meta.get("bytes", 0)
+    return total / (1024 * 1024)
+
+
+def should_prefetch(session: Session, video_id: str, duration=None) -> bool:
+    """
+    Whether video_id is worth prefetching, budget aside.
+    """
+    if duration is None:
+        # live stream or unknown length
+        return False
+    if duration > PREFETCH_MAX_DURATION:
+        return False
+    if session.get(Transcript, video_id) is not None:
+        return False
+    if session.get(PipelineCheckpoint, (video_id, "download")) is not None:
+        return False
+    return True
+
+
+def reserve_prefetch(session: Session, video_id: str, duration=None) -> bool:
+    """
+    should_prefetch(), and hold the estimated size of the prefetch against
+    PREFETCH_BUDGET_MB until release_prefetch(). Fails closed when Redis is
+    unreachable: a prefetch is only speculation.
+    """
+    if not should_prefetch(session, video_id, duration):
+        return False
+    room = PREFETCH_BUDGET_MB - prefetch_usage_mb(session)
+    estimate_mb = duration * PREFETCH_ESTIMATE_KBPS / 8 / 1024
+    try:
+        reserved = get_redis().register_script(RESERVE_SCRIPT)(
+            keys=[PREFETCH_RESERVATIONS_KEY],
+            args=[video_id, round(estimate_mb, 3), time.time(), PREFETCH_RESERVATION_TTL, room],
+        )
+    except Exception as e:
+        logger.warning(f"Prefetch budget unavailable, skipping '{video_id}': {e}")
+        return False
+    if not reserved:
+        logger.info(f"Prefetch budget used up or '{video_id}' already queued ({room:.0f} MB left), skipping")
+    return bool(reserved)
+
+
+def release_prefetch(video_id: str):
+    """
+    Give back the reservation of a finished (or abandoned) prefetch. Never
+    raises; a lost release lapses after PREFETCH_RESERVATION_TTL.
+    """
+    try:
+        get_redis().hdel(PREFETCH_RESERVATIONS_KEY, video_id)
+    except Exception as e:
+        logger.warning(f"Could not release the prefetch reservation of '{video_id}': {e}")
+
+
+def evict_prefetches(session: Session, ttl: float = None) -> int:
+    """
+    Delete unclaimed prefetches older than ttl seconds (PREFETCH_TTL).
+
+    :return: number of evicted prefetches
+    """
+    ttl = PREFETCH_TTL if ttl is None else ttl
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=ttl)
+    evicted = 0
+    for checkpoint in unclaimed_prefetches(session):
+        if not _prefetch_meta(checkpoint):
+            continue
+        created_at = checkpoint.created_at
+        if created_at is not None and created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+        if created_at is not None and created_at > cutoff:
+            continue
+        try:
+            if checkpoint.artifact_path:
+                storage_for(checkpoint.artifact_path).delete(checkpoint.artifact_path)
+        except Exception as e:
+            logger.warning(f"Could not delete prefetched {checkpoint.artifact_path}: {e}")
+            continue
+        session.delete(checkpoint)
+        evicted += 1
+    if evicted:
+        logger.info(f"Evicted {evicted} unused prefetch(es)")
+    return evicted
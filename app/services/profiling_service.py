@@ -0,0 +1,208 @@
+# app/services/profiling_service.py
+"""
+Opt-in profiling of Flask requests and Celery tasks.
+
+Off unless PROFILING_ENABLED is set; then nothing is hooked in at all, so
+the normal path pays nothing. When enabled, a request is profiled if it
+carries the PROFILE_HEADER with PROFILE_TOKEN as its value or is picked by
+PROFILE_SAMPLE_RATE; tasks are picked by PROFILE_TASK_SAMPLE_RATE. Request
+profiling stays off without a PROFILE_TOKEN: profiles expose call stacks
+and paths, and anyone could force them.
+
+The profiler is pyinstrument (sampling, low overhead) when it is installed,
+with the standard library's cProfile as a fallback:
+
+  *.speedscope.json  pyinstrument, open in https://www.speedscope.app
+  *.prof             cProfile stats, e.g. `snakeviz file.prof` or
+                     `flameprof file.prof > flame.svg`
+
+Files land in PROFILE_DIR as <timestamp>_<kind>_<name>_<ms>ms.<ext>; the
+newest PROFILE_MAX_FILES are kept. /profiles lists them (with
+"Authorization: Bearer <PROFILE_TOKEN>").
+"""
+import hmac
+import os
+import random
+import re
+import threading
+import time
+from app.services.logging_service import setup_logger
+from app.services.storage_service import LOCAL_STORAGE_DIR
+
+logger = setup_logger("app.services.profiling_service")
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_TASK_SAMPLE_RATE = float(os.environ.get("PROFILE_TASK_SAMPLE_RATE", 0))
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(LOCAL_STORAGE_DIR, "profiles"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 500))
+# pyinstrument's sampling interval in seconds
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.001))
+
+PROFILE_EXTENSIONS = (".speedscope.json", ".prof")
+FILENAME_RE = re.compile(r"^(?P<timestamp>\d{8}T\d{6}\d*)_(?P<kind>request|task)_(?P<name>.+)_(?P<ms>\d+)ms\.")
+
+_prune_lock = threading.Lock()
+
+
+class _Profile:
+    """
+    One running profile, whichever profiler is available.
+    """
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.engine = "cprofile"
+        else:
+            self.profiler = Profiler(interval=PROFILE_INTERVAL)
+            self.engine = "pyinstrument"
+        self.started = time.perf_counter()
+        if self.engine == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self) -> str:
+        """
+        Stop and write the profile; returns the file path (None on failure).
+        """
+        elapsed_ms = int((time.perf_counter() - self.started) * 1000)
+        try:
+            if self.engine == "cprofile":
+                self.profiler.disable()
+            else:
+                self.profiler.stop()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            timestamp = time.strftime("%Y%m%dT%H%M%S") + f"{int(time.time() * 1000) % 1000:03d}"
+            safe_name = re.sub(r"[^A-Za-z0-9.-]+", "-", self.name).strip("-")[:80] or "root"
+            base = os.path.join(PROFILE_DIR, f"{timestamp}_{self.kind}_{safe_name}_{elapsed_ms}ms")
+            if self.engine == "cprofile":
+                path = f"{base}.prof"
+                self.profiler.dump_stats(path)
+            else:
+                from pyinstrument.renderers import SpeedscopeRenderer
+                path = f"{base}.speedscope.json"
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(self.profiler.output(renderer=SpeedscopeRenderer()))
+        except Exception as e:
+            logger.warning(f"Could not write profile of {self.kind} '{self.name}': {e}")
+            return None
+        logger.info(f"Profiled {self.kind} '{self.name}' ({elapsed_ms} ms): {path}")
+        _prune()
+        return path
+
+
+def _prune():
+    if not _prune_lock.acquire(blocking=False):
+        return
+    try:
+        files = list_profiles()
+        for entry in files[PROFILE_MAX_FILES:]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, entry["file"]))
+            except OSError:
+                pass
+    finally:
+        _prune_lock.release()
+
+
+def list_profiles(limit: int = None) -> list:
+    """
+    Stored profiles, newest first.
+
+    :return: [{"file", "kind", "name", "duration_ms", "bytes", "created_at"}, ...]
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    entries = []
+    for filename in os.listdir(PROFILE_DIR):
+        match = FILENAME_RE.match(filename)
+        if not match or not filename.endswith(PROFILE_EXTENSIONS):
+            continue
+        path = os.path.join(PROFILE_DIR, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append({
+            "file": filename,
+            "kind": match.group("kind"),
+            "name": match.group("name"),
+            "duration_ms": int(match.group("ms")),
+            "format": "speedscope" if filename.endswith(".speedscope.json") else "pstats",
+            "bytes": stat.st_size,
+            "created_at": stat.st_mtime,
+        })
+    entries.sort(key=lambda entry: entry["file"], reverse=True)
+    return entries[:limit] if limit else entries
+
+
+def is_profile_file(filename: str) -> bool:
+    return bool(FILENAME_RE.match(filename)) and filename.endswith(PROFILE_EXTENSIONS) and "/" not in filename
+
+
+def is_profile_token(value: str) -> bool:
+    """
+    Whether value is the PROFILE_TOKEN (never true without one).
+    """
+    return bool(PROFILE_TOKEN) and hmac.compare_digest((value or "").encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+def install_flask_profiling(app):
+    """
+    Profile requests picked by the header or the sample rate. No-op unless
+    PROFILING_ENABLED and PROFILE_TOKEN are set.
+    """
+    if not PROFILING_ENABLED:
+        return
+    if not PROFILE_TOKEN:
+        logger.error("PROFILING_ENABLED is set without PROFILE_TOKEN; request profiling stays off")
+        return
+    from flask import g, request
+
+    @app.before_request
+    def start_request_profile():
+        requested = is_profile_token(request.headers.get(PROFILE_HEADER))
+        if requested or (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+            g.profile = _Profile("request", f"{request.method} {request.path}")
+
+    @app.teardown_request
+    def stop_request_profile(exc=None):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.stop()
+
+    logger.info(f"Request profiling on (header {PROFILE_HEADER}, sample rate {PROFILE_SAMPLE_RATE})")
+
+
+def install_celery_profiling():
+    """
+    Profile sampled tasks through the task_prerun/task_postrun signals.
+    No-op unless PROFILING_ENABLED and PROFILE_TASK_SAMPLE_RATE > 0.
+    """
+    if not (PROFILING_ENABLED and PROFILE_TASK_SAMPLE_RATE > 0):
+        return
+    from celery.signals import task_prerun, task_postrun
+
+    running = {}
+
+    @task_prerun.connect(weak=False)
+    def start_task_profile(task_id=None, task=None, **kwargs):
+        if random.random() < PROFILE_TASK_SAMPLE_RATE:
+            running[task_id] = _Profile("task", task.name)
+
+    @task_postrun.connect(weak=False)
+    def stop_task_profile(task_id=None, **kwargs):
+        profile = running.pop(task_id, None)
+        if profile is not None:
+            profile.stop()
+
+    logger.info(f"Task profiling on (sample rate {PROFILE_TASK_SAMPLE_RATE})")
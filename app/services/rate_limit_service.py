@@ -0,0 +1,170 @@
+# app/services/rate_limit_service.py
+"""
+Distributed token-bucket rate limiting for upstream APIs, shared by every
+Flask and Celery process through Redis.
+
+One bucket per upstream; a call takes as many tokens as the endpoint costs
+(the YouTube Data API charges 100 quota units for search.list and 1 for most
+other reads). Refill and take happen atomically in a Lua script, using the
+Redis server clock so hosts with drifting clocks agree.
+
+Policy per upstream is "how long may a caller wait for tokens": 0 sheds
+load immediately (HTTP routes answer 429), a positive value blocks the
+caller until the bucket has refilled enough (workers). Either way, if the
+tokens won't be there in time RateLimitExceeded is raised with the number
+of seconds after which the call would succeed.
+
+If Redis is unreachable the limiter fails open: calls go through and a
+warning is logged, the upstream's own limits still apply.
+"""
+import os
+import time
+from functools import lru_cache
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.rate_limit_service")
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+KEY_PREFIX = "ratelimit:"
+
+# capacity: bucket size (burst), rate: tokens added per second,
+# max_wait: seconds a caller may block for tokens (0 = shed immediately)
+UPSTREAMS = {
+    # 10,000 quota units per day is the Data API default
+    "youtube": {
+        "capacity": float(os.environ.get("YOUTUBE_RATE_CAPACITY", 10000)),
+        "rate": float(os.environ.get("YOUTUBE_RATE_PER_SEC", 10000 / 86400)),
+        "max_wait": float(os.environ.get("YOUTUBE_RATE_MAX_WAIT", 0)),
+    },
+    # requests per minute for audio transcriptions
+    "openai": {
+        "capacity": float(os.environ.get("OPENAI_RATE_CAPACITY", 50)),
+        "rate": float(os.environ.get("OPENAI_RATE_PER_SEC", 50 / 60)),
+        "max_wait": float(os.environ.get("OPENAI_RATE_MAX_WAIT", 120)),
+    },
+}
+
+# KEYS[1] bucket hash; ARGV: capacity, rate, cost
+# returns {allowed, tokens left, seconds until `cost` tokens are available}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+    if cost > 0 then redis.call('HINCRBY', KEYS[1], 'allowed', 1) end
+else
+    wait = (cost - tokens) / rate
+    redis.call('HINCRBY', KEYS[1], 'denied', 1)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 3600)
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """
+    The upstream's bucket can't cover the call within the allowed wait.
+    """
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit for {upstream} exceeded, retry after {retry_after:.1f}s")
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    import redis
+    return redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+
+
+@lru_cache(maxsize=None)
+def _get_script():
+    return get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+
+
+def take_tokens(bucket: str, capacity: float, rate: float, cost: float = 1) -> tuple:
+    """
+    One atomic refill-and-take on any bucket (also used for per-client
+    quotas, see admission_service).
+
+    :return: (allowed, tokens left, seconds until `cost` tokens are available)
+    """
+    allowed, tokens, wait = _get_script()(
+        keys=[KEY_PREFIX + bucket],
+        args=[capacity, rate, cost],
+    )
+    return bool(int(allowed)), float(tokens), float(wait)
+
+
+def _take(upstream: str, cost: float) -> tuple:
+    config = UPSTREAMS[upstream]
+    return take_tokens(upstream, config["capacity"], config["rate"], cost)
+
+
+def acquire(upstream: str, cost: float = 1, max_wait: float = None) -> float:
+    """
+    Take `cost` tokens from the upstream's bucket, waiting up to max_wait
+    seconds (the upstream's policy by default) for them.
+
+    :return: tokens left in the bucket (None if the limiter is off or down)
+    :raises RateLimitExceeded: the tokens won't be available within max_wait
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    config = UPSTREAMS[upstream]
+    if cost > config["capacity"]:
+        raise ValueError(f"Cost {cost} exceeds the {upstream} bucket capacity {config['capacity']}")
+    max_wait = config["max_wait"] if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+
+    while True:
+        try:
+            allowed, tokens, wait = _take(upstream, cost)
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, letting the {upstream} call through: {e}")
+            return None
+        if allowed:
+            return tokens
+        if time.monotonic() + wait > deadline:
+            logger.info(f"Shedding {upstream} call (cost {cost}), {tokens:.1f} tokens left")
+            raise RateLimitExceeded(upstream, wait)
+        logger.debug(f"Waiting {wait:.2f}s for {upstream} tokens")
+        time.sleep(wait)
+
+
+def get_rate_limit_status() -> dict:
+    """
+    Remaining tokens and allowed/denied counters for every upstream.
+    """
+    status = {}
+    for upstream, config in UPSTREAMS.items():
+        entry = {"capacity": config["capacity"], "refill_per_sec": config["rate"], "max_wait": config["max_wait"]}
+        try:
+            # a zero-cost take refreshes the bucket without spending anything
+            _, tokens, _ = _take(upstream, 0)
+            counters = get_redis().hmget(KEY_PREFIX + upstream, "allowed", "denied")
+            entry.update(
+                remaining=round(tokens, 2),
+                allowed=int(counters[0] or 0),
+                denied=int(counters[1] or 0),
+            )
+        except Exception as e:
+            entry["error"] = str(e)
+        status[upstream] = entry
+    return status
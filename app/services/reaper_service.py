@@ -0,0 +1,79 @@
+# app/services/reaper_service.py
+"""
+Stuck-job reaper.
+
+A worker that dies mid-job leaves its transcript in a running status
+(downloading, compress_audio, transcribing) for good, and /transcript keeps
+reporting it as in progress. A running status is only ever held by a stage
+inside its heartbeat (transcript_service.transcript_heartbeat), which keeps
+updated_at fresh, so a row in a running status that hasn't been touched for
+STUCK_JOB_TIMEOUT seconds has lost its worker. A job waiting in the broker
+(for the next stage, or for a retry countdown) is "queued" and never
+reaped: re-queueing it would run a second chain, and a second paid Whisper
+call, next to the first.
+
+The reap_stuck_transcripts beat task finds those rows through the
+(status, updated_at) index. A reaped job is re-queued with the captions
+mode and backend it was started with; the checkpoints let it resume where
+it stopped. After STUCK_JOB_MAX_ATTEMPTS re-queues it is marked as failed
+instead.
+"""
+import datetime
+import os
+from sqlalchemy.orm import Session
+from app.models.models import Transcript
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.reaper_service")
+
+RUNNING_STATUSES = ("downloading", "compress_audio", "transcribing")
+STUCK_JOB_TIMEOUT = float(os.environ.get("STUCK_JOB_TIMEOUT", 1800))
+STUCK_JOB_MAX_ATTEMPTS = int(os.environ.get("STUCK_JOB_MAX_ATTEMPTS", 2))
+# rows handled per run, so a backlog of dead jobs is worked off gradually
+REAPER_BATCH_SIZE = int(os.environ.get("REAPER_BATCH_SIZE", 100))
+
+
+def find_stuck_transcripts(session: Session, timeout: float = None, limit: int = None) -> list:
+    timeout = STUCK_JOB_TIMEOUT if timeout is None else timeout
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=timeout)
+    return (
+        session.query(Transcript)
+        .filter(Transcript.status.in_(RUNNING_STATUSES), Transcript.updated_at < cutoff)
+        .order_by(Transcript.updated_at)
+        .limit(limit or REAPER_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def reap_stuck_transcripts(session: Session, timeout: float = None) -> tuple:
+    """
+    Reset or fail the stuck rows.
+
+    :return: ([{"video_id", "captions_mode", "backend"}, ...] to re-queue,
+             video ids marked as failed); the caller queues them after
+             committing
+    """
+    requeue, failed = [], []
+    for transcript in find_stuck_transcripts(session, timeout):
+        stage = transcript.status
+        if (transcript.attempts or 0) < STUCK_JOB_MAX_ATTEMPTS:
+            transcript.attempts = (transcript.attempts or 0) + 1
+            transcript.status = "pending"
+            transcript.error = None
+            requeue.append({
+                "video_id": transcript.video_id,
+                "captions_mode": transcript.captions_mode,
+                "backend": transcript.backend,
+            })
+            logger.warning(
+                f"video_id '{transcript.video_id}' stuck in '{stage}' since {transcript.updated_at}, "
+                f"re-queueing (attempt {transcript.attempts}/{STUCK_JOB_MAX_ATTEMPTS})"
+            )
+        else:
+            transcript.status = "error"
+            transcript.error = f"Worker lost during '{stage}' after {transcript.attempts} re-queue(s)"
+            failed.append(transcript.video_id)
+            logger.error(f"video_id '{transcript.video_id}' stuck in '{stage}' again, giving up")
+    session.flush()
+    return requeue, failed
@@ -0,0 +1,274 @@
+# app/services/search_service.py
+"""
+Semantic search over the transcript corpus.
+
+Finished transcripts are cut into overlapping time windows using the word
+timestamps (SEARCH_CHUNK_SECONDS long, a new one every
+SEARCH_CHUNK_STRIDE seconds) and every window is embedded with a local CPU
+model (fastembed / ONNX Runtime, no GPU or API calls).
+
+Storage:
+  <SEARCH_INDEX_DIR>/vectors.f32  append-only float32 matrix, one
+                                  L2-normalised row per chunk, read through
+                                  a NumPy memmap
+  transcript_chunks               what row n is: video, channel, time span,
+                                  text; re-indexing a video marks its old
+                                  rows deleted and appends new ones
+
+A query embeds the text once and takes dot products against the matrix
+(or only the rows of one channel) - an exact flat index, which answers in
+milliseconds for hundreds of thousands of chunks. Superseded rows, and rows
+of transcripts that are no longer done, stay in the matrix; the best rows
+are taken in growing batches until enough live ones are found.
+
+Writers (index_transcript_task) serialise on an flock()ed file next to the
+matrix; readers only ever see whole rows.
+"""
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.models import Transcript, TranscriptChunk
+from app.services.logging_service import setup_logger
+from app.services.storage_service import LOCAL_STORAGE_DIR
+
+logger = setup_logger("app.services.search_service")
+
+SEARCH_ENABLED = os.environ.get("SEARCH_ENABLED", "false").lower() in ("1", "true", "yes")
+SEARCH_INDEX_DIR = os.environ.get("SEARCH_INDEX_DIR", os.path.join(LOCAL_STORAGE_DIR, "search_index"))
+# multilingual: the corpus is not only English
+SEARCH_MODEL = os.environ.get("SEARCH_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+SEARCH_CHUNK_SECONDS = float(os.environ.get("SEARCH_CHUNK_SECONDS", 30))
+SEARCH_CHUNK_STRIDE = float(os.environ.get("SEARCH_CHUNK_STRIDE", 20))
+SEARCH_BATCH_SIZE = int(os.environ.get("SEARCH_BATCH_SIZE", 32))
+
+VECTORS_FILE = "vectors.f32"
+LOCK_FILE = "index.lock"
+# candidate rows per query, as a multiple of the limit; grows by this factor
+# while too many of them turn out to be dead
+OVERFETCH_FACTOR = 4
+LOOKUP_CHUNK = 1000
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    from fastembed import TextEmbedding
+
+    logger.info(f"Loading embedding model {SEARCH_MODEL}")
+    return TextEmbedding(model_name=SEARCH_MODEL)
+
+
+def embed(texts: list):
+    """
+    :return: float32 array (len(texts), dim), rows L2-normalised
+    """
+    import numpy as np
+
+    vectors = np.asarray(list(get_model().embed(texts, batch_size=SEARCH_BATCH_SIZE)), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def chunk_words(words_list: list, chunk_seconds: float = None, stride: float = None) -> list:
+    """
+    Overlapping time windows over the words.
+
+    :return: [{"start", "end", "text"}, ...]
+    """
+    chunk_seconds = chunk_seconds or SEARCH_CHUNK_SECONDS
+    stride = stride or SEARCH_CHUNK_STRIDE
+    words = [word for word in words_list if word["word"].strip()]
+    chunks = []
+    first = 0
+    while first < len(words):
+        window_start = words[first]["start"]
+        last = first
+        while last < len(words) and words[last]["end"] <= window_start + chunk_seconds:
+            last += 1
+        last = max(last, first + 1)
+        chunk = words[first:last]
+        chunks.append({
+            "start": round(chunk[0]["start"], 3),
+            "end": round(chunk[-1]["end"], 3),
+            "text": " ".join(word["word"].strip() for word in chunk),
+        })
+        if last >= len(words):
+            break
+        # next window starts at the first word past the stride
+        next_first = first + 1
+        while next_first < last and words[next_first]["start"] < window_start + stride:
+            next_first += 1
+        first = next_first
+    return chunks
+
+
+@contextmanager
+def _index_lock():
+    os.makedirs(SEARCH_INDEX_DIR, exist_ok=True)
+    with open(os.path.join(SEARCH_INDEX_DIR, LOCK_FILE), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _vectors_path() -> str:
+    return os.path.join(SEARCH_INDEX_DIR, VECTORS_FILE)
+
+
+def load_vectors(dim: int):
+    """
+    Read-only memmap of the whole matrix, or None while it is empty.
+    """
+    import numpy as np
+
+    path = _vectors_path()
+    if not os.path.exists(path):
+        return None
+    rows = os.path.getsize(path) // (4 * dim)
+    if rows == 0:
+        return None
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+
+
+def index_transcript(session: Session, video_id: str, channel_id: str = None) -> int:
+    """
+    (Re-)index a finished transcript.
+
+    :return: number of chunks written
+    """
+    transcript = session.get(Transcript, video_id)
+    if transcript is None or transcript.status != "done":
+        return 0
+    chunks = chunk_words(json.loads(transcript.raw_json or "[]"))
+    if not chunks:
+        return 0
+    vectors = embed([chunk["text"] for chunk in chunks])
+    dim = vectors.shape[1]
+    channel_id = channel_id or transcript.channel_id
+
+    with _index_lock():
+        path = _vectors_path()
+        first_row = os.path.getsize(path) // (4 * dim) if os.path.exists(path) else 0
+        next_row = (session.query(func.max(TranscriptChunk.id)).scalar() or -1) + 1
+        if first_row != next_row:
+            # a writer died between the append and the commit; drop its rows
+            logger.warning(f"Search index has {first_row} rows but {next_row} known chunks, truncating")
+            with open(path, "r+b") as f:
+                f.truncate(next_row * 4 * dim)
+            first_row = next_row
+
+        session.query(TranscriptChunk).filter(
+            TranscriptChunk.video_id == video_id, TranscriptChunk.deleted.is_(False)
+        ).update({TranscriptChunk.deleted: True}, synchronize_session=False)
+        session.bulk_save_objects([
+            TranscriptChunk(
+                id=first_row + i,
+                video_id=video_id,
+                channel_id=channel_id,
+                start=chunk["start"],
+                end=chunk["end"],
+                text=chunk["text"],
+                deleted=False,
+            )
+            for i, chunk in enumerate(chunks)
+        ])
+        with open(path, "ab") as f:
+            f.write(vectors.tobytes())
+        # rows and vectors must agree before the lock is released
+        session.commit()
+
+    logger.info(f"Indexed video_id '{video_id}': {len(chunks)} chunk(s)")
+    return len(chunks)
+
+
+def search(session: Session, query: str, limit: int = 10, channel_id: str = None) -> list:
+    """
+    Chunks closest to query, best first.
+
+    :return: [{"video_id", "channel_id", "start", "end", "text", "score"}, ...]
+    """
+    import numpy as np
+
+    query_vector = embed([query])[0]
+    vectors = load_vectors(query_vector.shape[0])
+    if vectors is None:
+        return []
+
+    if channel_id:
+        row_ids = np.fromiter(
+            (row_id for (row_id,) in session.query(TranscriptChunk.id).filter(
+                TranscriptChunk.channel_id == channel_id, TranscriptChunk.deleted.is_(False)
+            )),
+            dtype=np.int64,
+        )
+        row_ids = row_ids[row_ids < vectors.shape[0]]
+        if row_ids.size == 0:
+            return []
+        scores = vectors[row_ids] @ query_vector
+    else:
+        row_ids = None
+        scores = vectors @ query_vector
+
+    total = scores.shape[0]
+    wanted = min(total, limit * OVERFETCH_FACTOR)
+    seen = set()
+    hits = []
+    while True:
+        top = np.argpartition(-scores, wanted - 1)[:wanted] if wanted < total else np.arange(total)
+        top = [int(i) for i in top[np.argsort(-scores[top], kind="stable")] if int(i) not in seen]
+        seen.update(top)
+        candidate_ids = [int(row_ids[i]) if row_ids is not None else i for i in top]
+        chunks = _live_chunks(session, candidate_ids)
+        for row_id, i in zip(candidate_ids, top):
+            chunk = chunks.get(row_id)
+            if chunk is None:
+                continue
+            hits.append({
+                "video_id": chunk.video_id,
+                "channel_id": chunk.channel_id,
+                "start": chunk.start,
+                "end": chunk.end,
+                "text": chunk.text,
+                "score": round(float(scores[i]), 4),
+            })
+            if len(hits) >= limit:
+                return hits
+        if wanted >= total:
+            return hits
+        # too many of the best rows were dead; look further down
+        wanted = min(total, wanted * OVERFETCH_FACTOR)
+
+
+def _live_chunks(session: Session, row_ids: list) -> dict:
+    """
+    id -> chunk for the rows that are current and belong to a done transcript.
+    """
+    chunks = {}
+    for i in range(0, len(row_ids), LOOKUP_CHUNK):
+        query = session.query(TranscriptChunk).join(
+            Transcript, Transcript.video_id == TranscriptChunk.video_id
+        ).filter(
+            TranscriptChunk.id.in_(row_ids[i:i + LOOKUP_CHUNK]),
+            TranscriptChunk.deleted.is_(False),
+            Transcript.status == "done",
+        )
+        chunks.update((chunk.id, chunk) for chunk in query)
+    return chunks
+
+
+def unindexed_video_ids(session: Session) -> list:
+    """
+    Finished transcripts without any live chunk, for backfilling.
+    """
+    indexed = session.query(TranscriptChunk.video_id).filter(TranscriptChunk.deleted.is_(False))
+    return [
+        video_id for (video_id,) in session.query(Transcript.video_id).filter(
+            Transcript.status == "done", ~Transcript.video_id.in_(indexed)
+        )
+    ]
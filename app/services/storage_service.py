@@ -0,0 +1,212 @@
+# app/services/storage_service.py
+"""
+Where pipeline artifacts live once a stage has produced them.
+
+  local - files stay under LOCAL_STORAGE_DIR (the shared convertorData
+          volume); artifacts are referred to by absolute path
+  s3    - files are uploaded to an S3-compatible bucket (AWS, MinIO) and
+          referred to as s3://bucket/key; any worker can fetch them and
+          /download_audio redirects to a presigned URL
+
+FFmpeg and Whisper need real files, so workers always work in a local
+scratch directory: put() publishes a finished file, ensure_local() brings
+an artifact back (reusing the scratch copy if this node still has it).
+With s3 the scratch copy is removed once it is uploaded, and delete()
+removes a fetched copy together with the object.
+"""
+import os
+import shutil
+from functools import lru_cache
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.storage_service")
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+LOCAL_STORAGE_DIR = os.environ.get("LOCAL_STORAGE_DIR", "./convertorData/")
+S3_BUCKET = os.environ.get("S3_BUCKET", "convertor-data")
+# set for MinIO or another S3-compatible service, e.g. http://minio:9000
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+S3_REGION = os.environ.get("S3_REGION", "us-east-1")
+S3_PREFIX = os.environ.get("S3_PREFIX", "")
+S3_PRESIGN_EXPIRES = int(os.environ.get("S3_PRESIGN_EXPIRES", 3600))
+# files above this are sent as multipart uploads of this part size
+S3_MULTIPART_CHUNK_MB = int(os.environ.get("S3_MULTIPART_CHUNK_MB", 16))
+
+S3_SCHEME = "s3://"
+
+
+def is_remote(uri: str) -> bool:
+    return bool(uri) and uri.startswith(S3_SCHEME)
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR):
+        self.root = os.path.abspath(root)
+
+    def put(self, local_path: str, key: str, keep_local: bool = False) -> str:
+        """
+        Make local_path available under key and return its URI (a path).
+        Files already inside the storage root are not copied; files outside
+        it are moved in unless keep_local is set.
+        """
+        local_path = os.path.abspath(local_path)
+        if os.path.commonpath([local_path, self.root]) == self.root:
+            return local_path
+        target = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(local_path, target)
+        if not keep_local:
+            os.remove(local_path)
+        return target
+
+    def exists(self, uri: str) -> bool:
+        return os.path.exists(uri)
+
+    def ensure_local(self, uri: str, directory: str = None) -> str:
+        return uri
+
+    def discard_local(self, uri: str, directory: str = None):
+        # the artifact itself is the local copy
+        pass
+
+    def delete(self, uri: str):
+        if os.path.exists(uri):
+            os.remove(uri)
+
+    def download_url(self, uri: str, filename: str = None):
+        # served by Flask directly
+        return None
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str = S3_BUCKET):
+        self.bucket = bucket
+
+    @property
+    def client(self):
+        return get_s3_client()
+
+    def _split(self, uri: str) -> tuple:
+        bucket, _, key = uri[len(S3_SCHEME):].partition("/")
+        return bucket, key
+
+    def _local_path(self, uri: str, directory: str = None) -> str:
+        _, key = self._split(uri)
+        return os.path.abspath(os.path.join(directory or LOCAL_STORAGE_DIR, os.path.basename(key)))
+
+    def put(self, local_path: str, key: str, keep_local: bool = False) -> str:
+        """
+        Upload local_path (streamed, multipart above S3_MULTIPART_CHUNK_MB)
+        and return its s3:// URI. The local file is removed once the upload
+        has succeeded unless keep_local is set.
+        """
+        from boto3.s3.transfer import TransferConfig
+
+        chunk = S3_MULTIPART_CHUNK_MB * 1024 * 1024
+        key = f"{S3_PREFIX}{key}"
+        self.client.upload_file(
+            local_path, self.bucket, key,
+            Config=TransferConfig(multipart_threshold=chunk, multipart_chunksize=chunk),
+        )
+        logger.info(f"Uploaded {local_path} to s3://{self.bucket}/{key}")
+        if not keep_local:
+            os.remove(local_path)
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def exists(self, uri: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        bucket, key = self._split(uri)
+        try:
+            self.client.head_object(Bucket=bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def ensure_local(self, uri: str, directory: str = None) -> str:
+        """
+        Local copy of the object in `directory` (LOCAL_STORAGE_DIR by
+        default); downloaded only if this node doesn't have it yet.
+        """
+        bucket, key = self._split(uri)
+        directory = directory or LOCAL_STORAGE_DIR
+        local_path = self._local_path(uri, directory)
+        if os.path.exists(local_path):
+            return local_path
+        os.makedirs(directory, exist_ok=True)
+        partial = f"{local_path}.part"
+        self.client.download_file(bucket, key, partial)
+        os.replace(partial, local_path)
+        logger.info(f"Fetched {uri} to {local_path}")
+        return local_path
+
+    def discard_local(self, uri: str, directory: str = None):
+        """
+        Remove the copy ensure_local() left on this node, if any.
+        """
+        local_path = self._local_path(uri, directory)
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+    def delete(self, uri: str):
+        bucket, key = self._split(uri)
+        self.client.delete_object(Bucket=bucket, Key=key)
+        self.discard_local(uri)
+
+    def download_url(self, uri: str, filename: str = None) -> str:
+        bucket, key = self._split(uri)
+        params = {"Bucket": bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=S3_PRESIGN_EXPIRES)
+
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    try:
+        import boto3
+    except ImportError as e:
+        raise RuntimeError("The s3 storage backend needs boto3: pip install boto3") from e
+    return boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+
+
+STORAGES = {
+    LocalStorage.name: LocalStorage,
+    S3Storage.name: S3Storage,
+}
+
+
+@lru_cache(maxsize=None)
+def get_storage():
+    """
+    The storage new artifacts are published to (STORAGE_BACKEND).
+    """
+    if STORAGE_BACKEND not in STORAGES:
+        raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return STORAGES[STORAGE_BACKEND]()
+
+
+def storage_for(uri: str):
+    """
+    The storage an existing artifact lives in, judged by its URI, so paths
+    recorded before a switch of STORAGE_BACKEND keep working.
+    """
+    return S3Storage() if is_remote(uri) else LocalStorage()
+
+
+def artifact_exists(uri: str) -> bool:
+    return storage_for(uri).exists(uri)
+
+
+def ensure_local(uri: str, directory: str = None) -> str:
+    return storage_for(uri).ensure_local(uri, directory)
+
+
+def discard_local(uri: str, directory: str = None):
+    storage_for(uri).discard_local(uri, directory)
@@ -0,0 +1,131 @@
+# app/services/tracing_service.py
+"""
+OpenTelemetry tracing across the API, the Celery chain and what the tasks
+run.
+
+With TRACING_ENABLED, init_tracing() (called by the Flask app and by every
+Celery worker process) sets up a tracer provider and instruments:
+
+  Flask     one server span per request
+  Celery    the trace context rides in the task message headers, so
+            triger_download and transcribe_audio_task (and anything they
+            queue) join the trace of the /transcript request that started
+            them
+  requests  webhook deliveries
+  httpx     the OpenAI client
+
+span() adds child spans around what these don't see: FFmpeg processes
+(ffmpeg_service.run_ffmpeg), yt-dlp downloads, YouTube Data API calls
+(httplib2) and Whisper runs.
+
+Export (TRACING_EXPORTER):
+  otlp     OTLP/HTTP; the standard OTEL_EXPORTER_OTLP_ENDPOINT etc. apply
+  file     one JSON span per line appended to TRACING_FILE
+  console  stdout
+
+Off by default. span() is then a bare generator that yields None, and
+nothing is instrumented; the OpenTelemetry packages are only imported when
+tracing is on.
+"""
+import os
+from contextlib import contextmanager
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.tracing_service")
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "otlp")
+TRACING_FILE = os.environ.get("TRACING_FILE", "./traces.jsonl")
+TRACING_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "lubarsky")
+
+_tracer = None
+
+
+def _build_exporter():
+    if TRACING_EXPORTER == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        out = open(TRACING_FILE, "a", encoding="utf-8", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    if TRACING_EXPORTER == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter()
+
+
+def init_tracing(component: str, flask_app=None) -> bool:
+    """
+    Set up tracing for this process. Safe to call more than once.
+
+    :param component: "api" or "worker", recorded on every span
+    :param flask_app: instrument this Flask app as well
+    :return: True if tracing is on
+    """
+    global _tracer
+    if not TRACING_ENABLED:
+        return False
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.instrumentation.celery import CeleryInstrumentor
+            from opentelemetry.instrumentation.requests import RequestsInstrumentor
+            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        except ImportError as e:
+            logger.warning(f"TRACING_ENABLED is set but OpenTelemetry is not installed: {e}")
+            return False
+
+        provider = TracerProvider(resource=Resource.create({
+            "service.name": TRACING_SERVICE_NAME,
+            "service.namespace": "lubarsky",
+            "app.component": component,
+        }))
+        provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+        trace.set_tracer_provider(provider)
+
+        CeleryInstrumentor().instrument()
+        RequestsInstrumentor().instrument()
+        HTTPXClientInstrumentor().instrument()
+        _tracer = trace.get_tracer("app")
+        logger.info(f"Tracing on ({component}, exporter: {TRACING_EXPORTER})")
+
+    if flask_app is not None:
+        from opentelemetry.instrumentation.flask import FlaskInstrumentor
+
+        FlaskInstrumentor().instrument_app(flask_app)
+    return True
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Child span of whatever is current; yields None when tracing is off.
+    Exceptions are recorded on the span and re-raised.
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+def set_attributes(**attributes):
+    """
+    Tag the current span (e.g. a task span with its video_id).
+    """
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
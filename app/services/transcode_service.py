@@ -0,0 +1,204 @@
+# app/services/transcode_service.py
+"""
+Segmented parallel video transcoding.
+
+A single `ffmpeg -i in out` leaves scaling to the encoder's own threading,
+which flattens out well before a many-core box (or several boxes) is busy.
+Here the work is split instead:
+
+  1. split  - stream-copy the video into ~segment_seconds pieces; with -c copy
+              the segment muxer can only cut at keyframes, so every piece
+              starts with one and decodes on its own
+  2. encode - every piece is encoded independently (video only) on a
+              thread pool; each FFmpeg is its own process and holds a
+              host-wide encoder slot (see ffmpeg_service)
+  3. audio  - the audio track is encoded once, in parallel with step 2;
+              encoding audio per piece would leave priming gaps at the joins
+  4. concat - the encoded pieces are joined with the concat demuxer and muxed
+              with the audio, all stream copy (no second encode)
+
+Pieces are encoded with FFmpeg's default codecs for the output container,
+the same as convert_video(). Only the first video and audio streams are
+kept.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from app.services.ffmpeg_service import FFMPEG_MAX_CONCURRENCY, run_ffmpeg
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.transcode_service")
+
+TRANSCODE_SEGMENT_SECONDS = float(os.environ.get("TRANSCODE_SEGMENT_SECONDS", 60))
+# parallel encodes in local mode; the encoder slots cap it host-wide anyway
+TRANSCODE_WORKERS = int(os.environ.get("TRANSCODE_WORKERS", FFMPEG_MAX_CONCURRENCY))
+# seconds between progress reports while pieces are encoding
+PROGRESS_INTERVAL = 1.0
+
+
+class _Aborted(Exception):
+    """
+    Raised from an encode's progress callback once another step has failed,
+    so run_ffmpeg kills that FFmpeg and gives its slot back.
+    """
+
+
+def split_at_keyframes(input_file: str, work_dir: str, segment_seconds: float = None) -> list:
+    """
+    Stream-copy the first video stream of input_file into keyframe-aligned
+    pieces in work_dir.
+
+    :return: sorted list of piece paths
+    """
+    segment_seconds = segment_seconds or TRANSCODE_SEGMENT_SECONDS
+    pattern = os.path.join(work_dir, "piece_%05d.mkv")
+    cmd = [
+        "ffmpeg", "-y", "-i", input_file,
+        "-map", "0:v:0", "-c", "copy",
+        "-f", "segment", "-segment_time", str(segment_seconds), "-reset_timestamps", "1",
+        pattern,
+    ]
+    logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+    run_ffmpeg(cmd)
+    pieces = sorted(
+        os.path.join(work_dir, name) for name in os.listdir(work_dir)
+        if name.startswith("piece_") and name.endswith(".mkv")
+    )
+    logger.info(f"Split {input_file} into {len(pieces)} piece(s) of ~{segment_seconds:.0f}s")
+    return pieces
+
+
+def encoded_piece_path(piece: str, output_ext: str) -> str:
+    base, _ = os.path.splitext(piece)
+    return f"{base}.enc.{output_ext}"
+
+
+def encode_piece(piece: str, output_ext: str, threads: int = None, progress_callback=None, duration=None) -> str:
+    """
+    Encode one piece (video only) with the container's default codec.
+    """
+    output_file = encoded_piece_path(piece, output_ext)
+    cmd = ["ffmpeg", "-y", "-i", piece, "-an"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd.append(output_file)
+    run_ffmpeg(cmd, duration=duration, progress_callback=progress_callback)
+    return output_file
+
+
+def encode_audio(input_file: str, work_dir: str, output_ext: str, progress_callback=None, duration=None):
+    """
+    Encode the first audio stream once for the whole file; None if there is
+    no audio.
+    """
+    from app.convertor import ffprobe_has_audio
+
+    if not ffprobe_has_audio(input_file):
+        return None
+    output_file = os.path.join(work_dir, f"audio.{output_ext}")
+    run_ffmpeg(
+        ["ffmpeg", "-y", "-i", input_file, "-map", "0:a:0", "-vn", output_file],
+        duration=duration, progress_callback=progress_callback,
+    )
+    return output_file
+
+
+def concat_pieces(pieces: list, audio_file, output_file: str, work_dir: str) -> str:
+    """
+    Join encoded pieces (and the audio) without re-encoding.
+    """
+    list_file = os.path.join(work_dir, "pieces.txt")
+    with open(list_file, "w", encoding="utf-8") as f:
+        for piece in pieces:
+            escaped = os.path.abspath(piece).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+    if audio_file:
+        cmd += ["-i", audio_file, "-map", "0:v:0", "-map", "1:a:0"]
+    cmd += ["-c", "copy", output_file]
+    logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+    run_ffmpeg(cmd)
+    return output_file
+
+
+def transcode_segmented(
+    input_file: str,
+    output_file: str,
+    segment_seconds: float = None,
+    workers: int = None,
+    progress_callback=None,
+) -> str:
+    """
+    Transcode input_file into output_file (container from its extension)
+    by encoding keyframe-aligned pieces on a local pool.
+
+    :param progress_callback: called with 0-100 percent from the calling thread
+    :raises RuntimeError: if any FFmpeg step fails
+    """
+    from app.convertor import ffprobe_duration
+
+    output_ext = os.path.splitext(output_file)[1].lstrip(".")
+    workers = max(1, workers or TRANSCODE_WORKERS)
+    work_dir = tempfile.mkdtemp(prefix="transcode_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        pieces = split_at_keyframes(input_file, work_dir, segment_seconds)
+        durations = {piece: ffprobe_duration(piece) for piece in pieces}
+        total = sum(durations.values()) or 1.0
+        done = {piece: 0.0 for piece in pieces}
+        lock = threading.Lock()
+        failed = threading.Event()
+        # share the cores between the concurrent encodes
+        threads = max(1, (os.cpu_count() or 1) // min(workers, len(pieces) or 1))
+
+        def check_aborted(percent=None):
+            if failed.is_set():
+                raise _Aborted()
+
+        def tracker(piece):
+            def on_progress(percent):
+                check_aborted()
+                with lock:
+                    done[piece] = durations[piece] * percent / 100
+            return on_progress
+
+        with ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix="transcode") as pool:
+            audio_future = pool.submit(encode_audio, input_file, work_dir, output_ext, check_aborted, total)
+            futures = [
+                pool.submit(encode_piece, piece, output_ext, threads, tracker(piece), durations[piece] or None)
+                for piece in pieces
+            ]
+            # the audio is watched with the pieces so a broken job fails on the first error
+            pending = set(futures) | {audio_future}
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                    for future in finished:
+                        future.result()  # re-raise the first failure
+                    if progress_callback:
+                        with lock:
+                            encoded = sum(done.values())
+                        progress_callback(min(99.0, 100 * encoded / total))
+            except BaseException:
+                # don't start the remaining steps of a failed job, stop the running ones
+                failed.set()
+                for future in futures + [audio_future]:
+                    future.cancel()
+                raise
+            encoded_pieces = [future.result() for future in futures]
+            audio_file = audio_future.result()
+
+        concat_pieces(encoded_pieces, audio_file, output_file, work_dir)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        logger.exception("Segmented transcode failed!")
+        raise RuntimeError("Video conversion failed.") from e
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if progress_callback:
+        progress_callback(100.0)
+    logger.info(f"Segmented transcode of {input_file} -> {output_file} ({len(pieces)} pieces, {workers} workers)")
+    return output_file
@@ -1,12 +1,21 @@
 # app/services/transcript_service.py
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from contextlib import contextmanager
 from app.models.models import Transcript
+from app.services.export_service import save_exports
+from app.services.database_service import get_session
 from app import setup_logger
 import json
+import os
+import threading
 
 
 logger = setup_logger("app.services.transcript_service")
 
+# must stay well below STUCK_JOB_TIMEOUT (reaper_service)
+HEARTBEAT_INTERVAL = float(os.environ.get("TRANSCRIPT_HEARTBEAT_INTERVAL", 60))
+
 def update_transcript_status(session: Session, video_id: str, status: str):
     try:
         transcript = session.query(Transcript).filter_by(video_id=video_id).first()
@@ -18,7 +27,7 @@ def update_transcript_status(session: Session, video_id: str, status: str):
         raise
 
 
-def create_or_update_transcript(session: Session, video_id: str, transcription: str, words_list: list):
+def create_or_update_transcript(session: Session, video_id: str, transcription: str, words_list: list, source: str = "whisper"):
     try:
         transcript = session.query(Transcript).filter_by(video_id=video_id).first()
         if not transcript:
@@ -27,9 +36,52 @@ def create_or_update_transcript(session: Session, video_id: str, transcription:
         
         transcript.transcript = transcription
         transcript.raw_json = json.dumps(words_list, ensure_ascii=False)
+        transcript.source = source
         transcript.status = "done"
-        logger.info(f"Transcript for video_id '{video_id}' saved successfully")
+        session.flush()
+        logger.info(f"Transcript for video_id '{video_id}' saved successfully (source: {source})")
     except Exception as e:
         session.rollback()
         logger.error(f"Error saving transcript: {e}, video_id: {video_id}")
-        raise
\ No newline at end of file
+        raise
+
+    try:
+        # a nested transaction, so a failed export can't take the transcript with it
+        with session.begin_nested():
+            save_exports(session, video_id, words_list)
+    except Exception as e:
+        # served later by rendering on demand (export_service.get_export)
+        logger.error(f"Error saving exports: {e}, video_id: {video_id}")
+
+
+def touch_heartbeat(session: Session, video_id: str):
+    session.query(Transcript).filter_by(video_id=video_id).update(
+        {Transcript.heartbeat_at: func.now(), Transcript.updated_at: func.now()},
+        synchronize_session=False,
+    )
+
+
+@contextmanager
+def transcript_heartbeat(video_id: str, interval: float = None):
+    """
+    Keep the transcript row's heartbeat fresh while a long stage runs, so the
+    reaper can tell a slow job from one whose worker died.
+    """
+    interval = interval or HEARTBEAT_INTERVAL
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                with get_session() as session:
+                    touch_heartbeat(session, video_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for video_id '{video_id}' failed: {e}")
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{video_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join(timeout=5)
@@ -0,0 +1,262 @@
+# app/services/transcription_service.py
+"""
+Transcription backends.
+
+  openai - the remote whisper-1 API (app/openai_service.py)
+  local  - faster-whisper (CTranslate2) on the CPU, int8-quantized by default
+
+Every backend returns the same shape:
+  {"text": str, "words": [{"start", "end", "word"}, ...], "language": str|None, "duration": float|None}
+
+The local model is loaded once per worker process. Concurrent calls from a
+threaded worker (`-P threads`) are collected by a micro-batcher and pushed
+through BatchedInferencePipeline together, so several queued files share
+one batched forward pass instead of running one after another.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.transcription_service")
+
+TRANSCRIPTION_BACKEND = os.environ.get("TRANSCRIPTION_BACKEND", "openai")
+LOCAL_WHISPER_QUEUE = os.environ.get("LOCAL_WHISPER_QUEUE", "transcribe_local")
+LOCAL_WHISPER_MODEL = os.environ.get("LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_COMPUTE_TYPE = os.environ.get("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+LOCAL_WHISPER_CPU_THREADS = int(os.environ.get("LOCAL_WHISPER_CPU_THREADS", 0))
+LOCAL_WHISPER_BATCH_SIZE = int(os.environ.get("LOCAL_WHISPER_BATCH_SIZE", 8))
+# how long the batcher waits for more files before running a batch
+LOCAL_WHISPER_BATCH_WINDOW = float(os.environ.get("LOCAL_WHISPER_BATCH_WINDOW", 0.5))
+LOCAL_WHISPER_MAX_FILES = int(os.environ.get("LOCAL_WHISPER_MAX_FILES", 4))
+
+SAMPLE_RATE = 16000
+# BatchedInferencePipeline works on windows of at most 30 s
+WINDOW_SECONDS = 30
+
+
+class TranscriptionBackend:
+    """
+    Base class for transcription backends.
+    """
+    name = None
+    # value stored in Transcript.source
+    source = None
+
+    def transcribe(self, audio_path: str) -> dict:
+        raise NotImplementedError
+
+    def transcribe_many(self, audio_paths: list) -> list:
+        return [self.transcribe(path) for path in audio_paths]
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    name = "openai"
+    source = "whisper"
+
+    def transcribe(self, audio_path: str) -> dict:
+        from app.openai_service import transcribe_audio
+
+        raw_transcription = transcribe_audio(audio_path)
+        words_list = []
+        for w in raw_transcription.words:
+            words_list.append({"start": w.start, "end": w.end, "word": w.word})
+        return {
+            "text": raw_transcription.text,
+            "words": words_list,
+            "language": getattr(raw_transcription, "language", None),
+            "duration": getattr(raw_transcription, "duration", None),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_local_model():
+    """
+    Load the faster-whisper model once per process.
+    """
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise RuntimeError("The local backend needs faster-whisper: pip install faster-whisper") from e
+
+    started = time.perf_counter()
+    model = WhisperModel(
+        LOCAL_WHISPER_MODEL,
+        device="cpu",
+        compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+        cpu_threads=LOCAL_WHISPER_CPU_THREADS,
+    )
+    logger.info(
+        f"Loaded faster-whisper '{LOCAL_WHISPER_MODEL}' ({LOCAL_WHISPER_COMPUTE_TYPE}) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return model
+
+
+class _MicroBatcher:
+    """
+    Collects concurrent transcribe() calls and runs them as one batch.
+    """
+
+    def __init__(self, run_batch, max_items: int, window: float):
+        self.run_batch = run_batch
+        self.max_items = max_items
+        self.window = window
+        self.pending = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self.pending.put((item, future))
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._loop, name="whisper-batcher", daemon=True)
+                self.thread.start()
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.run_batch(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    name = "local"
+    source = "local_whisper"
+
+    _batcher = None
+    _batcher_lock = threading.Lock()
+
+    def transcribe(self, audio_path: str) -> dict:
+        with self._batcher_lock:
+            if LocalWhisperBackend._batcher is None:
+                LocalWhisperBackend._batcher = _MicroBatcher(
+                    self.transcribe_many, LOCAL_WHISPER_MAX_FILES, LOCAL_WHISPER_BATCH_WINDOW
+                )
+        return self._batcher.submit(audio_path).result()
+
+    def transcribe_many(self, audio_paths: list) -> list:
+        """
+        Decode every file, lay them end to end and run one batched pass.
+        Windows never straddle two files, so each segment maps back to
+        exactly one input by its offset.
+
+        The language is detected once per pass, so it is only reported when
+        the batch holds a single file.
+        """
+        import numpy as np
+        from faster_whisper import BatchedInferencePipeline, decode_audio
+
+        model = get_local_model()
+        pipeline = BatchedInferencePipeline(model=model)
+
+        audios, offsets, clips = [], [], []
+        offset = 0.0
+        for path in audio_paths:
+            audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+            duration = len(audio) / SAMPLE_RATE
+            audios.append(audio)
+            offsets.append((offset, duration))
+            start = 0.0
+            while start < duration:
+                end = min(start + WINDOW_SECONDS, duration)
+                # collect_chunks() slices the audio, so clips are in samples
+                clips.append({
+                    "start": int((offset + start) * SAMPLE_RATE),
+                    "end": int((offset + end) * SAMPLE_RATE),
+                })
+                start = end
+            offset += duration
+
+        started = time.perf_counter()
+        segments, info = pipeline.transcribe(
+            np.concatenate(audios),
+            batch_size=LOCAL_WHISPER_BATCH_SIZE,
+            word_timestamps=True,
+            vad_filter=False,
+            clip_timestamps=clips,
+        )
+        results = [{"text_parts": [], "words": []} for _ in audio_paths]
+        for segment in segments:
+            index = self._file_index(offsets, segment.start)
+            file_offset = offsets[index][0]
+            results[index]["text_parts"].append(segment.text.strip())
+            for w in segment.words or []:
+                results[index]["words"].append({
+                    "start": round(w.start - file_offset, 3),
+                    "end": round(w.end - file_offset, 3),
+                    "word": w.word.strip(),
+                })
+        logger.info(
+            f"Local whisper transcribed {len(audio_paths)} file(s), {offset:.0f}s of audio "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        return [
+            {
+                "text": " ".join(result["text_parts"]),
+                "words": result["words"],
+                "language": info.language if len(audio_paths) == 1 else None,
+                "duration": offsets[i][1],
+            }
+            for i, result in enumerate(results)
+        ]
+
+    @staticmethod
+    def _file_index(offsets: list, timestamp: float) -> int:
+        for index, (start, duration) in enumerate(offsets):
+            if timestamp < start + duration:
+                return index
+        return len(offsets) - 1
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+
+_instances = {}
+
+
+def get_backend(name: str = None) -> TranscriptionBackend:
+    """
+    Return the (process-wide) backend instance called `name`, or the
+    TRANSCRIPTION_BACKEND default.
+    """
+    name = name or TRANSCRIPTION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def get_backend_queue(name: str = None):
+    """
+    Queue the transcription task should be routed to, or None for the default.
+    The local backend gets its own queue so its workers keep the model warm.
+    """
+    name = name or TRANSCRIPTION_BACKEND
+    return LOCAL_WHISPER_QUEUE if name == LocalWhisperBackend.name else None
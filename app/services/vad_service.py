@@ -0,0 +1,183 @@
+# app/services/vad_service.py
+"""
+Voice-activity trimming before transcription.
+
+Speech regions are detected with FFmpeg's silencedetect on a band-passed
+copy of the signal (roughly the voice band), then only those regions are
+kept and concatenated into a mono 16 kHz FLAC. Less audio means less to
+encode, upload and pay Whisper for, and more headroom under the 25 MB cap.
+
+The offset map records where each kept region came from:
+  [[trimmed_start, original_start, length], ...]
+so timestamps produced on the trimmed audio can be mapped back to the
+original timeline with remap_words().
+"""
+import bisect
+import os
+import re
+import tempfile
+from app.services.ffmpeg_service import run_ffmpeg
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.vad_service")
+
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "true").lower() in ("1", "true", "yes")
+# anything quieter than this (after the voice band-pass) counts as silence
+VAD_NOISE_DB = float(os.environ.get("VAD_NOISE_DB", -35))
+# shortest gap worth cutting out, in seconds
+VAD_MIN_SILENCE = float(os.environ.get("VAD_MIN_SILENCE", 1.0))
+# kept around every speech region so word onsets aren't clipped
+VAD_PADDING = float(os.environ.get("VAD_PADDING", 0.25))
+# don't bother re-encoding if less than this share of the audio would go
+VAD_MIN_SAVING = float(os.environ.get("VAD_MIN_SAVING", 0.05))
+# keeps the aselect expression well below the kernel's per-argument limit
+VAD_MAX_REGIONS = 1000
+
+SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def detect_silences(input_file: str) -> list:
+    """
+    Run silencedetect over the voice band and return [(start, end), ...].
+    A trailing silence that runs to the end of the file has end None.
+    """
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", input_file, "-vn",
+        "-af", (
+            "highpass=f=200,lowpass=f=3400,"
+            f"silencedetect=noise={VAD_NOISE_DB}dB:d={VAD_MIN_SILENCE}"
+        ),
+        "-f", "null", "-",
+    ]
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as log:
+        run_ffmpeg(cmd, stderr=log)
+        log.seek(0)
+        output = log.read()
+
+    silences = []
+    start = None
+    for line in output.splitlines():
+        match = SILENCE_START_RE.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        silences.append((start, None))
+    return silences
+
+
+def speech_regions(silences: list, duration: float) -> list:
+    """
+    Complement of the silences within [0, duration], padded and merged.
+    """
+    regions = []
+    cursor = 0.0
+    for start, end in silences:
+        end = duration if end is None else end
+        if start > cursor:
+            regions.append([cursor, start])
+        cursor = max(cursor, end)
+    if cursor < duration:
+        regions.append([cursor, duration])
+
+    merged = []
+    for start, end in regions:
+        start = max(0.0, start - VAD_PADDING)
+        end = min(duration, end + VAD_PADDING)
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return _limit_regions(merged, VAD_MAX_REGIONS)
+
+
+def _limit_regions(regions: list, max_regions: int) -> list:
+    """
+    Close the smallest gaps until at most max_regions remain.
+    """
+    if len(regions) <= max_regions:
+        return regions
+    gaps = sorted(range(1, len(regions)), key=lambda i: regions[i][0] - regions[i - 1][1])
+    keep_gaps = set(gaps[len(regions) - max_regions:])
+    limited = [list(regions[0])]
+    for i in range(1, len(regions)):
+        if i in keep_gaps:
+            limited.append(list(regions[i]))
+        else:
+            limited[-1][1] = regions[i][1]
+    return limited
+
+
+def build_offset_map(regions: list) -> list:
+    offset_map = []
+    trimmed = 0.0
+    for start, end in regions:
+        length = end - start
+        offset_map.append([round(trimmed, 3), round(start, 3), round(length, 3)])
+        trimmed += length
+    return offset_map
+
+
+def remap_timestamp(t: float, offset_map: list) -> float:
+    """
+    Map a time on the trimmed audio back to the original timeline.
+    """
+    if not offset_map:
+        return t
+    trimmed_starts = [entry[0] for entry in offset_map]
+    index = max(0, bisect.bisect_right(trimmed_starts, t) - 1)
+    trimmed_start, original_start, length = offset_map[index]
+    return round(original_start + min(max(t - trimmed_start, 0.0), length), 3)
+
+
+def remap_words(words_list: list, offset_map: list) -> list:
+    """
+    Return a copy of words_list with start/end on the original timeline.
+    """
+    if not offset_map:
+        return words_list
+    return [
+        dict(word, start=remap_timestamp(word["start"], offset_map), end=remap_timestamp(word["end"], offset_map))
+        for word in words_list
+    ]
+
+
+def trim_to_speech(input_file: str, duration: float, output_file: str = None) -> tuple:
+    """
+    Keep only the speech in input_file.
+
+    :param duration: duration of input_file in seconds
+    :return: (path, offset_map); (input_file, None) when there is nothing
+             worth trimming
+    """
+    if duration <= 0:
+        return input_file, None
+
+    regions = speech_regions(detect_silences(input_file), duration)
+    kept = sum(end - start for start, end in regions)
+    if not regions or kept >= duration * (1 - VAD_MIN_SAVING):
+        logger.info(f"VAD: {kept:.0f}s of {duration:.0f}s is speech, not trimming")
+        return input_file, None
+
+    base, _ = os.path.splitext(input_file)
+    output_file = output_file or f"{base}.speech.flac"
+    select = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+    cmd = [
+        "ffmpeg", "-y", "-i", input_file, "-vn",
+        "-af", f"aselect='{select}',asetpts=N/SR/TB",
+        "-ac", "1", "-ar", "16000", "-c:a", "flac",
+        output_file,
+    ]
+    logger.debug(f"FFmpeg command: {' '.join(cmd[:6])} ... {output_file}")
+    run_ffmpeg(cmd)
+
+    logger.info(
+        f"VAD: kept {kept:.0f}s of {duration:.0f}s in {len(regions)} regions "
+        f"({100 * (1 - kept / duration):.0f}% removed) -> {output_file}"
+    )
+    return output_file, build_offset_map(regions)
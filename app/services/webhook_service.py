@@ -0,0 +1,282 @@
+# app/services/webhook_service.py
+"""
+Completion webhooks.
+
+/transcript may be given a callback_url. It is stored as a "waiting"
+webhook_deliveries row; when the transcript is finished (or has failed)
+notify_transcript() fills in the payload and queues deliver_webhook_task for
+every waiting row of that video, so requests that arrive while a job is
+already running are notified too.
+
+Each POST carries:
+  X-Webhook-Event      transcript.done | transcript.error
+  X-Webhook-Delivery   delivery id (same on every retry, for deduplication)
+  X-Webhook-Timestamp  unix seconds
+  X-Webhook-Signature  sha256=HMAC-SHA256(WEBHOOK_SECRET, "<timestamp>.<body>")
+
+Receivers verify the signature and reject stale timestamps. Failed attempts
+are retried with exponential backoff; 4xx answers other than 408/429 are
+final. Without WEBHOOK_SECRET nothing is sent.
+
+callback_url comes from unauthenticated callers, so the worker must not be
+usable to reach internal services: with WEBHOOK_ALLOWED_HOSTS set only those
+hosts (and their subdomains) are accepted, otherwise the host has to resolve
+to public addresses only. The check runs again before every attempt and the
+POST goes to the address it approved (TLS still verifies the hostname), so a
+host can't pass the check and then resolve to something else; redirects are
+not followed.
+"""
+import datetime
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import time
+from urllib.parse import urlparse
+from sqlalchemy.orm import Session
+from app.models.models import Transcript, WebhookDelivery
+from app.services.logging_service import setup_logger
+
+logger = setup_logger("app.services.webhook_service")
+
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", 10))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 8))
+# first retry after this many seconds, doubling up to WEBHOOK_MAX_BACKOFF
+WEBHOOK_BACKOFF = float(os.environ.get("WEBHOOK_BACKOFF", 10))
+WEBHOOK_MAX_BACKOFF = float(os.environ.get("WEBHOOK_MAX_BACKOFF", 3600))
+
+# comma-separated; when set, the only hosts callbacks may go to (private
+# addresses included, e.g. a local sink)
+WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.environ.get("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global rules out loopback, private, link-local, shared and reserved ranges
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_callback_address(url: str):
+    """
+    The address a callback to url may connect to, or None if the URL is not
+    an http(s) URL on an allowed host: one of WEBHOOK_ALLOWED_HOSTS if that
+    is set, otherwise one that resolves to public addresses only.
+    """
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    host = parsed.hostname.lower()
+    if WEBHOOK_ALLOWED_HOSTS and not any(
+        host == allowed or host.endswith("." + allowed) for allowed in WEBHOOK_ALLOWED_HOSTS
+    ):
+        return None
+    try:
+        addresses = [address[4][0] for address in socket.getaddrinfo(host, parsed.port, proto=socket.IPPROTO_TCP)]
+    except (OSError, ValueError, UnicodeError):
+        return None
+    if not addresses:
+        return None
+    if not WEBHOOK_ALLOWED_HOSTS and not all(_is_public_address(address) for address in addresses):
+        return None
+    return addresses[0].split("%")[0]
+
+
+def is_valid_callback_url(url: str) -> bool:
+    return resolve_callback_address(url) is not None
+
+
+def _pinned_request(url: str, address: str) -> tuple:
+    """
+    (session, url, Host header) for sending a request meant for url to
+    `address` instead of whatever the hostname resolves to at send time.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+
+    class PinnedHTTPSAdapter(HTTPAdapter):
+        # connect to the address, but do SNI and the certificate check for hostname
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["server_hostname"] = hostname
+            super().init_poolmanager(*args, **kwargs)
+
+    session = requests.Session()
+    # a proxy would resolve the hostname itself
+    session.trust_env = False
+    session.mount("https://", PinnedHTTPSAdapter())
+
+    userinfo, _, host_header = parsed.netloc.rpartition("@")
+    netloc = f"[{address}]" if ":" in address else address
+    if parsed.port:
+        netloc = f"{netloc}:{parsed.port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    return session, parsed._replace(netloc=netloc).geturl(), host_header
+
+
+def subscribe(session: Session, video_id: str, callback_url: str) -> WebhookDelivery:
+    """
+    Ask for callback_url to be notified when video_id's transcript is ready.
+    """
+    delivery = WebhookDelivery(video_id=video_id, callback_url=callback_url, status="waiting", attempts=0)
+    session.add(delivery)
+    session.flush()
+    return delivery
+
+
+def unsubscribe_waiting(session: Session, video_id: str) -> int:
+    """
+    Drop the callbacks still waiting on video_id, for a job that was never
+    queued.
+
+    :return: number of subscriptions removed
+    """
+    return session.query(WebhookDelivery).filter(
+        WebhookDelivery.video_id == video_id, WebhookDelivery.status == "waiting"
+    ).delete(synchronize_session=False)
+
+
+def build_payload(transcript: Transcript) -> tuple:
+    """
+    (event, payload) describing the finished transcript.
+    """
+    if transcript.status == "error":
+        return "transcript.error", {
+            "event": "transcript.error",
+            "videoId": transcript.video_id,
+            "status": transcript.status,
+            "error": transcript.error,
+        }
+    return "transcript.done", {
+        "event": "transcript.done",
+        "videoId": transcript.video_id,
+        "status": transcript.status,
+        "source": transcript.source,
+        "transcript": transcript.transcript,
+    }
+
+
+def notify_transcript(session: Session, video_id: str) -> list:
+    """
+    Turn the waiting deliveries of video_id into pending ones.
+
+    :return: ids of the deliveries to send (the caller queues them after
+             committing)
+    """
+    # locked, so two callers notifying the same video can't both send a row
+    waiting = session.query(WebhookDelivery).filter(
+        WebhookDelivery.video_id == video_id, WebhookDelivery.status == "waiting"
+    ).with_for_update().all()
+    if not waiting:
+        return []
+    transcript = session.get(Transcript, video_id)
+    if transcript is None:
+        return []
+
+    event, payload = build_payload(transcript)
+    body = json.dumps(payload, ensure_ascii=False, default=str)
+    for delivery in waiting:
+        delivery.event = event
+        delivery.payload = body
+        delivery.status = "pending"
+    session.flush()
+    return [delivery.id for delivery in waiting]
+
+
+def sign(body: bytes, timestamp: int, secret: str = None) -> str:
+    secret = WEBHOOK_SECRET if secret is None else secret
+    digest = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + body, hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+
+def verify_signature(body: bytes, timestamp: str, signature: str, secret: str = None,
+                     tolerance: float = 300) -> bool:
+    """
+    Receiver-side check, used by the local sink (benchmarks/webhook_sink.py).
+    """
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return hmac.compare_digest(sign(body, int(timestamp), secret), signature or "")
+
+
+def backoff_seconds(attempt: int) -> float:
+    return min(WEBHOOK_BACKOFF * 2 ** max(0, attempt - 1), WEBHOOK_MAX_BACKOFF)
+
+
+def _give_up(delivery: WebhookDelivery, error: str) -> bool:
+    delivery.status = "failed"
+    delivery.last_status_code = None
+    delivery.last_error = error[:255]
+    logger.error(f"Webhook {delivery.id} to {delivery.callback_url} not sent: {error}")
+    return False
+
+
+def attempt_delivery(session: Session, delivery: WebhookDelivery) -> bool:
+    """
+    POST the delivery once and record the outcome.
+
+    :return: True if it should be retried later
+    """
+    import requests
+
+    if not WEBHOOK_SECRET:
+        return _give_up(delivery, "WEBHOOK_SECRET is not set, refusing to send an unsigned webhook")
+    # the host may resolve differently now than when the callback was accepted
+    address = resolve_callback_address(delivery.callback_url)
+    if address is None:
+        return _give_up(delivery, "callback_url host is not allowed")
+
+    body = (delivery.payload or "{}").encode("utf-8")
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "lubarsky-webhooks/1.0",
+        "X-Webhook-Event": delivery.event or "",
+        "X-Webhook-Delivery": str(delivery.id),
+        "X-Webhook-Timestamp": str(timestamp),
+        "X-Webhook-Signature": sign(body, timestamp),
+    }
+
+    delivery.attempts += 1
+    http, url, headers["Host"] = _pinned_request(delivery.callback_url, address)
+    try:
+        with http:
+            response = http.post(url, data=body, headers=headers, timeout=WEBHOOK_TIMEOUT, allow_redirects=False)
+    except requests.RequestException as e:
+        delivery.last_status_code = None
+        delivery.last_error = str(e)[:255]
+        retry = True
+    else:
+        delivery.last_status_code = response.status_code
+        if 200 <= response.status_code < 300:
+            delivery.status = "delivered"
+            delivery.last_error = None
+            delivery.delivered_at = datetime.datetime.now(datetime.timezone.utc)
+            logger.info(f"Webhook {delivery.id} delivered to {delivery.callback_url}")
+            return False
+        delivery.last_error = f"HTTP {response.status_code}"
+        retry = response.status_code >= 500 or response.status_code in RETRYABLE_CLIENT_ERRORS
+
+    if not retry or delivery.attempts >= WEBHOOK_MAX_ATTEMPTS:
+        delivery.status = "failed"
+        logger.error(
+            f"Webhook {delivery.id} to {delivery.callback_url} failed after {delivery.attempts} attempt(s): "
+            f"{delivery.last_error}"
+        )
+        return False
+    logger.warning(f"Webhook {delivery.id} attempt {delivery.attempts} failed: {delivery.last_error}")
+    return True
@@ -1,115 +1,332 @@
 #./app/tasks.py
 
 from app.celery_app import celery 
-from app.convertor import download_youtube_video, compress_audio_extreme,get_file_size_mb
+from app.convertor import download_youtube_video, compress_audio_extreme,get_file_size_mb, ffprobe_duration, convert_video
+import math
 import os
 import sys
-from app.openai_service import transcribe_audio
+from app.services.transcription_service import get_backend
 import json
-from app import SessionLocal,setup_logger
-from app.models.models import Transcript
-from app.services.transcript_service import update_transcript_status, create_or_update_transcript
-from app.services.celery_state_service import update_celery_task_state
+from app import setup_logger
+from app.models.models import Transcript, Channel, WebhookDelivery, PipelineCheckpoint
+from app.services.transcript_service import update_transcript_status, create_or_update_transcript, transcript_heartbeat
+from app.services.celery_state_service import update_celery_task_state, make_progress_reporter
 from app.services.database_service import get_session
+from app.services.caption_service import fetch_caption_transcript
+from app.services.fingerprint_service import FINGERPRINT_ENABLED, deduplicate
+from app.services.vad_service import VAD_ENABLED, trim_to_speech, remap_words
+from app.services.rate_limit_service import RateLimitExceeded
+from app.services.checkpoint_service import INTERMEDIATE_STAGES, get_checkpoint, get_checkpoint_meta, save_checkpoint, clear_checkpoints
+from app.services.channel_service import sync_channel
+from app.services.webhook_service import notify_transcript, attempt_delivery, backoff_seconds
+from app.services.prefetch_service import PREFETCH_OUTTMPL, should_prefetch, release_prefetch, evict_prefetches
+from app.services.storage_service import LOCAL_STORAGE_DIR, get_storage, ensure_local, discard_local
+from app.services.search_service import SEARCH_ENABLED, index_transcript, unindexed_video_ids
+from app.services.reaper_service import reap_stuck_transcripts
+from app.services.tracing_service import span, set_attributes
+from app.services.admission_service import release as release_admission, dispatch_pending
 logger = setup_logger("app.tasker")
 
+# Threads per FFmpeg encode. One thread each lets several encodes share a box
+# predictably; 0 hands the decision back to FFmpeg.
+FFMPEG_THREADS = int(os.environ.get("FFMPEG_THREADS", 1))
+FFMPEG_FILTER_THREADS = int(os.environ.get("FFMPEG_FILTER_THREADS", 1))
+
+# A failed download is retried with exponential backoff; the partial file is
+# kept under a stable name so yt-dlp continues it instead of starting over.
+DOWNLOAD_MAX_RETRIES = int(os.environ.get("DOWNLOAD_MAX_RETRIES", 3))
+DOWNLOAD_RETRY_BACKOFF = int(os.environ.get("DOWNLOAD_RETRY_BACKOFF", 30))
+DOWNLOAD_OUTTMPL = '%(id)s.%(ext)s'
+# full video for /transcode; kept apart from the transcript pipeline's
+# downloads, which may be audio-only (prefetch)
+TRANSCODE_OUTTMPL = 'video-%(id)s.%(ext)s'
+
+
+def mark_transcript_error(video_id, error):
+    try:
+        with get_session() as session:
+            transcript = session.query(Transcript).filter_by(video_id=video_id).first()
+            if transcript:
+                transcript.update_status('error', session)
+                transcript.update_error(str(error)[:255], session)
+    except Exception as e:
+        logger.error(f"Error updating status: {e}")
+        logger.error(f"Context: video_id: {video_id}")
+    send_transcript_webhooks(video_id)
+    finish_admission(video_id)
+
+
+def mark_transcript_queued(video_id):
+    """
+    The job is waiting in the broker (next stage or a retry countdown), so
+    the reaper must leave it alone. Never raises.
+    """
+    try:
+        with get_session() as session:
+            update_transcript_status(session=session, video_id=video_id, status="queued")
+    except Exception as e:
+        logger.error(f"Failed to mark video_id '{video_id}' as queued: {e}")
+
+
+def finish_admission(video_id):
+    """
+    Free the client's admission slot and let the next waiting job in.
+    Never raises.
+    """
+    from app.services.pipeline_service import start_transcript_job
+
+    try:
+        release_admission(video_id)
+        dispatch_pending(start_transcript_job)
+    except Exception as e:
+        logger.error(f"Admission bookkeeping failed for video_id '{video_id}': {e}")
+
+
+def clear_intermediate_checkpoints(video_id):
+    """
+    Drop the download and compress artifacts of a persisted transcript.
+    Never raises.
+    """
+    try:
+        with get_session() as session:
+            clear_checkpoints(session, video_id, INTERMEDIATE_STAGES)
+    except Exception as e:
+        logger.error(f"Failed to clear checkpoints of video_id '{video_id}': {e}")
+
+
+def send_transcript_webhooks(video_id):
+    """
+    Queue delivery of every callback waiting on video_id. Never raises:
+    a webhook problem must not fail the transcription itself.
+    """
+    try:
+        with get_session() as session:
+            delivery_ids = notify_transcript(session, video_id)
+        for delivery_id in delivery_ids:
+            deliver_webhook_task.delay(delivery_id)
+    except Exception as e:
+        logger.error(f"Failed to queue webhooks for video_id '{video_id}': {e}")
+
+
+def queue_search_indexing(video_id):
+    """
+    Queue a finished transcript for the search index. Never raises.
+    """
+    if not SEARCH_ENABLED:
+        return
+    try:
+        index_transcript_task.delay(video_id)
+    except Exception as e:
+        logger.error(f"Failed to queue search indexing for video_id '{video_id}': {e}")
+
 
 @celery.task(bind=True,name="app.tasks.transcribe_audio_task")
-def transcribe_audio_task(self, download_result):
+def transcribe_audio_task(self, download_result, backend=None):
     logger.info("transcribe_audio_task started. Using hardcoded parameters.")
-    audio_path = download_result["audio_file_path"]
     video_id  = download_result["videoId"]
-    # session = SessionLocal()
+    set_attributes(video_id=video_id)
+
+    if download_result.get("transcription") is not None:
+        # triger_download already built the transcript (captions or a fingerprint match)
+        logger.info(f"Transcript for video_id '{video_id}' came from {download_result.get('source')}, skipping Whisper.")
+        update_celery_task_state(
+            task=self,
+            state="SUCCESS",
+            meta={"step": "done", "percent": 100}
+        )
+        clear_intermediate_checkpoints(video_id)
+        send_transcript_webhooks(video_id)
+        queue_search_indexing(video_id)
+        finish_admission(video_id)
+        return {"transcription": download_result["transcription"], "videoId": video_id}
+
+    # with object storage the audio may have been compressed on another node
+    audio_path = ensure_local(download_result["audio_file_path"])
 
     with get_session() as session:
-        update_transcript_status(
-            session=session,
-            video_id=video_id,
-            status="transcribing"
+        transcribed = get_checkpoint(session, video_id, "transcribe")
+        persisted = get_checkpoint(session, video_id, "persist")
+
+    if transcribed:
+        logger.info(f"Reusing transcription of video_id '{video_id}' from {transcribed.artifact_path}")
+        with open(ensure_local(transcribed.artifact_path), encoding="utf-8") as f:
+            result = json.load(f)
+        discard_local(transcribed.artifact_path)
+    else:
+        with get_session() as session:
+            update_transcript_status(
+                session=session,
+                video_id=video_id,
+                status="transcribing"
+            )
+
+        update_celery_task_state(
+            task=self,
+            state="PROGRESS",
+            meta={"step": "transcribing", "percent": 90}
         )
-        
-    update_celery_task_state(
-        task=self, 
-        state="PROGRESS",
-        meta={"step": "transcribing", "percent": 90} 
-    )
 
-    raw_transcription = transcribe_audio(audio_path)
+        transcription_backend = get_backend(backend)
+        logger.info(f"Transcribing video_id '{video_id}' with the '{transcription_backend.name}' backend")
+        try:
+            with transcript_heartbeat(video_id), span(
+                "whisper.transcribe", video_id=video_id, **{"transcription.backend": transcription_backend.name}
+            ):
+                result = transcription_backend.transcribe(audio_path)
+        except RateLimitExceeded as e:
+            # the shared OpenAI bucket is empty; come back when it has refilled
+            if self.request.retries < self.max_retries:
+                logger.warning(f"Transcription of video_id '{video_id}' deferred: {e}")
+                mark_transcript_queued(video_id)
+                raise self.retry(exc=e, countdown=math.ceil(e.retry_after))
+            mark_transcript_error(video_id, e)
+            raise
+        except Exception as e:
+            logger.exception(f"Transcription failed for video_id '{video_id}': {e}")
+            mark_transcript_error(video_id, e)
+            raise
 
-    words_list = []
-    for w in raw_transcription.words:
-        words_list.append({"start": w.start, "end": w.end, "word": w.word})
-    
+        words_list = result["words"]
+        offset_map = download_result.get("offset_map")
+        if offset_map:
+            # Whisper saw only the speech; put the words back on the video's timeline
+            words_list = remap_words(words_list, offset_map)
+        result = dict(result, words=words_list, source=transcription_backend.source)
 
-    try:
+        # the API call is the expensive part; keep its result next to the audio
+        result_path = f"{os.path.splitext(audio_path)[0]}.transcript.json"
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        result_uri = get_storage().put(result_path, f"transcripts/{video_id}/{os.path.basename(result_path)}")
         with get_session() as session:
-            create_or_update_transcript(session, video_id, raw_transcription.text, words_list)
-    except Exception as e:
-        logger.error(f"Failed to save transcript for video_id '{video_id}': {e}")
-        raise
+            save_checkpoint(session, video_id, "transcribe", result_uri)
+
+    if not (transcribed and persisted):
+        try:
+            with get_session() as session:
+                create_or_update_transcript(session, video_id, result["text"], result["words"], source=result["source"])
+                save_checkpoint(session, video_id, "persist")
+        except Exception as e:
+            logger.error(f"Failed to save transcript for video_id '{video_id}': {e}")
+            raise
+    clear_intermediate_checkpoints(video_id)
 
-    # try:
-    #     with get_session() as session:
-    #         transcript = session.query(Transcript).filter_by(video_id=video_id).first()
-    #         if not transcript:
-    #             transcript = Transcript(video_id=video_id)
-    #             session.add(transcript)
-            
-    #         transcript.transcript = raw_transcription.text
-    #         transcript.raw_json = json.dumps(words_list, ensure_ascii=False)
-    #         transcript.status = "done"
-    #         session.commit()
-    # except Exception as e:
-    #     session.rollback()
-    #     logger.error(f"Error saving transcript: {e}")
-    #     raise
-    # finally:
-    #     session.close()
-    
     update_celery_task_state(
         task=self, 
         state="SUCCESS",
         meta={"step": "done", "percent": 100} 
     )
+    send_transcript_webhooks(video_id)
+    queue_search_indexing(video_id)
+    finish_admission(video_id)
 
-    return {"transcription":raw_transcription.text,"videoId":video_id}
+    return {"transcription":result["text"],"videoId":video_id}
 
 
-@celery.task(bind=True, name='app.tasks.triger_download')
-def triger_download(self, video_id):
+@celery.task(bind=True, name='app.tasks.triger_download', max_retries=DOWNLOAD_MAX_RETRIES)
+def triger_download(self, video_id, captions_mode=None):
     logger.info("Script started. Using hardcoded parameters.")
+    set_attributes(video_id=video_id)
     video_url = f"https://www.youtube.com/watch?v={video_id}"
-    download_path = "./convertorData/"
-    session = SessionLocal()
+    download_path = LOCAL_STORAGE_DIR
 
-    update_celery_task_state(
-        task=self, 
-        state="PROGRESS",
-        meta={"step": "downloading", "percent": 10} 
-    )
+    with get_session() as session:
+        downloaded = get_checkpoint(session, video_id, "download")
+        compressed = get_checkpoint(session, video_id, "compress")
 
-    with session as sess:
-        update_transcript_status(
-            session=sess,
-            video_id=video_id,
-            status="downloading"
-        )
+    if compressed:
+        # an earlier attempt got as far as the compressed audio
+        logger.info(f"Reusing compressed audio of video_id '{video_id}': {compressed.artifact_path}")
+        mark_transcript_queued(video_id)
+        return {
+            "audio_file_path": compressed.artifact_path,
+            "videoId": video_id,
+            "offset_map": get_checkpoint_meta(compressed).get("offset_map"),
+        }
 
     try:
-        downloaded_file = download_youtube_video(video_url, download_path)
+        caption = fetch_caption_transcript(video_id, download_path, captions_mode)
     except Exception as e:
-        logger.exception(f"Failed to download video. Reason: {e}")
+        logger.warning(f"Caption fast-path failed for video_id '{video_id}', falling back to Whisper: {e}")
+        caption = None
+
+    if caption:
+        with get_session() as session:
+            create_or_update_transcript(session, video_id, caption["text"], caption["words"], source=caption["source"])
+        update_celery_task_state(
+            task=self,
+            state="PROGRESS",
+            meta={"step": "captions", "percent": 90}
+        )
+        return {
+            "audio_file_path": None,
+            "videoId": video_id,
+            "transcription": caption["text"],
+            "source": caption["source"],
+        }
+
+    if downloaded:
+        downloaded_file = downloaded.artifact_path
+        logger.info(f"Reusing download of video_id '{video_id}': {downloaded_file}")
+    else:
+        update_celery_task_state(
+            task=self, 
+            state="PROGRESS",
+            meta={"step": "downloading", "percent": 10} 
+        )
+
+        with get_session() as session:
+            update_transcript_status(
+                session=session,
+                video_id=video_id,
+                status="downloading"
+            )
+
         try:
-            with get_session() as session:
-                transcript = session.query(Transcript).filter_by(video_id=video_id).first()
-                transcript.update_status('error', session)
-                transcript.update_error(str(e), session)
+            with transcript_heartbeat(video_id):
+                downloaded_file = download_youtube_video(video_url, download_path, outtmpl=DOWNLOAD_OUTTMPL)
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error updating status: {e}")
-            logger.error(f"Context: video_id: {video_id}")
-    finally:
-        session.close()
+            if self.request.retries < self.max_retries:
+                countdown = DOWNLOAD_RETRY_BACKOFF * 2 ** self.request.retries
+                logger.warning(
+                    f"Download of video_id '{video_id}' failed ({e}), "
+                    f"retry {self.request.retries + 1}/{self.max_retries} in {countdown}s"
+                )
+                mark_transcript_queued(video_id)
+                raise self.retry(exc=e, countdown=countdown)
+            logger.exception(f"Failed to download video. Reason: {e}")
+            mark_transcript_error(video_id, e)
+            raise
+
+        with get_session() as session:
+            save_checkpoint(session, video_id, "download", downloaded_file)
+
+    if FINGERPRINT_ENABLED:
+        update_celery_task_state(
+            task=self,
+            state="PROGRESS",
+            meta={"step": "fingerprint", "percent": 30}
+        )
+        try:
+            with transcript_heartbeat(video_id), get_session() as session:
+                duplicate = deduplicate(session, video_id, downloaded_file)
+                if duplicate:
+                    create_or_update_transcript(
+                        session, video_id, duplicate["text"], duplicate["words"], source=duplicate["source"]
+                    )
+        except Exception as e:
+            logger.warning(f"Fingerprint lookup failed for video_id '{video_id}', transcribing normally: {e}")
+            duplicate = None
+
+        if duplicate:
+            return {
+                "audio_file_path": None,
+                "videoId": video_id,
+                "transcription": duplicate["text"],
+                "source": duplicate["source"],
+                "matched_video_id": duplicate["matched_video_id"],
+                "offset": duplicate["offset"],
+            }
     
     
     logger.info("Hardcoded choice = 3 (convert to audio).")
@@ -120,8 +337,25 @@ def triger_download(self, video_id):
     use_vbr = True
     logger.info("Hardcoded VBR for Opus = True.")
 
+    # Whisper only needs mono 16 kHz speech
+    audio_profile = 'speech'
+
     max_size_float = 25
     logger.info("Hardcoded max_size = 25mb.")
+
+    speech_file, offset_map = downloaded_file, None
+    if VAD_ENABLED:
+        update_celery_task_state(
+            task=self,
+            state="PROGRESS",
+            meta={"step": "trim_silence", "percent": 40}
+        )
+        try:
+            with transcript_heartbeat(video_id):
+                speech_file, offset_map = trim_to_speech(downloaded_file, ffprobe_duration(downloaded_file))
+        except Exception as e:
+            logger.warning(f"VAD trimming failed for video_id '{video_id}', using the full audio: {e}")
+            speech_file, offset_map = downloaded_file, None
     
     update_celery_task_state(
         task=self, 
@@ -129,42 +363,236 @@ def triger_download(self, video_id):
         meta={"step": "compress_audio", "percent": 50} 
     )
     
-    with session as sess:
+    with get_session() as session:
         update_transcript_status(
-            session=sess,
+            session=session,
             video_id=video_id,
             status="compress_audio"
         )
 
     try:
 
-        final_audio = compress_audio_extreme(
-            input_file=downloaded_file,
-            chosen_format=chosen_format,
-            chosen_codec=chosen_codec,
-            is_lossless=is_lossless,
-            max_size_mb=max_size_float,
-            initial_bitrate_kbps=96,
-            min_bitrate_kbps=32,
-            use_vbr=use_vbr,
-        )
-        if final_audio and os.path.exists(final_audio):
-            final_size_mb = get_file_size_mb(final_audio)
-            logger.info(
-                f"\nAudio compressed successfully to: {final_audio} "
-                f"({final_size_mb:.2f} MB)."
-            )
-            logger.info(f"Final audio file: {final_audio} ({final_size_mb:.2f} MB)")
-        else:
-            logger.info(
-                "\nAudio compression did not produce a final file. "
-                "Check the logs for details."
+        with transcript_heartbeat(video_id):
+            final_audio = compress_audio_extreme(
+                input_file=speech_file,
+                chosen_format=chosen_format,
+                chosen_codec=chosen_codec,
+                is_lossless=is_lossless,
+                max_size_mb=max_size_float,
+                initial_bitrate_kbps=32,
+                min_bitrate_kbps=12,
+                use_vbr=use_vbr,
+                profile=audio_profile,
+                threads=FFMPEG_THREADS,
+                filter_threads=FFMPEG_FILTER_THREADS,
+                progress_callback=make_progress_reporter(self, "compress_audio", 50, 85),
             )
-    except RuntimeError:
+        if not final_audio or not os.path.exists(final_audio):
+            raise RuntimeError(f"Could not compress {speech_file} under {max_size_float} MB")
+    except RuntimeError as e:
         logger.error("Audio conversion failed. Check log for details.")
+        mark_transcript_error(video_id, e)
+        raise
+    finally:
+        # the trimmed copy is only an input to compression
+        if speech_file != downloaded_file and os.path.exists(speech_file):
+            os.remove(speech_file)
+
+    final_size_mb = get_file_size_mb(final_audio)
+    logger.info(f"Final audio file: {final_audio} ({final_size_mb:.2f} MB)")
+
+    # publish the audio so whichever node picks up transcription can fetch it
+    audio_uri = get_storage().put(final_audio, f"audio/{video_id}/{os.path.basename(final_audio)}")
+
+    with get_session() as session:
+        save_checkpoint(session, video_id, "compress", audio_uri, meta={"offset_map": offset_map})
+        # handed to transcribe_audio_task; no heartbeat until it starts
+        update_transcript_status(session=session, video_id=video_id, status="queued")
 
     logger.info("Script finished.")
-    logger.info("\nAll done! Check 'video_downloader.log' for a very detailed record of every step.")
     
-    return {"audio_file_path":os.path.abspath(final_audio),"videoId":video_id}
+    return {"audio_file_path":audio_uri,"videoId":video_id,"offset_map":offset_map}
+
+
+@celery.task(name='app.tasks.sync_channels_task')
+def sync_channels_task():
+    """
+    Beat entry point: fan out one sync task per enabled channel.
+    """
+    with get_session() as session:
+        channel_ids = [
+            channel_id for (channel_id,) in
+            session.query(Channel.channel_id).filter(Channel.sync_enabled.is_(True))
+        ]
+    for channel_id in channel_ids:
+        sync_channel_task.delay(channel_id)
+    logger.info(f"Scheduled sync of {len(channel_ids)} channel(s)")
+    return len(channel_ids)
+
+
+@celery.task(name='app.tasks.sync_channel_task')
+def sync_channel_task(channel_id, max_pages=None, backfill=False):
+    with get_session() as session:
+        channel = session.get(Channel, channel_id)
+        if channel is None or not channel.sync_enabled:
+            return {"channelId": channel_id, "new_videos": []}
+        new_videos = sync_channel(session, channel, max_pages=max_pages, backfill=backfill)
+    return {"channelId": channel_id, "new_videos": [video["video_id"] for video in new_videos]}
+
+
+@celery.task(bind=True, name='app.tasks.deliver_webhook_task', max_retries=None)
+def deliver_webhook_task(self, delivery_id):
+    """
+    POST one webhook; attempts are counted in webhook_deliveries, which
+    decides when to give up (WEBHOOK_MAX_ATTEMPTS).
+    """
+    with get_session() as session:
+        delivery = session.get(WebhookDelivery, delivery_id)
+        if delivery is None or delivery.status != "pending":
+            return {"deliveryId": delivery_id, "status": delivery.status if delivery else None}
+        retry = attempt_delivery(session, delivery)
+        attempts, status = delivery.attempts, delivery.status
+
+    if retry:
+        raise self.retry(countdown=backoff_seconds(attempts))
+    return {"deliveryId": delivery_id, "status": status, "attempts": attempts}
+
+
+@celery.task(name='app.tasks.prefetch_audio_task')
+def prefetch_audio_task(video_id, duration=None):
+    """
+    Speculatively download the audio of video_id and leave it as the
+    video's download checkpoint for a later /transcript. The budget
+    reservation taken when it was queued is released at the end.
+    """
+    try:
+        return _prefetch_audio(video_id, duration)
+    finally:
+        release_prefetch(video_id)
+
+
+def _prefetch_audio(video_id, duration):
+    with get_session() as session:
+        if not should_prefetch(session, video_id, duration):
+            return {"videoId": video_id, "prefetched": False}
+
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    try:
+        audio_file = download_youtube_video(video_url, LOCAL_STORAGE_DIR, outtmpl=PREFETCH_OUTTMPL, audio_only=True)
+    except Exception as e:
+        # speculative work: never retried
+        logger.warning(f"Prefetch of video_id '{video_id}' failed: {e}")
+        return {"videoId": video_id, "prefetched": False}
+
+    with get_session() as session:
+        if session.get(PipelineCheckpoint, (video_id, "download")) is not None:
+            # the real pipeline got there first
+            os.remove(audio_file)
+            return {"videoId": video_id, "prefetched": False}
+        save_checkpoint(
+            session, video_id, "download", audio_file,
+            meta={"prefetch": True, "bytes": os.path.getsize(audio_file)},
+        )
+    logger.info(f"Prefetched audio of video_id '{video_id}': {audio_file}")
+    return {"videoId": video_id, "prefetched": True}
+
+
+@celery.task(name='app.tasks.evict_prefetches_task')
+def evict_prefetches_task():
+    with get_session() as session:
+        return evict_prefetches(session)
+
+
+@celery.task(bind=True, name='app.tasks.transcode_video_task', max_retries=DOWNLOAD_MAX_RETRIES)
+def transcode_video_task(self, video_id, output_ext, segment_seconds=None, workers=None):
+    """
+    Download video_id and convert it to output_ext with the segmented
+    (split at keyframes, encode pieces in parallel, concat) mode.
+    """
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    update_celery_task_state(
+        task=self,
+        state="PROGRESS",
+        meta={"step": "downloading", "percent": 5}
+    )
+    try:
+        downloaded_file = download_youtube_video(video_url, LOCAL_STORAGE_DIR, outtmpl=TRANSCODE_OUTTMPL)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            countdown = DOWNLOAD_RETRY_BACKOFF * 2 ** self.request.retries
+            logger.warning(f"Download of video_id '{video_id}' failed ({e}), retrying in {countdown}s")
+            raise self.retry(exc=e, countdown=countdown)
+        raise
+
+    output_file = convert_video(
+        downloaded_file, output_ext,
+        progress_callback=make_progress_reporter(self, "transcoding", 10, 95),
+        segmented=True, segment_seconds=segment_seconds, workers=workers,
+    )
+    output_uri = get_storage().put(output_file, f"video/{video_id}/{os.path.basename(output_file)}")
+    logger.info(f"Transcoded video_id '{video_id}' to {output_uri}")
+    return {"output_file_path": output_uri, "videoId": video_id}
+
+
+@celery.task(name='app.tasks.index_transcript_task')
+def index_transcript_task(video_id):
+    """
+    Embed a finished transcript into the search index.
+    """
+    from app.youtube_service import fetch_video_details
+
+    with get_session() as session:
+        transcript = session.get(Transcript, video_id)
+        if transcript is not None and transcript.channel_id is None:
+            # "search this channel" needs it; one videos.list call per video
+            try:
+                details = fetch_video_details(video_id) or {}
+                transcript.channel_id = details.get("channel_id")
+            except Exception as e:
+                logger.warning(f"Could not look up the channel of video_id '{video_id}': {e}")
+        chunks = index_transcript(session, video_id)
+    return {"videoId": video_id, "chunks": chunks}
+
+
+@celery.task(name='app.tasks.reindex_search_task')
+def reindex_search_task():
+    """
+    Backfill: queue every finished transcript that isn't indexed yet.
+    """
+    with get_session() as session:
+        video_ids = unindexed_video_ids(session)
+    for video_id in video_ids:
+        index_transcript_task.delay(video_id)
+    logger.info(f"Queued {len(video_ids)} transcript(s) for the search index")
+    return len(video_ids)
+
+
+@celery.task(name='app.tasks.reap_stuck_transcripts_task')
+def reap_stuck_transcripts_task():
+    """
+    Beat entry point: re-queue (or fail) transcripts whose worker died.
+    """
+    from app.services.pipeline_service import build_transcript_workflow
+
+    with get_session() as session:
+        requeue, failed = reap_stuck_transcripts(session)
+    for job in requeue:
+        workflow, _ = build_transcript_workflow(
+            job["video_id"], captions_mode=job["captions_mode"], backend=job["backend"]
+        )
+        workflow.apply_async()
+    for video_id in failed:
+        send_transcript_webhooks(video_id)
+        finish_admission(video_id)
+    return {"requeued": [job["video_id"] for job in requeue], "failed": failed}
+
+
+@celery.task(name='app.tasks.dispatch_transcripts_task')
+def dispatch_transcripts_task():
+    """
+    Beat safety net for the admission dispatcher (normally it runs on
+    submit and on every finished job).
+    """
+    from app.services.pipeline_service import start_transcript_job
 
+    return dispatch_pending(start_transcript_job)
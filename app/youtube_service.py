@@ -1,13 +1,52 @@
-from googleapiclient.discovery import build
 import os
 from dotenv import load_dotenv
 from typing import List, Dict, Any
+from functools import lru_cache
 import re 
+from urllib.parse import unquote
+from app.services.rate_limit_service import acquire, RateLimitExceeded
+from app.services.tracing_service import span
 
 load_dotenv()
 YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY')
 
 
+# Data API quota units per call; anything not listed costs 1
+YOUTUBE_QUOTA_COSTS = {
+    'youtube.search.list': 100,
+}
+
+
+@lru_cache(maxsize=None)
+def _rate_limited_request_class():
+    from googleapiclient.http import HttpRequest
+
+    class RateLimitedHttpRequest(HttpRequest):
+        """
+        Takes the call's quota cost from the shared "youtube" bucket
+        before every execute(), pagination included.
+        """
+        def execute(self, *args, **kwargs):
+            # httplib2 has no OpenTelemetry instrumentation of its own
+            with span(f"youtube {self.methodId}", **{"http.request.method": self.method, "rpc.method": self.methodId}):
+                acquire('youtube', YOUTUBE_QUOTA_COSTS.get(self.methodId, 1))
+                return super().execute(*args, **kwargs)
+
+    return RateLimitedHttpRequest
+
+
+def get_youtube_client():
+    """
+    Build a YouTube Data API client.
+
+    googleapiclient is imported here rather than at module level because it
+    is one of the slowest imports in the app and most routes never need it.
+    Requests built by the client are rate limited (see rate_limit_service).
+    """
+    from googleapiclient.discovery import build
+    return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, requestBuilder=_rate_limited_request_class())
+
+
 def get_youtube_video_id_from_url(url):
     regex = re.compile(
         r'(https?://)?'
@@ -24,7 +63,47 @@ def get_youtube_video_id_from_url(url):
         return None
 
 
-def fetch_channel_videos(channel_id: str, max_results: int = 10, page_token: str = None) -> Dict[str, Any]:
+CHANNEL_ID_RE = re.compile(r'UC[A-Za-z0-9_-]{22}')
+CHANNEL_URL_RE = re.compile(
+    r'^(?:https?://)?(?:(?:www|m)\.)?youtube\.com/'
+    r'(?P<kind>@|channel/|user/|c/)'
+    r'(?P<ref>[^/?#]+)'
+)
+
+ISO8601_DURATION_RE = re.compile(
+    r'^P(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$'
+)
+
+
+def parse_iso8601_duration(duration):
+    """
+    Converts a YouTube contentDetails.duration value (e.g. 'PT1H2M10S') to seconds.
+
+    Args:
+        duration (str): ISO 8601 duration as returned by the Data API.
+
+    Returns:
+        float: Duration in seconds, or None if it can't be parsed
+        (live streams report 'P0D').
+    """
+    if not duration:
+        return None
+    match = ISO8601_DURATION_RE.match(duration)
+    if not match:
+        return None
+    parts = {key: float(value) for key, value in match.groupdict().items() if value}
+    seconds = (
+        parts.get('days', 0) * 86400
+        + parts.get('hours', 0) * 3600
+        + parts.get('minutes', 0) * 60
+        + parts.get('seconds', 0)
+    )
+    return seconds or None
+
+
+def fetch_channel_videos(channel_id: str, max_results: int = 10, page_token: str = None,
+                         uploads_playlist_id: str = None) -> Dict[str, Any]:
     """
     Fetches videos from a channel's uploads playlist.
 
@@ -32,27 +111,31 @@ def fetch_channel_videos(channel_id: str, max_results: int = 10, page_token: str
         channel_id (str): The YouTube channel ID.
         max_results (int, optional): Number of videos per request. Defaults to 10.
         page_token (str, optional): Token for pagination. Defaults to None.
+        uploads_playlist_id (str, optional): The channel's uploads playlist, if
+            already known (e.g. from channel_service.resolve_channel); saves
+            a channels().list call.
 
     Returns:
         Dict[str, Any]: Dictionary containing videos, hasMore flag, and nextPageToken.
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
 
     # 1. Get the channel's uploads playlist ID
-    channel_response = youtube.channels().list(
-        part='contentDetails',
-        id=channel_id
-    ).execute()
-
-    if not channel_response.get('items'):
-        return {
-            'videos': [],
-            'hasMore': False,
-            'nextPageToken': None,
-            'message': 'Channel not found.'
-        }
+    if not uploads_playlist_id:
+        channel_response = youtube.channels().list(
+            part='contentDetails',
+            id=channel_id
+        ).execute()
+
+        if not channel_response.get('items'):
+            return {
+                'videos': [],
+                'hasMore': False,
+                'nextPageToken': None,
+                'message': 'Channel not found.'
+            }
 
-    uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists'].get('uploads')
+        uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists'].get('uploads')
 
     if not uploads_playlist_id:
         return {
@@ -116,7 +199,7 @@ def fetch_playlist_videos(playlist_id, max_results=50):
         list: A list of dictionaries containing video_id, title, published_at, and thumbnail_url
               for each video in the playlist.
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
     
     video_details = []
     
@@ -158,7 +241,7 @@ def fetch_playlist_videos(playlist_id, max_results=50):
     return video_details
 
 def fetch_video_comments(video_id, max_results=100):
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
     comments = []
 
     request = youtube.commentThreads().list(
@@ -201,13 +284,14 @@ def fetch_video_comments(video_id, max_results=100):
 
     return comments
 
-def get_channel_playlists(channel_id, max_results=50):
+def get_channel_playlists(channel_id, max_results=50, limit=None):
     """
     Fetch all playlists for a given YouTube channel.
 
     Args:
         channel_id (str): The ID of the YouTube channel (usually starts with 'UC').
         max_results (int): The maximum number of playlists to fetch per request (default: 50).
+        limit (int, optional): Stop paging once this many playlists are fetched.
 
     Returns:
         list of dict: A list of dictionaries containing:
@@ -216,7 +300,7 @@ def get_channel_playlists(channel_id, max_results=50):
             - description (str): The playlist description
             - picture (str or None): URL to the best-available thumbnail
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
     playlists = []
 
     request = youtube.playlists().list(
@@ -246,6 +330,9 @@ def get_channel_playlists(channel_id, max_results=50):
                 "picture": picture_url
             })
         
+        if limit is not None and len(playlists) >= limit:
+            return playlists[:limit]
+
         # Handle pagination if there's another page
         request = youtube.playlists().list_next(request, response)
 
@@ -261,7 +348,7 @@ def fetch_video_details(video_id):
     Returns:
         dict: A dictionary containing video details.
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
 
     try:
         request = youtube.videos().list(
@@ -307,6 +394,8 @@ def fetch_video_details(video_id):
 
         return video_details
 
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
@@ -323,7 +412,7 @@ def search_channels(handle, max_results=5):
     Returns:
         list: A list of dictionaries containing channel details.
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
     
     try:
         request = youtube.search().list(
@@ -346,6 +435,188 @@ def search_channels(handle, max_results=5):
         
         return channels
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         print(f"An error occurred while searching channels: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def parse_channel_url(url):
+    """
+    Works out how a channel is referred to in a URL or a bare reference.
+
+    Understands youtube.com/@handle, /channel/UC..., /user/name and /c/name
+    (with or without scheme, www./m., and trailing /videos etc.), as well
+    as a bare '@handle' or 'UC...' channel ID.
+
+    Args:
+        url (str): Channel URL, handle or ID.
+
+    Returns:
+        tuple: (kind, value) with kind one of 'id', 'handle', 'username', 'custom'.
+
+    Raises:
+        ValueError: If no channel reference can be found.
+    """
+    value = (url or '').strip()
+    if CHANNEL_ID_RE.fullmatch(value):
+        return 'id', value
+    if value.startswith('@') and '/' not in value:
+        return 'handle', value.lower()
+
+    match = CHANNEL_URL_RE.match(value)
+    if match:
+        kind = match.group('kind')
+        ref = unquote(match.group('ref'))
+        if kind.startswith('@'):
+            return 'handle', ('@' + ref).lower()
+        if kind == 'channel/' and CHANNEL_ID_RE.fullmatch(ref):
+            return 'id', ref
+        if kind == 'user/':
+            return 'username', ref
+        if kind == 'c/':
+            return 'custom', ref
+    raise ValueError(f'Not a YouTube channel URL or handle: {url}')
+
+
+def fetch_channel_info(channel_id=None, handle=None, username=None):
+    """
+    Looks up a channel by ID, @handle or legacy username (1 quota unit).
+
+    Args:
+        channel_id (str, optional): The YouTube channel ID.
+        handle (str, optional): The channel handle, with or without '@'.
+        username (str, optional): A legacy /user/ name.
+
+    Returns:
+        dict: {'channel_id', 'title', 'handle', 'uploads_playlist_id'},
+        or None if the channel doesn't exist.
+    """
+    youtube = get_youtube_client()
+    params = {'part': 'snippet,contentDetails'}
+    if channel_id:
+        params['id'] = channel_id
+    elif handle:
+        params['forHandle'] = handle
+    elif username:
+        params['forUsername'] = username
+    else:
+        raise ValueError('channel_id, handle or username is required')
+
+    items = youtube.channels().list(**params).execute().get('items')
+    if not items:
+        return None
+    custom_url = items[0]['snippet'].get('customUrl')
+    return {
+        'channel_id': items[0]['id'],
+        'title': items[0]['snippet'].get('title'),
+        # customUrl is the handle ('@name') for channels that have one
+        'handle': custom_url.lower() if custom_url and custom_url.startswith('@') else None,
+        'uploads_playlist_id': items[0]['contentDetails']['relatedPlaylists'].get('uploads'),
+    }
+
+
+def fetch_uploads_since(uploads_playlist_id, last_video_id=None, last_published_at=None, max_pages=1):
+    """
+    Fetches uploads newer than a high-water mark, newest first.
+
+    The uploads playlist is ordered newest first, so paging stops at the
+    first item that is the last seen video or not newer than
+    last_published_at. A poll with nothing new costs a single page.
+
+    Args:
+        uploads_playlist_id (str): The channel's uploads playlist ID.
+        last_video_id (str, optional): Newest video seen by the previous sync.
+        last_published_at (str, optional): Its snippet.publishedAt (RFC 3339).
+        max_pages (int): Upper bound on pages (50 items each) per call.
+
+    Returns:
+        list: Dictionaries with video_id, title, published_at and thumbnail_url.
+    """
+    youtube = get_youtube_client()
+    videos = []
+    request = youtube.playlistItems().list(
+        part='snippet',
+        playlistId=uploads_playlist_id,
+        maxResults=50
+    )
+
+    pages = 0
+    while request and pages < max_pages:
+        response = request.execute()
+        pages += 1
+        for item in response.get('items', []):
+            snippet = item.get('snippet', {})
+            video_id = snippet.get('resourceId', {}).get('videoId')
+            published_at = snippet.get('publishedAt', '')
+            if not video_id:
+                continue
+            if video_id == last_video_id:
+                return videos
+            # RFC 3339 timestamps in UTC compare correctly as strings
+            if last_published_at and published_at and published_at <= last_published_at:
+                return videos
+
+            thumbnails = snippet.get('thumbnails', {})
+            thumbnail_url = None
+            for size in ("standard", "high", "medium", "default"):
+                size_obj = thumbnails.get(size)
+                if size_obj and "url" in size_obj:
+                    thumbnail_url = size_obj["url"]
+                    break
+
+            videos.append({
+                'video_id': video_id,
+                'title': snippet.get('title', ''),
+                'published_at': published_at,
+                'thumbnail_url': thumbnail_url
+            })
+        request = youtube.playlistItems().list_next(request, response)
+
+    return videos
+
+
+def fetch_videos_details(video_ids):
+    """
+    Compact details of up to 50 videos per videos.list call (1 quota unit
+    per call), for enriching lists of videos.
+
+    Args:
+        video_ids (list): YouTube video IDs.
+
+    Returns:
+        dict: video_id -> {'duration', 'view_count', 'like_count',
+        'comment_count', 'caption'}; duration is in seconds.
+    """
+    if not video_ids:
+        return {}
+    youtube = get_youtube_client()
+    details = {}
+    for start in range(0, len(video_ids), 50):
+        response = youtube.videos().list(
+            part='contentDetails,statistics',
+            id=','.join(video_ids[start:start + 50])
+        ).execute()
+        for item in response.get('items', []):
+            statistics = item.get('statistics', {})
+            details[item['id']] = {
+                'duration': parse_iso8601_duration(item['contentDetails'].get('duration')),
+                'view_count': statistics.get('viewCount'),
+                'like_count': statistics.get('likeCount'),
+                'comment_count': statistics.get('commentCount'),
+                'caption': item['contentDetails'].get('caption') == 'true',
+            }
+    return details
+
+
+def fetch_video_durations(video_ids):
+    """
+    Durations of videos, batched 50 per videos.list call (1 quota unit each).
+
+    Args:
+        video_ids (list): YouTube video IDs.
+
+    Returns:
+        dict: video_id -> duration in seconds (None if unknown).
+    """
+    return {video_id: info['duration'] for video_id, info in fetch_videos_details(video_ids).items()}
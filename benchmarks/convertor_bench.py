@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# benchmarks/convertor_bench.py
+"""
+Benchmark suite for the convertor pipeline (app/convertor.py).
+
+Generates synthetic media fixtures with FFmpeg's lavfi sources, then runs:
+  - compress_audio_extreme for every format/codec in SUPPORTED_AUDIO_FORMATS
+    across a set of size targets, encoding profiles (AUDIO_PROFILES) and
+    with/without Opus VBR,
+  - convert_video for a set of target containers.
+
+For every run it records wall time, CPU time spent in FFmpeg, the number of
+encode attempts made by the iterative bitrate search, and the final size
+compared with the target. The report is written as JSON so results from
+different releases (or hosts) can be diffed and the best codec per workload
+picked from the "best" section.
+
+Usage (from the repository root):
+  python benchmarks/convertor_bench.py --duration 600 --targets 1,5,25 -o bench.json
+  python benchmarks/convertor_bench.py --formats ogg,mp3 --profiles speech --threads 1 --skip-video
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app import convertor  # noqa: E402
+
+
+def ffmpeg_version() -> str:
+    try:
+        output = subprocess.check_output(["ffmpeg", "-version"], stderr=subprocess.STDOUT).decode()
+        return output.splitlines()[0]
+    except Exception:
+        return "unknown"
+
+
+def make_audio_fixture(path: str, duration: int) -> str:
+    """
+    Stereo 48 kHz fixture: a tone sweep mixed with pink noise, stored as Opus
+    in WebM - roughly what yt-dlp hands us for a YouTube audio track.
+    """
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=220:beep_factor=4:sample_rate=48000:duration={duration}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.2:sample_rate=48000:duration={duration}",
+        "-filter_complex", "[0:a][1:a]amix=inputs=2:duration=shortest,aformat=channel_layouts=stereo",
+        "-c:a", "libopus", "-b:a", "128k",
+        path,
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def make_video_fixture(path: str, duration: int, size: str, video_codec: str) -> str:
+    """
+    Video fixture: testsrc2 pattern plus a tone, encoded quickly so fixture
+    generation doesn't dominate the run.
+    """
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", video_codec,
+    ]
+    if video_codec == "libx264":
+        cmd.extend(["-preset", "ultrafast"])
+    cmd.extend(["-c:a", "aac", "-shortest", path])
+    subprocess.run(cmd, check=True)
+    return path
+
+
+class AttemptCounter:
+    """
+    Wraps convertor.build_ffmpeg_audio_command to count encode attempts made
+    by compress_audio_extreme.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._original = None
+
+    def __enter__(self):
+        self._original = convertor.build_ffmpeg_audio_command
+
+        def counting(*args, **kwargs):
+            self.calls += 1
+            return self._original(*args, **kwargs)
+
+        convertor.build_ffmpeg_audio_command = counting
+        return self
+
+    def __exit__(self, *exc):
+        convertor.build_ffmpeg_audio_command = self._original
+        return False
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(func, *args, **kwargs) -> dict:
+    """
+    Run func and return wall/CPU time alongside its result or error.
+    """
+    cpu_before = children_cpu_seconds() + time.process_time()
+    wall_before = time.perf_counter()
+    result, error = None, None
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - wall_before
+    cpu = children_cpu_seconds() + time.process_time() - cpu_before
+    return {"result": result, "error": error, "wall_s": round(wall, 3), "cpu_s": round(cpu, 3)}
+
+
+def bench_audio(fixture: str, work_dir: str, formats: list, targets: list, profiles: list,
+                initial_bitrate: int, min_bitrate: int, threads: int, filter_threads: int) -> list:
+    results = []
+    for fmt in formats:
+        info = convertor.SUPPORTED_AUDIO_FORMATS[fmt]
+        vbr_options = [False, True] if info["codec"] == "libopus" else [False]
+        # Lossless codecs ignore the size target, so run them once.
+        run_targets = [None] if info["lossless"] else targets
+        for profile in profiles:
+            for target in run_targets:
+                for use_vbr in vbr_options:
+                    results.append(bench_audio_run(
+                        fixture, work_dir, fmt, info, profile, target, use_vbr,
+                        initial_bitrate, min_bitrate, threads, filter_threads,
+                    ))
+    return results
+
+
+def bench_audio_run(fixture: str, work_dir: str, fmt: str, info: dict, profile: str,
+                    target: float, use_vbr: bool, initial_bitrate: int, min_bitrate: int,
+                    threads: int, filter_threads: int) -> dict:
+    input_copy = os.path.join(work_dir, f"input_{fmt}_{profile}_{target}_{int(use_vbr)}.webm")
+    shutil.copyfile(fixture, input_copy)
+    with AttemptCounter() as counter:
+        run = measure(
+            convertor.compress_audio_extreme,
+            input_file=input_copy,
+            chosen_format=fmt,
+            chosen_codec=info["codec"],
+            is_lossless=info["lossless"],
+            max_size_mb=target,
+            initial_bitrate_kbps=initial_bitrate,
+            min_bitrate_kbps=min_bitrate,
+            use_vbr=use_vbr,
+            profile=profile,
+            threads=threads,
+            filter_threads=filter_threads,
+        )
+    output = run["result"]
+    final_size = convertor.get_file_size_mb(output) if output else None
+    for path in (input_copy, output):
+        if path and os.path.exists(path):
+            os.remove(path)
+    return {
+        "format": fmt,
+        "codec": info["codec"],
+        "lossless": info["lossless"],
+        "profile": profile,
+        "use_vbr": use_vbr,
+        "threads": threads,
+        "target_mb": target,
+        "wall_s": run["wall_s"],
+        "cpu_s": run["cpu_s"],
+        "attempts": counter.calls,
+        "final_mb": round(final_size, 3) if final_size is not None else None,
+        "target_ratio": round(final_size / target, 3) if final_size and target else None,
+        "met_target": bool(output) and (target is None or final_size <= target),
+        "error": run["error"],
+    }
+
+
+def bench_video(fixture: str, work_dir: str, containers: list, duration: int) -> list:
+    results = []
+    for ext in containers:
+        input_copy = os.path.join(work_dir, f"video_input_{ext}.mp4")
+        shutil.copyfile(fixture, input_copy)
+        run = measure(convertor.convert_video, input_copy, ext)
+        output = run["result"]
+        final_size = convertor.get_file_size_mb(output) if output else None
+        results.append({
+            "output_ext": ext,
+            "wall_s": run["wall_s"],
+            "cpu_s": run["cpu_s"],
+            "realtime_factor": round(duration / run["wall_s"], 2) if run["wall_s"] else None,
+            "final_mb": round(final_size, 3) if final_size is not None else None,
+            "error": run["error"],
+        })
+        for path in (input_copy, output):
+            if path and os.path.exists(path):
+                os.remove(path)
+    return results
+
+
+def pick_best(audio_results: list) -> dict:
+    """
+    For each profile and size target, the fastest configuration that met
+    the target.
+    """
+    best = {}
+    for row in audio_results:
+        if row["error"] or not row["met_target"] or row["target_mb"] is None:
+            continue
+        key = f"{row['profile']}:{row['target_mb']}"
+        if key not in best or row["wall_s"] < best[key]["wall_s"]:
+            best[key] = row
+    return best
+
+
+def parse_list(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=300, help="fixture duration in seconds")
+    parser.add_argument("--targets", default="1,5,25", help="comma-separated size targets in MB")
+    parser.add_argument("--formats", default=",".join(convertor.SUPPORTED_AUDIO_FORMATS),
+                        help="comma-separated formats from SUPPORTED_AUDIO_FORMATS")
+    parser.add_argument("--profiles", default=",".join(convertor.AUDIO_PROFILES),
+                        help="comma-separated encoding profiles from AUDIO_PROFILES")
+    parser.add_argument("--threads", type=int, default=None, help="FFmpeg -threads per encode")
+    parser.add_argument("--filter-threads", type=int, default=None, help="FFmpeg -filter_threads per encode")
+    parser.add_argument("--initial-bitrate", type=int, default=96)
+    parser.add_argument("--min-bitrate", type=int, default=32)
+    parser.add_argument("--video-containers", default="mp4,mkv", help="containers for convert_video")
+    parser.add_argument("--video-size", default="1280x720")
+    parser.add_argument("--video-codec", default="libx264", help="codec used to build the video fixture")
+    parser.add_argument("--skip-video", action="store_true")
+    parser.add_argument("--work-dir", default=None, help="keep fixtures here instead of a temp dir")
+    parser.add_argument("-o", "--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    formats = parse_list(args.formats)
+    unknown = [f for f in formats if f not in convertor.SUPPORTED_AUDIO_FORMATS]
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(unknown)}")
+    targets = [float(t) for t in parse_list(args.targets)]
+    profiles = parse_list(args.profiles)
+    unknown = [p for p in profiles if p not in convertor.AUDIO_PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="convertor_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        audio_fixture = make_audio_fixture(os.path.join(work_dir, "fixture_audio.webm"), args.duration)
+        audio_results = bench_audio(
+            audio_fixture, work_dir, formats, targets, profiles,
+            args.initial_bitrate, args.min_bitrate, args.threads, args.filter_threads,
+        )
+        video_results = []
+        if not args.skip_video:
+            video_fixture = make_video_fixture(
+                os.path.join(work_dir, "fixture_video.mp4"), args.duration, args.video_size, args.video_codec
+            )
+            video_results = bench_video(video_fixture, work_dir, parse_list(args.video_containers), args.duration)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "ffmpeg": ffmpeg_version(),
+            "fixture_duration_s": args.duration,
+            "initial_bitrate_kbps": args.initial_bitrate,
+            "min_bitrate_kbps": args.min_bitrate,
+            "threads": args.threads,
+            "filter_threads": args.filter_threads,
+        },
+        "audio": audio_results,
+        "video": video_results,
+        "best": pick_best(audio_results),
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# benchmarks/import_time.py
+"""
+Import-time profile for the entry points of the service.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point, parses the profile that CPython writes to stderr and
+reports the total cumulative import time plus the slowest top-level imports.
+
+It doubles as a regression guard: the run fails (exit code 1) if
+  - one of the FORBIDDEN_MODULES is imported eagerly by an entry point, or
+  - the total import time of an entry point exceeds its budget.
+
+Usage (from the repository root):
+  python benchmarks/import_time.py
+  python benchmarks/import_time.py --repeat 5 --json
+  python benchmarks/import_time.py --budget-ms app.convertor_server=900
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points and their import budgets in milliseconds.
+ENTRY_POINTS = {
+    "app.convertor_server": 1500,
+    "app.celery_app": 1000,
+    "app.tasks": 1500,
+}
+
+# Heavy SDKs that must only be imported on first use.
+FORBIDDEN_MODULES = (
+    "yt_dlp",
+    "openai",
+    "googleapiclient",
+    "psycopg2",
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse `-X importtime` output into {module: (self_us, cumulative_us, depth)}.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # header line: "self [us] | cumulative | imported package"
+            continue
+        raw_name = parts[2].rstrip()
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        modules[name] = (self_us, cumulative_us, depth)
+    return modules
+
+
+def profile_module(module: str) -> dict:
+    """
+    Import `module` in a fresh interpreter and return the parsed profile.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.splitlines()[-20:])
+        raise RuntimeError(f"Importing {module} failed:\n{tail}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(module: str, runs: list, top: int) -> dict:
+    """
+    Collapse several profiles of the same module into one report entry.
+    """
+    totals_ms = [sum(v[1] for v in run.values() if v[2] == 0) / 1000 for run in runs]
+    last = runs[-1]
+    top_level = sorted(
+        ((name, v[1] / 1000) for name, v in last.items() if v[2] == 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    forbidden = sorted(
+        name for name in last
+        if name.split(".")[0] in FORBIDDEN_MODULES
+    )
+    return {
+        "module": module,
+        "runs": len(runs),
+        "total_ms_median": round(statistics.median(totals_ms), 2),
+        "total_ms_min": round(min(totals_ms), 2),
+        "modules_imported": len(last),
+        "slowest_top_level": [{"module": n, "cumulative_ms": round(ms, 2)} for n, ms in top_level],
+        "forbidden_imported": forbidden,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per entry point")
+    parser.add_argument("--top", type=int, default=10, help="how many top-level imports to show")
+    parser.add_argument("--json", action="store_true", help="emit the report as JSON")
+    parser.add_argument(
+        "--budget-ms", action="append", default=[], metavar="MODULE=MS",
+        help="override the budget of an entry point"
+    )
+    parser.add_argument("modules", nargs="*", help="entry points to profile (default: all)")
+    args = parser.parse_args(argv)
+
+    budgets = dict(ENTRY_POINTS)
+    for item in args.budget_ms:
+        name, _, value = item.partition("=")
+        budgets[name] = float(value)
+
+    modules = args.modules or list(ENTRY_POINTS)
+    report = []
+    failed = False
+    for module in modules:
+        runs = [profile_module(module) for _ in range(max(1, args.repeat))]
+        entry = summarize(module, runs, args.top)
+        entry["budget_ms"] = budgets.get(module)
+        entry["ok"] = not entry["forbidden_imported"] and (
+            entry["budget_ms"] is None or entry["total_ms_median"] <= entry["budget_ms"]
+        )
+        failed = failed or not entry["ok"]
+        report.append(entry)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report:
+            status = "OK" if entry["ok"] else "FAIL"
+            print(
+                f"[{status}] {entry['module']}: {entry['total_ms_median']:.1f} ms median "
+                f"(budget {entry['budget_ms']} ms, {entry['modules_imported']} modules)"
+            )
+            for item in entry["slowest_top_level"]:
+                print(f"    {item['cumulative_ms']:9.1f} ms  {item['module']}")
+            if entry["forbidden_imported"]:
+                print(f"    eagerly imported: {', '.join(entry['forbidden_imported'])}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# benchmarks/transcription_bench.py
+"""
+Real-time factor (RTF) benchmark for the transcription backends.
+
+RTF = processing time / audio duration; below 1.0 means faster than
+real time. Each backend transcribes the given files one by one; the local
+backend is also run through transcribe_many to measure batching across
+files. Model load time for the local backend is reported separately so it
+doesn't skew the per-file numbers.
+
+Use real speech recordings (e.g. the compressed .ogg files the pipeline
+produces) - synthetic tones give meaningless results for speech models.
+
+Usage (from the repository root):
+  python benchmarks/transcription_bench.py convertorData/*.ogg
+  LOCAL_WHISPER_MODEL=base python benchmarks/transcription_bench.py --backends local a.ogg b.ogg
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app.convertor import ffprobe_duration  # noqa: E402
+from app.services import transcription_service  # noqa: E402
+
+
+def bench_backend(name: str, files: list, durations: dict, repeat: int) -> dict:
+    backend = transcription_service.get_backend(name)
+    report = {"backend": name, "files": [], "errors": []}
+
+    if name == transcription_service.LocalWhisperBackend.name:
+        started = time.perf_counter()
+        transcription_service.get_local_model()
+        report["model_load_s"] = round(time.perf_counter() - started, 3)
+        report["model"] = transcription_service.LOCAL_WHISPER_MODEL
+        report["compute_type"] = transcription_service.LOCAL_WHISPER_COMPUTE_TYPE
+
+    total_audio, total_wall = 0.0, 0.0
+    for path in files:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            try:
+                result = backend.transcribe_many([path])[0]
+            except Exception as e:
+                report["errors"].append(f"{path}: {type(e).__name__}: {e}")
+                break
+            wall = time.perf_counter() - started
+            total_audio += durations[path]
+            total_wall += wall
+            report["files"].append({
+                "file": os.path.basename(path),
+                "audio_s": round(durations[path], 2),
+                "wall_s": round(wall, 3),
+                "rtf": round(wall / durations[path], 4) if durations[path] else None,
+                "words": len(result["words"]),
+            })
+
+    report["rtf_sequential"] = round(total_wall / total_audio, 4) if total_audio else None
+
+    if name == transcription_service.LocalWhisperBackend.name and len(files) > 1:
+        started = time.perf_counter()
+        try:
+            backend.transcribe_many(files)
+            wall = time.perf_counter() - started
+            audio = sum(durations[p] for p in files)
+            report["rtf_batched"] = round(wall / audio, 4) if audio else None
+        except Exception as e:
+            report["errors"].append(f"batched: {type(e).__name__}: {e}")
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="audio files to transcribe")
+    parser.add_argument("--backends", default=",".join(transcription_service.BACKENDS),
+                        help="comma-separated backend names")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per file")
+    parser.add_argument("-o", "--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    durations = {path: ffprobe_duration(path) for path in args.files}
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    report = {
+        "meta": {
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "results": [bench_backend(name, args.files, durations, max(1, args.repeat)) for name in backends],
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
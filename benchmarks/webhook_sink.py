@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# benchmarks/webhook_sink.py
+"""
+Local HTTP sink for the completion webhooks.
+
+Prints every delivery as one JSON line (headers, signature check, payload
+summary) and answers 200, or an error for the first --fail-first requests so
+the retry/backoff path can be watched. The API and the workers need the
+same WEBHOOK_SECRET, and WEBHOOK_ALLOWED_HOSTS=<host> since callbacks to
+private addresses are refused otherwise. Point a job at it with:
+
+  curl -X POST localhost:5500/transcript -H 'Content-Type: application/json' \
+       -d '{"video_url": "...", "callback_url": "http://<host>:8765/hook"}'
+
+Usage (from the repository root):
+  WEBHOOK_SECRET=s3cret python benchmarks/webhook_sink.py --port 8765
+  python benchmarks/webhook_sink.py --fail-first 3 --fail-status 503
+"""
+
+import argparse
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app.services.webhook_service import verify_signature  # noqa: E402
+
+
+def make_handler(secret: str, fail_first: int, fail_status: int):
+    state = {"received": 0}
+    lock = threading.Lock()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                state["received"] += 1
+                count = state["received"]
+
+            signature = self.headers.get("X-Webhook-Signature")
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            record = {
+                "n": count,
+                "time": time.strftime("%H:%M:%S"),
+                "path": self.path,
+                "event": self.headers.get("X-Webhook-Event"),
+                "delivery": self.headers.get("X-Webhook-Delivery"),
+                "signature_valid": (
+                    verify_signature(body, self.headers.get("X-Webhook-Timestamp"), signature, secret)
+                    if signature else None
+                ),
+                "videoId": payload.get("videoId") if isinstance(payload, dict) else None,
+                "bytes": len(body),
+            }
+
+            status = fail_status if count <= fail_first else 200
+            if secret and record["signature_valid"] is not True:
+                status = 401
+            record["answered"] = status
+            print(json.dumps(record), flush=True)
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"ok": true}' if status == 200 else b'{"ok": false}')
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--secret", default=os.environ.get("WEBHOOK_SECRET", ""),
+                        help="reject deliveries whose signature doesn't verify (default: $WEBHOOK_SECRET)")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer --fail-status to the first N requests")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args(argv)
+
+    server = http.server.ThreadingHTTPServer(
+        (args.host, args.port), make_handler(args.secret, args.fail_first, args.fail_status)
+    )
+    print(f"Webhook sink listening on http://{args.host}:{args.port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+// src/hooks/useChannelOverview.ts
+
+import { useState, useEffect } from "react";
+import { fetchChannelOverview, ChannelOverview } from "../services/api";
+
+export function useChannelOverview(channelRef: string | undefined, maxResults: number = 10) {
+  const [overview, setOverview] = useState<ChannelOverview | null>(null);
+  const [loading, setLoading] = useState<boolean>(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!channelRef) {
+      setOverview(null);
+      setLoading(false);
+      setError(null);
+      return;
+    }
+
+    let isMounted = true;
+
+    async function fetchData() {
+      try {
+        setLoading(true);
+        setError(null);
+        const data = await fetchChannelOverview(channelRef as string, maxResults);
+        if (isMounted) {
+          setOverview(data);
+          setLoading(false);
+        }
+      } catch (err: any) {
+        if (isMounted) {
+          setError(err.message);
+          setLoading(false);
+        }
+      }
+    }
+
+    fetchData();
+
+    return () => {
+      isMounted = false;
+    };
+  }, [channelRef, maxResults]);
+
+  return { overview, loading, error };
+}
+
+export default useChannelOverview;
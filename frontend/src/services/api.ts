@@ -11,4 +11,47 @@ export async function fetchChannelVideos(channelId: string, maxResults: number =
     const data = await response.json();
     return data; // This would be an array of video objects
   }
-  
\ No newline at end of file
+  
+export type ChannelOverviewVideo = {
+  video_id: string;
+  title: string;
+  published_at: string;
+  thumbnail_url?: string;
+  duration?: number | null;
+  view_count?: string | null;
+  like_count?: string | null;
+  comment_count?: string | null;
+  caption?: boolean;
+  transcript_status: string | null;
+  transcript_source: string | null;
+};
+
+export type ChannelOverview = {
+  channel: { channel_id: string; handle: string | null; title: string | null };
+  playlists: { id: string; title: string; description: string; picture?: string }[];
+  videos: ChannelOverviewVideo[];
+  hasMore: boolean;
+  nextPageToken: string | null;
+  errors: Record<string, string>;
+};
+
+// Playlists, uploads and transcript statuses in a single round trip.
+// channelRef may be a channel ID or an @handle.
+export async function fetchChannelOverview(
+  channelRef: string,
+  maxResults: number = 10,
+  pageToken?: string
+): Promise<ChannelOverview> {
+  const params = new URLSearchParams({ max_results: String(maxResults) });
+  if (pageToken) params.set("page_token", pageToken);
+  const response = await fetch(
+    `/api/youtube/channel_overview/${encodeURIComponent(channelRef)}?${params}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || `Error fetching channel overview: ${response.statusText}`);
+  }
+
+  return response.json();
+}
@@ -0,0 +1,59 @@
+# tests/test_transcription_service.py
+import wave
+from types import SimpleNamespace
+import pytest
+
+np = pytest.importorskip("numpy")
+faster_whisper = pytest.importorskip("faster_whisper")
+
+from faster_whisper.vad import collect_chunks
+from app.services import transcription_service
+from app.services.transcription_service import SAMPLE_RATE, LocalWhisperBackend
+
+
+def write_silence(path, seconds):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(b"\x00\x00" * int(seconds * SAMPLE_RATE))
+
+
+class FakePipeline:
+    """
+    Stands in for BatchedInferencePipeline: cuts the audio the way the real
+    one does and returns one segment per clip.
+    """
+
+    def __init__(self, model):
+        pass
+
+    def transcribe(self, audio, clip_timestamps=None, **kwargs):
+        chunks, _ = collect_chunks(audio, clip_timestamps)
+        assert sum(len(chunk) for chunk in chunks) == len(audio)
+        segments = []
+        for i, clip in enumerate(clip_timestamps):
+            start, end = clip["start"] / SAMPLE_RATE, clip["end"] / SAMPLE_RATE
+            assert end - start <= transcription_service.WINDOW_SECONDS
+            segments.append(SimpleNamespace(
+                start=start, end=end, text=f" clip{i}",
+                words=[SimpleNamespace(start=start + 0.1, end=start + 0.2, word=f" w{i}")],
+            ))
+        return iter(segments), SimpleNamespace(language="en")
+
+
+def test_transcribe_many_maps_clips_back_to_files(tmp_path, monkeypatch):
+    first, second = tmp_path / "first.wav", tmp_path / "second.wav"
+    write_silence(first, 40)
+    write_silence(second, 5)
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakePipeline)
+    monkeypatch.setattr(transcription_service, "get_local_model", lambda: object())
+
+    results = LocalWhisperBackend().transcribe_many([str(first), str(second)])
+
+    assert [result["text"] for result in results] == ["clip0 clip1", "clip2"]
+    assert [result["duration"] for result in results] == [40, 5]
+    assert results[0]["words"][1] == {"start": 30.1, "end": 30.2, "word": "w1"}
+    assert results[1]["words"] == [{"start": 0.1, "end": 0.2, "word": "w2"}]
+    # detected once for the whole batch, so not attributed to either file
+    assert [result["language"] for result in results] == [None, None]